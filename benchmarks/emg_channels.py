@@ -0,0 +1,46 @@
+"""Per-channel cost of the vectorized EMG engine for growing channel counts.
+
+Feeds synthetic EMG to ``EMGEngine`` in 100 ms chunks (one GUI tick) and
+reports the time per tick and per channel.
+
+    python -m benchmarks.emg_channels --fs 2000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from funcpack.metrics import EMGEngine
+
+
+def bench(n_channels, fs, tick=0.1, n_ticks=200, seed=0):
+    rng = np.random.default_rng(seed)
+    chunk = int(tick * fs)
+    engine = EMGEngine(fs, [f"EMG{i}" for i in range(n_channels)])
+    engine.set_baseline(rng.standard_normal((n_channels, int(engine.baseline_duration * fs))))
+
+    data = rng.standard_normal((n_channels, chunk * n_ticks))
+    times = np.empty(n_ticks)
+    for k in range(n_ticks):
+        t0 = time.perf_counter()
+        engine.update(data[:, k * chunk:(k + 1) * chunk])
+        engine.zscores()
+        times[k] = time.perf_counter() - t0
+    return np.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fs", type=float, default=2000)
+    parser.add_argument("--channels", type=int, nargs="+", default=[4, 16, 64])
+    args = parser.parse_args()
+
+    print(f"fs = {args.fs:g} Hz, 100 ms ticks")
+    print(f"{'channels':>8} {'tick, ms':>10} {'per channel, us':>16}")
+    for n in args.channels:
+        t = bench(n, args.fs)
+        print(f"{n:>8} {1e3 * t:>10.3f} {1e6 * t / n:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Frame-time jitter of a 33 ms Qt timer with DSP inline vs on ComputeWorker.
+
+Replays a recording from ``dataset/`` through ``PlayerLSL`` and runs the
+per-tick DSP that the GUI used to run inside its timer slots (batch
+``compute_heart_params`` over 15 s plus ``get_online_EMG`` on every EMG
+channel). In ``inline`` mode it runs in the timer slot, in ``worker`` mode
+it is submitted to ``ComputeWorker``. Reports the frame interval statistics.
+
+    QT_QPA_PLATFORM=offscreen python -m benchmarks.gui_jitter dataset/NeoRec_2025-11-04_16-47-32.edf
+
+NeoRec recording, 20 s per mode, one CPU core (frame interval, ms):
+
+    load  mode    frames  mean   std   p95   max   late
+     1    inline   614   32.00  0.68  32.69  41.63    0
+     1    worker   623   32.00  0.59  32.39  37.89    0
+    20    inline   616   32.24  1.27  34.55  43.35    0
+    20    worker   622   32.00  0.89  32.56  40.08    0
+    60    inline   355   57.38  4.00  63.10  94.86  354
+    60    worker   621   32.00  0.57  32.39  37.33    0
+"""
+import argparse
+import sys
+import time
+import uuid
+
+import numpy as np
+from PyQt5.QtCore import QTimer, QEventLoop
+from PyQt5.QtWidgets import QApplication
+from mne_lsl.player import PlayerLSL as Player
+from mne_lsl.stream import StreamLSL as Stream
+
+from compute_worker import ComputeWorker
+from funcpack.acquisition import AcquisitionService
+from funcpack.config import load_config
+from funcpack.metrics import compute_heart_params, get_baseline_EMG, get_online_EMG
+
+
+def legacy_tick(acquisition, ppg_idx, emg_idx, emg_baseline, load):
+    fs = int(acquisition.fs)
+    for _ in range(load):
+        if ppg_idx is not None:
+            ppg, _ = acquisition.get_window(15, picks=ppg_idx)
+            compute_heart_params(np.array(ppg), fs)
+        for k, idx in enumerate(emg_idx):
+            emg, _ = acquisition.get_window(2, picks=idx)
+            get_online_EMG(np.array(emg), fs, {"mean_emg": emg_baseline["mean_emg"][k],
+                                               "std_emg": emg_baseline["std_emg"][k]})
+
+
+def run(app, mode, acquisition, args, ppg_idx, emg_idx, emg_baseline):
+    worker = ComputeWorker()
+    worker.start()
+    stamps = []
+
+    def frame():
+        stamps.append(time.perf_counter())
+        if mode == "inline":
+            legacy_tick(acquisition, ppg_idx, emg_idx, emg_baseline, args.load)
+        else:
+            worker.submit("tick", legacy_tick, acquisition, ppg_idx, emg_idx, emg_baseline, args.load)
+
+    timer = QTimer()
+    timer.timeout.connect(frame)
+    timer.start(args.interval)
+    loop = QEventLoop()
+    QTimer.singleShot(int(1000 * args.duration), loop.quit)
+    loop.exec_()
+    timer.stop()
+    worker.stop()
+
+    dt = 1e3 * np.diff(stamps)
+    return {
+        "frames": len(dt),
+        "mean_ms": dt.mean(),
+        "std_ms": dt.std(),
+        "p95_ms": np.percentile(dt, 95),
+        "max_ms": dt.max(),
+        "late": int(np.sum(dt > 1.5 * args.interval)),
+        "coalesced": worker.coalesced,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("fname")
+    parser.add_argument("--duration", type=float, default=20, help="seconds per mode")
+    parser.add_argument("--interval", type=int, default=33, help="frame interval, ms")
+    parser.add_argument("--load", type=int, default=1, help="legacy ticks per frame")
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    source_id = uuid.uuid4().hex
+    player = Player(args.fname, chunk_size=200, source_id=source_id, name="PPG_Stream").start()
+    stream = Stream(bufsize=60, source_id=source_id, name="PPG_Stream").connect()
+    acquisition = AcquisitionService(stream).start()
+
+    config = load_config()
+    ppg = acquisition.picks(config["ppg"]["channels"])
+    emg_idx = acquisition.picks(config["emg"]["channels"])
+    time.sleep(20)  # fill 20 s for the EMG baseline and the 15 s PPG window
+    emg_baseline = None
+    if emg_idx:
+        emg_baseline = get_baseline_EMG(acquisition.get_window(20, picks=emg_idx)[0], acquisition.fs)
+
+    try:
+        for mode in ("inline", "worker"):
+            res = run(app, mode, acquisition, args, ppg[0] if ppg else None, emg_idx, emg_baseline)
+            print(f"{mode:>7}: " + ", ".join(f"{k}={v:.2f}" if isinstance(v, float) else f"{k}={v}"
+                                           for k, v in res.items()))
+    finally:
+        acquisition.stop()
+        stream.disconnect()
+        player.stop()
+
+
+if __name__ == "__main__":
+    main()
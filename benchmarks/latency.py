@@ -0,0 +1,93 @@
+"""End-to-end sample-to-feedback latency of the GUI on a replayed recording.
+
+Replays a recording from ``dataset/`` through a local ``PlayerLSL`` and
+runs the real ``HeartApp``, ``FeedWindow``, ``FeedWindowEMG`` and
+``GameWindow`` offscreen: the baselines are collected from the replay, then
+training runs for ``--duration`` seconds and the latency from the LSL
+timestamp of the newest sample to the rendered feedback is reported per
+window.
+
+    QT_QPA_PLATFORM=offscreen python -m benchmarks.latency dataset/NeoRec_2025-11-04_16-47-32.edf
+"""
+import argparse
+import json
+import sys
+import time
+import uuid
+
+from PyQt5.QtCore import QEventLoop
+from PyQt5.QtWidgets import QApplication
+from mne_lsl.player import PlayerLSL as Player
+from mne_lsl.stream import StreamLSL as Stream
+
+from feed_window import FeedWindow
+from feed_window_EMG import FeedWindowEMG, GameWindow
+from funcpack.config import load_config
+from main_window import HeartApp
+
+
+def run_for(app, seconds, until=None):
+    """Process Qt events for ``seconds`` or until ``until()`` is true."""
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        if until is not None and until():
+            return True
+        app.processEvents(QEventLoop.AllEvents, 20)
+        time.sleep(0.001)
+    return until is None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("fname")
+    parser.add_argument("--duration", type=float, default=60, help="seconds of training to measure")
+    parser.add_argument("--chunk-size", type=int, default=200, help="PlayerLSL chunk size")
+    parser.add_argument("--baseline-timeout", type=float, default=90)
+    parser.add_argument("-o", "--out", default=None, help="write the latency summary as JSON")
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    gui = HeartApp()
+    source_id = uuid.uuid4().hex
+    gui.player = Player(args.fname, chunk_size=args.chunk_size, source_id=source_id, name="PPG_Stream").start()
+    gui.stream = Stream(bufsize=60, source_id=source_id, name="PPG_Stream").connect()
+    gui._start_acquisition()
+    gui._start_updates()
+
+    feeds = []
+    if gui.ppg_idx is not None:
+        gui.feed_window = FeedWindow(gui)
+        gui.feed_window.baseline_PPG()
+        feeds.append(gui.feed_window)
+    if gui.acquisition.picks(load_config()["emg"]["channels"]):
+        gui.emg_feed_window = FeedWindowEMG(gui)
+        gui.emg_feed_window.baseline_EMG()
+        feeds.append(gui.emg_feed_window)
+    if not feeds:
+        sys.exit("No PPG or EMG channels in the recording.")
+
+    game = None
+    try:
+        print("Collecting baselines from the replay...")
+        if not run_for(app, args.baseline_timeout, until=lambda: all(f.baseline_collected for f in feeds)):
+            sys.exit("Baseline collection timed out.")
+        for feed in feeds:
+            feed.start_training()
+        game = GameWindow(gui) if hasattr(gui, "emg_feed_window") else None
+
+        gui.latency.reset()
+        run_for(app, args.duration)
+        print(f"Sample-to-feedback latency, chunk size {args.chunk_size}, {args.duration:.0f} s:")
+        print(gui.latency.report())
+        if args.out:
+            with open(args.out, "w", encoding="utf-8") as f:
+                json.dump({"fname": args.fname, "chunk_size": args.chunk_size,
+                           "latency": gui.latency.summary()}, f, indent=1)
+    finally:
+        if game is not None:
+            game.close_game()
+        gui.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+"""Benchmark suite for the funcpack hot paths.
+
+Sweeps sample rate, window length and channel count over synthetic signals
+(and, with ``--dataset``, windows, streaming ticks and the offline
+analysis of the recordings in ``dataset/``),
+reports latency percentiles and peak allocation per call, writes the
+results as JSON and can fail when a case regresses against an earlier run.
+
+    python -m benchmarks.suite --quick -o bench.json
+    python -m benchmarks.suite --quick --compare bench.json --threshold 1.3
+"""
+import argparse
+import glob
+import itertools
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import scipy
+
+from funcpack.config import load_config, select_channels
+from funcpack.filters import FilterBank, bandpass_EMG, bandpass_HRV
+from funcpack.metrics import (EMGEngine, PPGBeatTracker, compute_emg_params, compute_heart_params,
+                              get_baseline_EMG, get_online_PPG)
+from funcpack.offline import analyze_emg, analyze_ppg
+
+SAMPLE_RATES = (50, 250, 500, 1000, 2000)
+WINDOWS = (2, 5, 15, 30, 60)
+CHANNELS = (1, 4, 16, 64)
+QUICK = {"fs": (250, 1000), "windows": (2, 15), "channels": (1, 16)}
+
+
+# ============================== Signals =======================================
+
+def synthetic_ppg(fs, seconds, n_channels=1, hr=72, seed=0):
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * fs)) / fs
+    phase = 2 * np.pi * hr / 60 * t + 0.3 * np.sin(2 * np.pi * 0.25 * t)  # some HRV
+    pulse = np.maximum(np.sin(phase), 0) ** 3 + 0.3 * np.maximum(np.sin(phase - 1.2), 0) ** 2
+    sig = pulse + 0.05 * rng.standard_normal((n_channels, t.size)) + 2.0
+    return sig[0] if n_channels == 1 else sig
+
+
+def synthetic_emg(fs, seconds, n_channels=1, seed=0):
+    rng = np.random.default_rng(seed)
+    n = int(seconds * fs)
+    bursts = 1 + 4 * (np.sin(2 * np.pi * 0.2 * np.arange(n) / fs) > 0.7)
+    sig = rng.standard_normal((n_channels, n)) * bursts + 0.5
+    return sig[0] if n_channels == 1 else sig
+
+
+# ============================== Timing ========================================
+
+def measure(fn, min_calls=5, max_calls=200, budget=0.5):
+    """Latency percentiles (us) over repeated calls plus the peak allocation of one call."""
+    fn()  # warm-up (filter design cache, imports)
+    times = []
+    start = time.perf_counter()
+    while len(times) < max_calls and (len(times) < min_calls or time.perf_counter() - start < budget):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    times = 1e6 * np.array(times)
+
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    base = tracemalloc.get_traced_memory()[0]
+    fn()
+    peak = tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+
+    return {
+        "n": len(times),
+        "mean_us": float(times.mean()),
+        "p50_us": float(np.percentile(times, 50)),
+        "p90_us": float(np.percentile(times, 90)),
+        "p99_us": float(np.percentile(times, 99)),
+        "peak_alloc_bytes": int(peak),
+    }
+
+
+def emg_band_ok(fs):
+    return fs / 2 > FilterBank.EMG_BAND[1] * 1.05
+
+
+def cases(fs_list, windows, channels, tick=0.1):
+    """Yield (name, params, callable) for every benchmarked combination."""
+    for fs in fs_list:
+        for w in windows:
+            ppg = synthetic_ppg(fs, w)
+            params = {"fs": fs, "window": w, "channels": 1}
+            yield "bandpass_HRV", params, lambda ppg=ppg, fs=fs: bandpass_HRV(ppg, fs)
+            yield "compute_heart_params", params, lambda ppg=ppg, fs=fs: compute_heart_params(ppg, fs)
+
+            baseline = compute_heart_params(synthetic_ppg(fs, 60), fs)
+            if baseline and w >= 5:
+                yield "get_online_PPG", params, \
+                    lambda ppg=ppg, fs=fs, w=w, b=baseline: get_online_PPG(ppg, fs, b, window_size=w)
+
+            if emg_band_ok(fs):
+                for c in channels:
+                    emg = synthetic_emg(fs, w, c)
+                    params = {"fs": fs, "window": w, "channels": c}
+                    yield "bandpass_EMG", params, lambda emg=emg, fs=fs: bandpass_EMG(emg, fs)
+                    yield "get_baseline_EMG", params, \
+                        lambda emg=emg, fs=fs, w=w: get_baseline_EMG(emg, fs, duration=w)
+                    # the per-channel 300 ms window the GUI evaluated on every tick
+                    one = np.atleast_2d(emg)[:, -int(0.3 * fs):]
+                    yield "compute_emg_params", params, \
+                        lambda one=one, fs=fs: [compute_emg_params(ch, fs) for ch in one]
+
+        # streaming paths: cost of one tick of new samples, independent of the window
+        tracker = PPGBeatTracker(fs, window=15)
+        tracker.update(synthetic_ppg(fs, 15))
+        ppg_tick = synthetic_ppg(fs, tick, seed=1)
+
+        def tracker_tick(tracker=tracker, ppg_tick=ppg_tick):
+            tracker.update(ppg_tick)
+            tracker.heart_params(15)
+        yield "PPGBeatTracker.tick", {"fs": fs, "window": tick, "channels": 1}, tracker_tick
+
+        if emg_band_ok(fs):
+            for c in channels:
+                engine = EMGEngine(fs, [f"EMG{i}" for i in range(c)])
+                engine.set_baseline(np.atleast_2d(synthetic_emg(fs, 20, c)))
+                emg_tick = np.atleast_2d(synthetic_emg(fs, tick, c, seed=1))
+
+                def engine_tick(engine=engine, emg_tick=emg_tick):
+                    engine.update(emg_tick)
+                    engine.zscores()
+                yield "EMGEngine.tick", {"fs": fs, "window": tick, "channels": c}, engine_tick
+
+
+def ticks(sig, n):
+    """Callable returning the next ``n`` samples of ``sig`` on every call, wrapping at the end."""
+    starts = itertools.cycle(range(0, sig.shape[-1] - n + 1, n))
+
+    def next_chunk():
+        start = next(starts)
+        return sig[..., start:start + n]
+    return next_chunk
+
+
+def dataset_cases(pattern, windows, tick=0.1):
+    """Hot paths on windows of the real recordings.
+
+    Besides the window functions, the streaming updates are timed on
+    consecutive ticks of the recording (so the beats and the envelope follow
+    the real signal) and the offline analysis on the whole file.
+    """
+    from funcpack.columnar import load  # columnar cache when converted, else the EDF itself
+
+    config = load_config()
+    for fname in sorted(glob.glob(pattern)):
+        data, ch_names, fs = load(fname)
+        fs = int(fs)
+        ppg = select_channels(ch_names, config["ppg"]["channels"])
+        emg = select_channels(ch_names, config["emg"]["channels"])
+        if not emg_band_ok(fs):
+            emg = []
+        name = os.path.basename(fname)
+        step = max(int(tick * fs), 1)
+        baseline = compute_heart_params(data[ppg[0], :60 * fs], fs) if ppg else None
+        for w in windows:
+            n = int(w * fs)
+            if data.shape[-1] < n:
+                continue
+            params = {"fs": fs, "window": w, "channels": 1, "file": name}
+            if ppg:
+                sig = data[ppg[0], -n:]
+                yield "bandpass_HRV", params, lambda sig=sig, fs=fs: bandpass_HRV(sig, fs)
+                yield "compute_heart_params", params, lambda sig=sig, fs=fs: compute_heart_params(sig, fs)
+                if baseline and w >= 5:
+                    yield "get_online_PPG", params, \
+                        lambda sig=sig, fs=fs, w=w: get_online_PPG(sig, fs, baseline, window_size=w)
+
+                # one timer tick of the live tracker on a ``w`` second window
+                tracker = PPGBeatTracker(fs, window=w)
+                tracker.update(data[ppg[0], :n])
+                next_ppg = ticks(data[ppg[0], n:], step)
+
+                def tracker_tick(tracker=tracker, next_ppg=next_ppg, w=w):
+                    tracker.update(next_ppg())
+                    tracker.heart_params(w)
+                yield "PPGBeatTracker.tick", params, tracker_tick
+            if emg:
+                sig = data[emg, -n:]
+                params = dict(params, channels=len(emg))
+                yield "bandpass_EMG", params, lambda sig=sig, fs=fs: bandpass_EMG(sig, fs)
+                yield "get_baseline_EMG", params, lambda sig=sig, fs=fs, w=w: get_baseline_EMG(sig, fs, duration=w)
+
+        if emg:
+            engine = EMGEngine(fs, [ch_names[i] for i in emg], window_size=config["emg"]["window_size"],
+                               order=config["emg"]["filter_order"])
+            engine.set_baseline(data[emg, :20 * fs])
+            next_emg = ticks(data[emg], step)
+
+            def engine_tick(engine=engine, next_emg=next_emg):
+                engine.update(next_emg())
+                engine.zscores()
+            yield "EMGEngine.tick", {"fs": fs, "window": tick, "channels": len(emg), "file": name}, engine_tick
+
+        # the offline analysis of the whole recording
+        params = {"fs": fs, "window": round(data.shape[-1] / fs), "channels": 1, "file": name}
+        if ppg:
+            yield "analyze_ppg", params, lambda sig=data[ppg[0]], fs=fs: analyze_ppg(
+                sig, fs, prominence_factor=config["ppg"]["prominence_factor"], order=config["ppg"]["filter_order"])
+        if emg:
+            yield "analyze_emg", dict(params, channels=len(emg)), lambda sig=data[emg], fs=fs: analyze_emg(
+                sig, fs, window_size=config["emg"]["window_size"], order=config["emg"]["filter_order"])
+
+
+# ============================== Reporting =====================================
+
+def case_key(entry):
+    p = entry["params"]
+    return f"{entry['name']}|fs={p['fs']}|w={p['window']}|ch={p['channels']}|{p.get('file', 'synthetic')}"
+
+
+def compare(results, reference, threshold):
+    """Cases whose median latency grew by more than ``threshold`` times."""
+    old = {case_key(e): e for e in reference["results"]}
+    regressions = []
+    for e in results:
+        ref = old.get(case_key(e))
+        if ref and e["p50_us"] > threshold * ref["p50_us"]:
+            regressions.append((case_key(e), ref["p50_us"], e["p50_us"]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--quick", action="store_true", help="reduced sweep for CI")
+    parser.add_argument("--fs", type=int, nargs="+", default=None)
+    parser.add_argument("--windows", type=int, nargs="+", default=None)
+    parser.add_argument("--channels", type=int, nargs="+", default=None)
+    parser.add_argument("--dataset", nargs="?", const="dataset/*.edf", default=None,
+                        help="also benchmark the recordings matching this glob")
+    parser.add_argument("--only", default=None, help="substring filter on the case name")
+    parser.add_argument("-o", "--out", default=None, help="write the JSON results here")
+    parser.add_argument("--compare", default=None, help="JSON of an earlier run")
+    parser.add_argument("--threshold", type=float, default=1.3, help="allowed p50 slowdown factor")
+    args = parser.parse_args()
+
+    fs_list = args.fs or (QUICK["fs"] if args.quick else SAMPLE_RATES)
+    windows = args.windows or (QUICK["windows"] if args.quick else WINDOWS)
+    channels = args.channels or (QUICK["channels"] if args.quick else CHANNELS)
+
+    generators = [cases(fs_list, windows, channels)]
+    if args.dataset:
+        generators.append(dataset_cases(args.dataset, windows))
+
+    results = []
+    for gen in generators:
+        for name, params, fn in gen:
+            if args.only and args.only not in name:
+                continue
+            entry = {"name": name, "params": params, **measure(fn)}
+            results.append(entry)
+            print(f"{case_key(entry):<60} p50 {entry['p50_us']:>10.1f} us  p99 {entry['p99_us']:>10.1f} us"
+                  f"  peak {entry['peak_alloc_bytes'] / 1024:>8.1f} KiB")
+
+    report = {
+        "meta": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": sys.version.split()[0],
+            "numpy": np.__version__,
+            "scipy": scipy.__version__,
+            "platform": platform.platform(),
+            "processor": platform.processor(),
+        },
+        "results": results,
+    }
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=1)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for key, old, new in regressions:
+            print(f"REGRESSION {key}: {old:.1f} -> {new:.1f} us")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+import logging
+import threading
+import time
+
+from PyQt5.QtCore import QObject, QThread, pyqtSignal
+
+
+class ComputeWorker(QThread):
+    """Runs DSP jobs off the GUI thread and posts the results back as signals.
+
+    Jobs are submitted under a key ("heart", "ppg_feedback", ...). A job that
+    has not started yet is replaced by a newer job with the same key, so a
+    slow tick never builds a queue of stale windows: only the latest one is
+    processed. Signals are emitted from the worker thread and delivered to
+    GUI-thread slots through Qt's queued connections, so slots only render.
+    """
+
+    result_ready = pyqtSignal(str, object)
+    job_failed = pyqtSignal(str, object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._pending = {}  # key -> (fn, args, kwargs), in submission order
+        self._cond = threading.Condition()
+        self._running = True
+        self.coalesced = 0  # jobs dropped because a newer one replaced them
+        self.busy = 0.0     # seconds spent running jobs, for load monitoring
+
+    def submit(self, key, fn, *args, **kwargs):
+        with self._cond:
+            if key in self._pending:
+                self.coalesced += 1
+                del self._pending[key]  # re-insert at the end
+            self._pending[key] = (fn, args, kwargs)
+            self._cond.notify()
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._pending.clear()
+            self._cond.notify()
+        self.wait()
+
+    def run(self):
+        while True:
+            with self._cond:
+                while self._running and not self._pending:
+                    self._cond.wait()
+                if not self._running:
+                    return
+                key = next(iter(self._pending))
+                fn, args, kwargs = self._pending.pop(key)
+            t0 = time.perf_counter()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                logging.debug("Job %s failed: %s", key, e)
+                self.job_failed.emit(key, e)
+            else:
+                self.result_ready.emit(key, result)
+            finally:
+                self.busy += time.perf_counter() - t0
+
+
+class ProcessComputeWorker(QObject):
+    """Qt side of ``funcpack.shm.ProcessBackend``, with the signals of ``ComputeWorker``.
+
+    Jobs are tasks built once in a worker process (``add``) and stepped with
+    ``submit``; a step is dropped while the previous one of the same key is
+    still running. Signals come from the backend's drain thread and reach
+    GUI-thread slots through queued connections.
+    """
+
+    result_ready = pyqtSignal(str, object)
+    job_failed = pyqtSignal(str, object)
+
+    def __init__(self, acquisition, workers=2, parent=None):
+        super().__init__(parent)
+        from funcpack.shm import ProcessBackend
+
+        self.backend = ProcessBackend(acquisition, workers=workers,
+                                      on_result=self.result_ready.emit, on_error=self.job_failed.emit)
+
+    @property
+    def busy(self):
+        return self.backend.busy
+
+    @property
+    def coalesced(self):
+        return self.backend.coalesced
+
+    def start(self):
+        self.backend.start()
+        return self
+
+    def stop(self):
+        self.backend.stop()
+
+    def add(self, key, factory, *args, **kwargs):
+        self.backend.add(key, factory, *args, **kwargs)
+
+    def remove(self, key):
+        self.backend.remove(key)
+
+    def submit(self, key, *args, **kwargs):
+        return self.backend.submit(key, *args, **kwargs)
@@ -0,0 +1,135 @@
+import sys
+
+from PyQt5.QtWidgets import (
+    QApplication, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QComboBox, QLabel, QTableWidget,
+    QTableWidgetItem, QHeaderView, QFileDialog
+)
+from PyQt5.QtCore import QTimer, Qt
+
+from funcpack.metrics_server import PPG_METRICS
+from funcpack.sessions import SessionManager
+
+
+class DashboardWindow(QWidget):
+    """Compact view of all participants of a group session, one row each.
+
+        python dashboard_window.py [recording.edf ...]
+    """
+
+    COLUMNS = ("Participant", "State", "HR", "SDNN, ms", "RMSSD, ms", "EMG z, %", "Age, s", "Step, ms", "Skipped")
+
+    def __init__(self, manager=None):
+        super().__init__()
+        self.manager = manager or SessionManager().start()
+        self.count = 0
+
+        self.setWindowTitle("Group session")
+        self.resize(900, 320)
+        layout = QVBoxLayout(self)
+
+        controls = QHBoxLayout()
+        self.stream_box = QComboBox()
+        self.refresh_button = QPushButton("Refresh")
+        self.add_button = QPushButton("Add stream")
+        self.replay_button = QPushButton("Add replay…")
+        self.remove_button = QPushButton("Remove")
+        controls.addWidget(self.stream_box, 1)
+        for button in (self.refresh_button, self.add_button, self.replay_button, self.remove_button):
+            controls.addWidget(button)
+        layout.addLayout(controls)
+        self.refresh_button.clicked.connect(self.find_streams)
+        self.add_button.clicked.connect(self.add_stream)
+        self.replay_button.clicked.connect(self.add_replay)
+        self.remove_button.clicked.connect(self.remove_selected)
+
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.setSelectionBehavior(QTableWidget.SelectRows)
+        layout.addWidget(self.table)
+
+        self.status_label = QLabel("")
+        layout.addWidget(self.status_label)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(500)
+        self.find_streams()
+
+    # ---------------------------- participants ------------------------
+    def _name(self):
+        self.count += 1
+        return f"P{self.count}"
+
+    def find_streams(self):
+        from mne_lsl.lsl import resolve_streams
+
+        self.stream_box.clear()
+        for info in resolve_streams(timeout=0.5):
+            self.stream_box.addItem(f"{info.name} ({info.source_id})", (info.name, info.source_id))
+
+    def add_stream(self):
+        data = self.stream_box.currentData()
+        if data is None:
+            return
+        name, source_id = data
+        try:
+            self.manager.add_stream(self._name(), stream_name=name, source_id=source_id)
+        except Exception as e:
+            self.status_label.setText(f"Could not connect to {name}: {e}")
+
+    def add_replay(self):
+        fnames, _ = QFileDialog.getOpenFileNames(self, "Replay recordings", "", "EDF Files (*.edf)")
+        for fname in fnames:
+            self.manager.add_replay(self._name(), fname)
+
+    def remove_selected(self):
+        for row in sorted({index.row() for index in self.table.selectedIndexes()}):
+            self.manager.remove(self.table.item(row, 0).text())
+
+    # ---------------------------- view --------------------------------
+    def refresh(self):
+        status = self.manager.status()
+        self.table.setRowCount(len(status))
+        for row, (name, s) in enumerate(status.items()):
+            latest = s["latest"]
+            if s["error"] and s["age"] is None:
+                state = s["error"]
+            elif s["emg_baseline"] is not None:
+                state = f"EMG baseline {100 * s['emg_baseline']:.0f}%"
+            else:
+                state = "running" if s["age"] is not None else "waiting"
+            emg = "  ".join(f"{k}: {v:.0f}" for k, v in latest.items() if k not in PPG_METRICS)
+            values = [
+                name, state,
+                f"{latest['hr']:.0f}" if "hr" in latest else "",
+                f"{1e3 * latest['sdnn']:.0f}" if "sdnn" in latest else "",
+                f"{1e3 * latest['rmssd']:.0f}" if "rmssd" in latest else "",
+                emg,
+                "" if s["age"] is None else f"{s['age']:.1f}",
+                f"{1e3 * s['step']:.1f}",
+                str(s["skipped"]),
+            ]
+            for col, text in enumerate(values):
+                item = QTableWidgetItem(text)
+                if col >= 2 and col != 5:
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.table.setItem(row, col, item)
+        self.status_label.setText(f"{len(status)} participants, "
+                                  f"{self.manager.workers} DSP workers, {self.manager.rate:g} updates/s")
+
+    def closeEvent(self, event):
+        self.timer.stop()
+        self.manager.stop()
+        super().closeEvent(event)
+
+
+if __name__ == "__main__":
+    app = QApplication(sys.argv)
+    win = DashboardWindow()
+    for fname in sys.argv[1:]:
+        win.manager.add_replay(win._name(), fname)
+    win.show()
+    sys.exit(app.exec_())
@@ -0,0 +1,85 @@
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QTableWidget, QTableWidgetItem,
+    QHeaderView, QFileDialog
+)
+from PyQt5.QtCore import QTimer, Qt
+
+
+class DiagnosticsWindow(QDialog):
+    """Live view of the per-tick stage timings collected by the session profiler."""
+
+    COLUMNS = ("Stage", "Count", "Mean, ms", "p50, ms", "p90, ms", "p99, ms", "Max, ms")
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.parent_gui = parent
+        self.profiler = parent.profiler
+
+        self.setWindowTitle("Diagnostics")
+        self.resize(640, 420)
+        layout = QVBoxLayout(self)
+
+        self.loops_label = QLabel("")
+        self.loops_label.setTextInteractionFlags(Qt.TextSelectableByMouse)
+        layout.addWidget(self.loops_label)
+
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        layout.addWidget(self.table)
+
+        buttons = QHBoxLayout()
+        self.reset_button = QPushButton("Reset")
+        self.dump_button = QPushButton("Save…")
+        buttons.addWidget(self.reset_button)
+        buttons.addWidget(self.dump_button)
+        layout.addLayout(buttons)
+        self.reset_button.clicked.connect(self.profiler.reset)
+        self.reset_button.clicked.connect(self.parent_gui.latency.reset)
+        self.dump_button.clicked.connect(self.dump)
+        self.dump_button.setEnabled(self.profiler.enabled)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(500)
+        self.refresh()
+
+    def refresh(self):
+        summary = self.profiler.summary()
+
+        if self.profiler.enabled:
+            lines = [f"Uptime: {summary['uptime']:.0f} s, "
+                     f"worker jobs coalesced: {self.parent_gui.worker.coalesced}"]
+        else:
+            lines = ['Stage profiling is off: set "profiling": {"enabled": true} in config.json.']
+        lines.append(f"QoS: {self.parent_gui.qos.name}")
+        acquisition = self.parent_gui.acquisition
+        if acquisition is not None:
+            state = "running" if acquisition.alive else "stopped"
+            if acquisition.error is not None:
+                state = f"retrying after {type(acquisition.error).__name__}: {acquisition.error}"
+            lines.append(f"Acquisition: {state}, {acquisition.failures} poll errors, "
+                         f"{acquisition.dropped} samples dropped by slow readers")
+        for loop, s in summary["loops"].items():
+            period = f"every {1e3 * s['interval']:.0f} ms" if s["interval"] else "without a period"
+            lines.append(f"{loop}: {s['ticks']} ticks {period}, {s['late']} late, {s['missed']} missed")
+        self.loops_label.setText("\n".join(lines))
+
+        # end-to-end latency is always measured
+        stages = {f"latency.{name}": s for name, s in self.parent_gui.latency.summary().items()}
+        stages.update(summary["stages"])
+        self.table.setRowCount(len(stages))
+        for row, (name, s) in enumerate(stages.items()):
+            values = [name, str(s["count"])] + [f"{1e3 * s[k]:.2f}" for k in ("mean", "p50", "p90", "p99", "max")]
+            for col, text in enumerate(values):
+                item = QTableWidgetItem(text)
+                if col:
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.table.setItem(row, col, item)
+
+    def dump(self):
+        fname, _ = QFileDialog.getSaveFileName(self, "Save profile", "profile.json", "JSON Files (*.json)")
+        if fname:
+            self.profiler.dump(fname, latency=self.parent_gui.latency.summary())
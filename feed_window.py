@@ -1,11 +1,11 @@
 from PyQt5.QtWidgets import (
     QDialog, QVBoxLayout, QPushButton, QLabel, QProgressBar, QWidget, QHBoxLayout
 )
-from PyQt5.QtCore import QTimer, Qt
+from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QColor, QPainter, QBrush
 import time
-import random
-from funcpack.metrics import get_baseline_PPG, get_online_PPG
+from funcpack.feedback import (PPGBaselineTask, PPGFeedback, PPGFeedbackTask, change_to_rgb, ppg_colors,
+                               ppg_labels)
 
 class CircleWidget(QWidget):
     """Simple widget to draw a colored circle."""
@@ -81,60 +81,87 @@ class FeedWindow(QDialog):
         self.baseline_button.clicked.connect(self.baseline_PPG)
         self.start_button.clicked.connect(self.start_training)
 
-        # Timer for training updates
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.update_feedback)
-
         self.elapsed = 0
         self.baseline_collected = False
+        self.stage = None  # shared beat tracker in the pipeline while training
+        
+        # results of the DSP jobs come back from the shared compute worker,
+        # or from the worker processes with the "process" DSP backend
+        self.parent_gui.worker.result_ready.connect(self.on_result)
+        self.dsp = self.parent_gui.dsp
+        if self.dsp is not None:
+            self.dsp.result_ready.connect(self.on_result)
+
+    def done(self, result):
+        # closing the window stops its updates
+        self.parent_gui.scheduler.remove("ppg_baseline")
+        self.parent_gui.scheduler.remove("ppg_feedback")
+        self._release()
+        # the dialog stays alive as a child of HeartApp, stop handling results
+        for jobs in (self.parent_gui.worker, self.dsp):
+            if jobs is None:
+                continue
+            try:
+                jobs.result_ready.disconnect(self.on_result)
+            except TypeError:
+                pass  # already disconnected: done() runs again on close after reject
+        super().done(result)
+
+    def _release(self):
+        if self.stage is not None and self.parent_gui.pipeline is not None:
+            self.parent_gui.pipeline.release(self.stage)
+        self.stage = None
+        if self.dsp is not None and self.dsp is self.parent_gui.dsp:  # not stopped with the stream
+            self.dsp.remove("ppg_baseline")
+            self.dsp.remove("ppg_feedback")
 
     # -------------------------------
     # Baseline collection
     # -------------------------------
     def baseline_PPG(self):
-        """Collect baseline for 60 seconds."""
+        """Collect baseline for 60 seconds of incoming samples."""
+        acquisition = self.parent_gui.acquisition
+        self.ppg_idx = self.parent_gui.ppg_idx
+        if self.ppg_idx is None:
+            raise ValueError("No PPG channel found in stream!")
+        print("PPG channel index:", self.ppg_idx)
+        self.fs = int(acquisition.fs)
+        
         self.baseline_button.setEnabled(False)
         self.progress.setVisible(True)
         self.label.setText("SIT STILL!")
         self.progress.setValue(0)
-        self.elapsed = 0
 
-        self.baseline_timer = QTimer(self)
-        self.baseline_timer.timeout.connect(self._update_baseline_progress)
-        self.baseline_timer.start(1000)  # 1s steps
+        # beats are detected while the baseline is recorded, not after it;
+        # the same logic runs headless in funcpack.replay
+        self.logic = PPGFeedback(self.fs, baseline_duration=60, window=8, lookback=20)
+        self.cursor = acquisition.cursor
+        if self.dsp is not None:
+            # in a worker process on the shared buffers, only the progress comes back
+            self.dsp.add("ppg_baseline", PPGBaselineTask, self.ppg_idx, baseline_duration=60)
+        self.parent_gui.scheduler.add("ppg_baseline", self._update_baseline_progress, rate=5, priority=1)
 
     def _update_baseline_progress(self):
+        if self.dsp is not None:
+            self.dsp.submit("ppg_baseline")
+        else:
+            self.parent_gui.worker.submit("ppg_baseline", self.compute_baseline)
+
+    def compute_baseline(self):
+        """Runs in the compute worker."""
+        ppg, ts, self.cursor = self.parent_gui.acquisition.since(self.cursor, picks=self.ppg_idx)
+        return self.logic.baseline_step(ppg, ts)
+
+    def _on_baseline(self, result):
+        # progress follows the samples actually received
+        self.progress.setValue(int(100 * result["progress"]))
         
-        self.elapsed += 1
-        self.progress.setValue(int(100 * self.elapsed / 60))
-        
-        if self.elapsed >= 60:
-            
-            self.baseline_timer.stop()
-            
-            ch_list = self.parent_gui.stream.info["ch_names"]   
-            ppg_names = ['EEG PPG', 'PPG']
-                        
-            for p in ppg_names:
-                
-                if p in ch_list:
-                    ppg_name = p
-                    break
-                else:
-                    ppg_name = None
-                
-            if not ppg_name:
-                raise ValueError("No PPG channel found in stream!")
-            
-            
-                
-            self.ppg_idx = self.parent_gui.stream.info["ch_names"].index(ppg_name)                
-            print("PPG channel index:", self.ppg_idx)
+        if "params" in result:
             
-            signal, ts = self.parent_gui.stream.get_data(60)
-            ppg = signal[self.ppg_idx, :] 
-            self.fs = int(self.parent_gui.stream.info["sfreq"])
-            self.baseline_params = get_baseline_PPG(ppg, self.fs, duration=60)
+            self.parent_gui.scheduler.remove("ppg_baseline")
+            if self.dsp is not None:
+                self.dsp.remove("ppg_baseline")
+            self.baseline_params = result["params"]
             
 
             self.baseline_collected = True
@@ -148,33 +175,61 @@ class FeedWindow(QDialog):
     # Training session
     # -------------------------------
     def start_training(self):
-        """Start biofeedback updates every 300 ms."""
+        """Start biofeedback updates, up to 10 per second as samples arrive."""
         if not self.baseline_collected:
             self.label.setText("Please collect baseline first.")
             return
         self.label.setText("Training in progress...")
-        self.timer.start(100)
+        # the tracker is a pipeline stage, fed once per chunk for every window
+        # using it; a new one starts with the last 20 s already in the buffer
+        self._release()
+        if self.dsp is not None:
+            # the worker process keeps its own tracker, started 20 s back as well
+            self.dsp.add("ppg_feedback", PPGFeedbackTask, self.ppg_idx, self.baseline_params,
+                         window=8, lookback=20)
+        else:
+            self.stage = self.logic.attach(self.parent_gui.pipeline, self.ppg_idx)
+        self.parent_gui.scheduler.add("ppg_feedback", self.update_feedback, rate=10, priority=2)
 
     def update_feedback(self):
+        """Queue the feedback computation on the compute worker."""
+        if self.dsp is not None:
+            self.dsp.submit("ppg_feedback")
+        else:
+            self.parent_gui.worker.submit("ppg_feedback", self.compute_feedback)
+
+    def compute_feedback(self):
+        """Runs in the compute worker."""
+        profiler = self.parent_gui.profiler
+        with profiler.stage("ppg_feedback.filter"):
+            tracker = self.parent_gui.pipeline.pull_stage(self.stage)
+        return self.logic.features(tracker, profiler)
+
+    def on_result(self, key, data):
         """Update the biofeedback visualization."""
-        
-        signal, ts = self.parent_gui.stream.get_data(20) # SET WINDOW SIZE
-        ppg = signal[self.ppg_idx, :]  
-        data = get_online_PPG(ppg, self.fs, self.baseline_params, window_size=8)
-        
-        data.pop("current_params", None)  # remove raw params
-        
-        for key, val in data.items():
-            # convert val (-1…1 or percent change) → color
-            if key == 'hr_change': # we move HR down and HRV up
-                val = -val
-            color = self.map_value_to_color(val-1)
-            self.circles[key].set_color(color)
-
-        self.hr_label.setText(f"HR: {100*data["hr_change"]:.1f} %")
-        self.sdnn_label.setText(f"SDNN: {100*data['sdnn_change']:.1f} %")
-        self.rmssd_label.setText(f"RMSSD: {100*data['rmssd_change']:.1f} %")
-        self.rmssd_corrected_label.setText(f"RMSSD Corrected: {100*data['rmssd_corrected_change']:.1f} %")        
+        if key == "ppg_baseline":
+            self._on_baseline(data)
+            return
+        if key != "ppg_feedback" or not data:
+            return
+        ts = data.pop("ts", None)
+        with self.parent_gui.profiler.stage("ppg_feedback.render"):
+            self._render(data)
+        self.parent_gui.latency.record("ppg_feedback", ts)
+
+    def _render(self, data):
+        for key, rgb in ppg_colors(data).items():
+            self.circles[key].set_color(QColor(*rgb))
+
+        # the circles are the feedback, the labels may be refreshed less often under load
+        if not self.parent_gui.qos.labels_due("ppg_feedback", time.monotonic()):
+            return
+
+        labels = ppg_labels(data)
+        self.hr_label.setText(labels["hr"])
+        self.sdnn_label.setText(labels["sdnn"])
+        self.rmssd_label.setText(labels["rmssd"])
+        self.rmssd_corrected_label.setText(labels["rmssd_corrected"])
         
     # def get_online_PPG(self):
     #     """Mock function: simulate changing physiological data."""
@@ -188,8 +243,4 @@ class FeedWindow(QDialog):
 
     def map_value_to_color(self, val):
         """Map change value [-1, +1] → color (red–gray–green)."""
-        val = max(-1, min(1, val))
-        if val < 0:
-            return QColor(255, int(255*(1+val)), int(255*(1+val)))  # redder for negative
-        else:
-            return QColor(int(255*(1-val)), 255, int(255*(1-val)))  # greener for positive
+        return QColor(*change_to_rgb(val))
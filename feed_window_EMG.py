@@ -1,11 +1,12 @@
 from PyQt5.QtWidgets import (
-    QDialog, QVBoxLayout, QPushButton, QLabel, QProgressBar, QWidget, QHBoxLayout, QApplication
+    QDialog, QVBoxLayout, QPushButton, QLabel, QProgressBar, QHBoxLayout
 )
 from PyQt5.QtCore import QTimer, Qt
 from PyQt5.QtGui import QColor, QPainter, QBrush
 import time
-import random
-from funcpack.metrics import get_baseline_EMG, get_online_EMG
+from funcpack.feedback import EMGBaselineTask, EMGFeatureTask, EMGFeedback, PongGame, emg_label
+from funcpack.emg_service import EMGFeatureService
+from funcpack.config import load_config
 
 # class CircleWidget(QWidget):
 #     """Simple widget to draw a colored circle."""
@@ -89,12 +90,34 @@ class FeedWindowEMG(QDialog):
         self.baseline_button.clicked.connect(self.baseline_EMG)
         self.start_button.clicked.connect(self.start_training)
 
-        # Timer for training updates
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.update_feedback)
-
         self.elapsed = 0
         self.baseline_collected = False
+        self.training = False
+        self.features = None  # EMGFeatureService once the baseline is collected
+        self.parent_gui.worker.result_ready.connect(self.on_result)
+        # with the "process" DSP backend the baseline and the z-scores come from worker processes
+        self.dsp = self.parent_gui.dsp
+        if self.dsp is not None:
+            self.dsp.result_ready.connect(self.on_result)
+
+    def done(self, result):
+        # closing the window stops its updates
+        self.parent_gui.scheduler.remove("emg_baseline")
+        self.parent_gui.scheduler.remove("emg_features")
+        if self.features is not None and self.parent_gui.pipeline is not None:
+            self.features.close()
+        if self.dsp is not None and self.dsp is self.parent_gui.dsp:  # not stopped with the stream
+            self.dsp.remove("emg_baseline")
+            self.dsp.remove("emg_features")
+        # the dialog stays alive as a child of HeartApp, stop handling results
+        for jobs in (self.parent_gui.worker, self.dsp):
+            if jobs is None:
+                continue
+            try:
+                jobs.result_ready.disconnect(self.on_result)
+            except TypeError:
+                pass  # already disconnected: done() runs again on close after reject
+        super().done(result)
         
     def baseline_EMG(self):
         
@@ -102,35 +125,70 @@ class FeedWindowEMG(QDialog):
         self.progress.setValue(0)
         self.label.setText("Collecting baseline EMG...")
         self.baseline_button.setEnabled(False)
-        QApplication.processEvents()
-
-        # Simulate baseline collection
-        for i in range(1, 101):
-            time.sleep(0.2)  # Simulate time delay
-            self.progress.setValue(i)
-            QApplication.processEvents()
-
-        # Here you would collect real EMG data
-        sig, ts = self.parent_gui.stream.get_data()  
-        self.fs = self.parent_gui.stream.info["sfreq"]
-        chlist = self.parent_gui.stream.info["ch_names"]
-        
-        self.baseline_params = {}
-        
-        emg_names = ['LFL', 'RFL', 'LEX', 'REX']
-        self.emg_ids = {}
-        
-        for e in emg_names:
-            if e in chlist:
-                ch_idx = self.parent_gui.stream.info["ch_names"].index(e)
-                self.emg_ids[e] = ch_idx
 
+        acquisition = self.parent_gui.acquisition
+        self.fs = acquisition.fs
+        chlist = acquisition.ch_names
+        
+        # channel selection comes from the configuration (names, pattern or type)
+        config = load_config()
+        picks = acquisition.picks(config["emg"]["channels"])
+        self.emg_ids = {chlist[i]: i for i in picks}
         self.active_chnames = list(self.emg_ids.keys())
         print(self.emg_ids)
-        for e in self.emg_ids.keys():
-            print(f"Collecting baseline for EMG channel: {self.emg_ids[e]}")      
-            self.baseline_params[e] = get_baseline_EMG(sig[self.emg_ids[e], :], self.fs, duration=20)
-
+        
+        # the baseline is accumulated from the samples as they arrive, the GUI stays responsive;
+        # the same logic runs headless in funcpack.replay
+        self.logic = EMGFeedback(self.fs, self.active_chnames,
+                                 window_size=config["emg"]["window_size"],
+                                 baseline_duration=config["emg"]["baseline_duration"],
+                                 order=config["emg"]["filter_order"])
+        self.cursor = acquisition.cursor
+        if self.dsp is not None:
+            # in a worker process on the shared buffers, only the progress comes back
+            self.dsp.add("emg_baseline", EMGBaselineTask, picks, self.active_chnames,
+                         window_size=config["emg"]["window_size"],
+                         baseline_duration=config["emg"]["baseline_duration"],
+                         order=config["emg"]["filter_order"])
+            submit = lambda: self.dsp.submit("emg_baseline")
+        else:
+            submit = lambda: self.parent_gui.worker.submit("emg_baseline", self.compute_baseline)
+        self.parent_gui.scheduler.add("emg_baseline", submit, rate=5, priority=1)
+
+    def compute_baseline(self):
+        """Runs in the compute worker."""
+        ids = [self.emg_ids[e] for e in self.active_chnames]
+        signal, ts, self.cursor = self.parent_gui.acquisition.since(self.cursor, picks=ids)
+        return self.logic.baseline_step(signal, ts)
+
+    def _on_baseline(self, result):
+        # progress follows the samples actually received
+        self.progress.setValue(int(100 * result["progress"]))
+        if "params" not in result:
+            return
+        
+        self.parent_gui.scheduler.remove("emg_baseline")
+        self.logic.engine.baseline = result["params"]  # set in the worker process with the dsp backend
+        self.baseline_params = self.logic.channel_baselines()
+
+        # activation is computed once per new chunk on the compute worker (or
+        # a worker process); the labels and the game only read the cached values
+        if self.features is not None:
+            self.features.close()
+        ids = [self.emg_ids[e] for e in self.active_chnames]
+        if self.dsp is not None:
+            self.dsp.remove("emg_baseline")
+            config = load_config()["emg"]
+            self.dsp.add("emg_features", EMGFeatureTask, ids, self.active_chnames, result["params"],
+                         window_size=config["window_size"], lookback=self.logic.lookback,
+                         order=config["filter_order"])
+            # filled from the task results in on_result
+            self.features = EMGFeatureService(None, self.logic, ids)
+            submit = lambda: self.dsp.submit("emg_features")
+        else:
+            self.features = EMGFeatureService(self.parent_gui.pipeline, self.logic, ids)
+            submit = lambda: self.parent_gui.worker.submit("emg_features", self.compute_features)
+        self.parent_gui.scheduler.add("emg_features", submit, rate=30, priority=2)
         
         if self.baseline_params is not None:
             self.baseline_collected = True
@@ -146,31 +204,40 @@ class FeedWindowEMG(QDialog):
     # -------------------------------
     # Training Section    
     def start_training(self):
-        """Start biofeedback updates every 300 ms."""
+        """Show the biofeedback of every new chunk."""
         if not self.baseline_collected:
             self.label.setText("Please collect baseline first.")
             return
         self.label.setText("Training in progress...")
-        self.timer.start(100)
+        self.training = True
+
+    def compute_features(self):
+        """Runs in the compute worker; None when no new chunk arrived."""
+        with self.parent_gui.profiler.stage("emg_features.update"):
+            return self.features.update()
 
-    def update_feedback(self):
+    def on_result(self, key, result):
         """Update the biofeedback visualization."""
-        result = {}
-        signal, ts = self.parent_gui.stream.get_data(2) # SET WINDOW SIZE
-        
-        for channel in self.active_chnames:
-            
-            idx = self.emg_ids[channel]
-            bsl_channel = self.baseline_params[channel]
-            result[channel] = 100 * get_online_EMG(signal[idx, :], self.fs, bsl_channel)
-            
-        feed_string = ""
-            
-        for channel in self.active_chnames:
-            
-            feed_string += f"{channel}: {result[channel]:.2f} %   "
-            
-        self.cumsum_label.setText(f"Cumulative Change: {feed_string}")
+        if key == "emg_baseline":
+            self._on_baseline(result)
+            return
+        if key != "emg_features" or result is None:
+            return
+        if self.dsp is not None:
+            # z-scores of a worker process; the service keeps them for the game
+            result = self.features.push(result["zscores"], result["ts"])
+        if result is None or not self.training:
+            return
+        # z-scores pushed by the feature service, shown in percent
+        ts = result["ts"]
+        with self.parent_gui.profiler.stage("emg_feedback.render"):
+            self._render({ch: 100 * result[ch] for ch in self.active_chnames})
+        self.parent_gui.latency.record("emg_feedback", ts)
+
+    def _render(self, result):
+        if not self.parent_gui.qos.labels_due("emg_feedback", time.monotonic()):
+            return
+        self.cumsum_label.setText(emg_label(result, self.active_chnames))
         
     def open_game(self):
         self.game = GameWindow(self.parent_gui)
@@ -182,7 +249,6 @@ class FeedWindowEMG(QDialog):
         #     color = self.map_value_to_color(val-1)
         #     self.circles[key].set_color(color)
 
-from PyQt5.QtWidgets import QProgressBar, QPushButton, QVBoxLayout, QHBoxLayout, QLabel
 
 class GameWindow(QDialog):
     """Простая мини-игра типа Pong с управлением от LEX и LFL и визуальными индикаторами."""
@@ -192,15 +258,16 @@ class GameWindow(QDialog):
         self.setWindowTitle("EMG Pong Game")
         self.setFixedSize(500, 450)
 
-        # Игровые переменные
-        self.ball_pos = [240, 200]
-        self.ball_vel = [4, 3]
-        self.paddle_x = 210
-        self.paddle_width = 80
-        self.paddle_height = 10
-        self.score = 0
+        # Игровые переменные (физика — в funcpack.feedback.PongGame, её же гоняет replay)
+        self.game = PongGame(self.width(), self.height())
+
+        # z-scores of the feedback window's feature service, no DSP of its own
+        self.features = self.parent_gui.emg_feed_window.features
+        game = load_config()["game"]
+        self.left_name, self.right_name = game["left"], game["right"]
 
-        # Таймер
+        # Таймер: физика мяча идёт с постоянной частотой кадров,
+        # а ЭМГ пересчитывается сервисом только при поступлении новых отсчётов
         self.timer = QTimer(self)
         self.timer.timeout.connect(self.update_game)
         self.timer.start(33)  # ~30 fps
@@ -212,14 +279,14 @@ class GameWindow(QDialog):
         self.lex_bar.setOrientation(Qt.Vertical)
         self.lex_bar.setRange(0, 100)
         self.lex_bar.setValue(0)
-        self.lex_label = QLabel("LEX")
+        self.lex_label = QLabel(self.left_name)
         self.lex_label.setAlignment(Qt.AlignCenter)
 
         self.lfl_bar = QProgressBar()
         self.lfl_bar.setOrientation(Qt.Vertical)
         self.lfl_bar.setRange(0, 100)
         self.lfl_bar.setValue(0)
-        self.lfl_label = QLabel("LFL")
+        self.lfl_label = QLabel(self.right_name)
         self.lfl_label.setAlignment(Qt.AlignCenter)
 
         left_box = QVBoxLayout()
@@ -249,73 +316,32 @@ class GameWindow(QDialog):
         p.setRenderHint(QPainter.Antialiasing)
         # Мяч
         p.setBrush(QBrush(Qt.blue))
-        p.drawEllipse(self.ball_pos[0], self.ball_pos[1], 15, 15)
+        game = self.game
+        p.drawEllipse(game.ball_pos[0], game.ball_pos[1], game.BALL_SIZE, game.BALL_SIZE)
         # Ракетка
         p.setBrush(QBrush(Qt.darkGray))
-        p.drawRect(int(self.paddle_x), 410, int(self.paddle_width), int(self.paddle_height))
+        p.drawRect(int(game.paddle_x), game.PADDLE_Y, int(game.paddle_width), int(game.paddle_height))
         # Счёт
         p.setPen(Qt.black)
-        p.drawText(10, 20, f"Score: {self.score}")
+        p.drawText(10, 20, f"Score: {game.score}")
 
     def update_game(self):
         """Обновление положения мяча и управление ракеткой по ЭМГ."""
-        # Движение мяча
-        self.ball_pos[0] += self.ball_vel[0]
-        self.ball_pos[1] += self.ball_vel[1]
-
-        # Столкновения со стенами
-        if self.ball_pos[0] <= 0 or self.ball_pos[0] >= self.width() - 15:
-            self.ball_vel[0] *= -1
-        if self.ball_pos[1] <= 0:
-            self.ball_vel[1] *= -1
-
-        # Проверка на касание ракетки
-        if self.ball_pos[1] >= 410:
-            if self.paddle_x <= self.ball_pos[0] <= self.paddle_x + self.paddle_width:
-                self.ball_vel[1] *= -1
-                self.score += 1
-            else:
-                # Промах — рестарт
-                self.ball_pos = [self.width()//2, self.height()//2]
-                self.ball_vel = [4, 3]
-                self.score = 0
-
-        # Чтение потоков ЭМГ
-        #try:
-        signal, _ = self.parent_gui.stream.get_data(2)
-        fs = self.parent_gui.stream.info["sfreq"]
-        chlist = self.parent_gui.stream.info["ch_names"]
-        
-        result = {}
-        
-        for channel in self.parent_gui.emg_feed_window.active_chnames:
-        
-            idx = self.parent_gui.emg_feed_window.emg_ids[channel]
-            bsl_channel = self.parent_gui.emg_feed_window.baseline_params[channel]
-            result[channel] = get_online_EMG(signal[idx, :], fs, bsl_channel)
-        
-        # Берём среднее за короткий отрезок (сглаживание)
-        lex_val = result['LEX'] if "LEX" in self.parent_gui.emg_feed_window.active_chnames else 0
-        if lex_val < 0:
-            lex_val = 0
-        lfl_val = result['LFL'] if "LFL" in self.parent_gui.emg_feed_window.active_chnames else 0
-        if lfl_val < 0:
-            lfl_val = 0
+        profiler = self.parent_gui.profiler
+        profiler.tick("game", self.timer.interval() / 1000)
+        # every frame reads the cached values of the newest chunk
+        result = self.features.latest()
+        with profiler.stage("game.render"):
+            self._step(result)
+        # every frame shows the latest result, so its age counts as latency too
+        self.parent_gui.latency.record("game", result["ts"])
+
+    def _step(self, result):
+        bars = self.game.step(result.get(self.left_name, 0), result.get(self.right_name, 0))
 
         # Нормализация и отображение на индикаторах
-        lex_scaled = int(50 + 50 * lex_val)
-        lfl_scaled = int(50 + 50 * lfl_val)
-        self.lex_bar.setValue(max(0, min(100, lex_scaled)))
-        self.lfl_bar.setValue(max(0, min(100, lfl_scaled)))
-
-        # Разность управляет движением
-        diff = - lex_val + lfl_val  # >0 → вправо, <0 → влево
-        print ("diff:", diff)
-        self.paddle_x += diff * 10  # чувствительность
-        self.paddle_x = max(0, min(self.width() - self.paddle_width, self.paddle_x))
-            
-        # except Exception:
-        #     pass
+        self.lex_bar.setValue(bars["left_bar"])
+        self.lfl_bar.setValue(bars["right_bar"])
 
         self.update()
 
@@ -323,3 +349,7 @@ class GameWindow(QDialog):
         """Остановить таймер и закрыть окно."""
         self.timer.stop()
         self.close()
+
+    def done(self, result):
+        self.timer.stop()
+        super().done(result)
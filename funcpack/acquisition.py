@@ -0,0 +1,192 @@
+# Shared acquisition: one background reader per LSL stream
+import logging
+import threading
+from collections import deque
+
+import numpy as np
+
+from funcpack.buffers import RingBuffer
+from funcpack.config import select_channels
+from funcpack.profiling import NULL_PROFILER
+
+
+class AcquisitionService:
+    """Owns a ``StreamLSL`` and drains it into a preallocated ring buffer.
+
+    A background thread polls ``stream.n_new_samples`` and appends only the
+    new samples (deduplicated by timestamp) to a per-channel ring buffer with
+    timestamps. Consumers read zero-copy NumPy views of the last N seconds of
+    just the channels they need, so GUI timers no longer copy the whole
+    stream on every tick. ``cursor`` is a monotonic write counter that
+    consumers use to fetch only what arrived since their last read.
+    Listeners added with ``add_listener`` are called from the acquisition
+    thread with the new cursor whenever samples arrive, so consumers can be
+    woken by data instead of polling on timers.
+
+    Views stay valid as long as the window plus one poll is shorter than
+    ``bufsize``; copy them if they are kept longer than a tick. A reader
+    whose cursor fell more than ``bufsize`` behind gets the newest buffer
+    and the lost samples are counted in ``dropped``. A failing poll does not
+    end the thread: the error is logged and kept in ``error``, and the poll
+    is retried with a backoff of up to ``max_backoff`` seconds.
+    """
+
+    def __init__(self, stream, bufsize=60, interval=0.005, gap_tolerance=1.5, max_backoff=1.0,
+                 profiler=NULL_PROFILER):
+        self.stream = stream
+        self.profiler = profiler
+        self.fs = float(stream.info["sfreq"])
+        self.ch_names = list(stream.info["ch_names"])
+        try:
+            self.ch_types = stream.get_channel_types()
+        except Exception:
+            self.ch_types = None
+        self.interval = interval
+        self.gap_tolerance = gap_tolerance
+        self.max_backoff = max_backoff
+
+        capacity = int(bufsize * self.fs)
+        self.data = RingBuffer(capacity, n_channels=len(self.ch_names))
+        self.times = RingBuffer(capacity)
+        self.gaps = deque(maxlen=1000)  # (last ts before, first ts after, missing samples)
+        self.last_ts = None
+        self.dropped = 0      # samples overwritten before a reader fetched them
+        self.error = None     # last exception of the poll loop, None once it recovers
+        self.failures = 0     # poll errors since creation
+
+        self._lock = threading.Lock()
+        self._arrived = threading.Condition(self._lock)
+        self._listeners = []
+        self._stop = threading.Event()
+        self._thread = None
+        self._indices = {}
+
+    # ---------------------------- lifecycle --------------------------
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="acquisition", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+        self._thread = None
+
+    def _run(self):
+        delay = self.interval
+        while not self._stop.is_set():
+            try:
+                self.poll()
+            except Exception as e:
+                if self._stop.is_set():  # stream disconnected during shutdown
+                    break
+                self.error = e
+                self.failures += 1
+                logging.exception("Acquisition poll failed, retrying in %.2f s", delay)
+                self._stop.wait(delay)
+                delay = min(2 * delay, self.max_backoff)
+                continue
+            self.error = None
+            delay = self.interval
+            self._stop.wait(self.interval)
+
+    @property
+    def alive(self):
+        """Whether the background thread is running."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def poll(self):
+        """Move newly arrived samples from the stream into the ring buffer."""
+        n = self.stream.n_new_samples
+        if n == 0:
+            return 0
+        with self.profiler.stage("acquisition.get_data"):
+            data, ts = self.stream.get_data(winsize=n / self.fs)
+        first = 0 if self.last_ts is None else int(np.searchsorted(ts, self.last_ts, side="right"))
+        data, ts = data[:, first:], ts[first:]
+        if ts.size == 0:
+            return 0
+
+        self._track_gaps(ts)
+        with self._lock:
+            self.data.extend(data)
+            self.times.extend(ts)
+            self.last_ts = ts[-1]
+            total = self.times.total
+            self._arrived.notify_all()
+        for listener in self._listeners:
+            listener(total)
+        return ts.size
+
+    def _track_gaps(self, ts):
+        edges = ts if self.last_ts is None else np.concatenate([[self.last_ts], ts])
+        step = np.diff(edges)
+        for k in np.flatnonzero(step > self.gap_tolerance / self.fs):
+            self.gaps.append((edges[k], edges[k + 1], int(round(step[k] * self.fs)) - 1))
+
+    def add_listener(self, fn):
+        """Call ``fn(cursor)`` from the acquisition thread when samples arrive."""
+        self._listeners = self._listeners + [fn]  # copy, the thread iterates without the lock
+
+    def remove_listener(self, fn):
+        self._listeners = [f for f in self._listeners if f is not fn]
+
+    # ---------------------------- channels ---------------------------
+    def index(self, name):
+        """Channel index by name, resolved once."""
+        if name not in self._indices:
+            self._indices[name] = self.ch_names.index(name)
+        return self._indices[name]
+
+    def picks(self, spec):
+        """Channel indices for a ``funcpack.config`` selection spec."""
+        return select_channels(self.ch_names, spec, self.ch_types)
+
+    @staticmethod
+    def _rows(picks):
+        # contiguous index lists become slices so the result stays a view
+        if picks is None:
+            return slice(None)
+        if isinstance(picks, (list, tuple, np.ndarray)) and len(picks) and \
+                np.array_equal(np.diff(picks), np.ones(len(picks) - 1)):
+            return slice(picks[0], picks[-1] + 1)
+        return picks
+
+    # ---------------------------- reading ----------------------------
+    @property
+    def cursor(self):
+        return self.times.total
+
+    def get_window(self, winsize=None, picks=None):
+        """(data, ts) for the last ``winsize`` seconds (all buffered by default)."""
+        with self._lock:
+            n = None if winsize is None else int(winsize * self.fs)
+            data = self.data.last(n)
+            ts = self.times.last(n)
+        return data[self._rows(picks)], ts
+
+    def since(self, cursor, picks=None):
+        """(data, ts, new_cursor) with the samples written after ``cursor``.
+
+        When more than the buffer was written since ``cursor`` only the
+        buffer is returned; the missing samples are logged and added to
+        ``dropped``.
+        """
+        with self._lock:
+            total = self.times.total
+            data = self.data.since(cursor)
+            ts = self.times.since(cursor)
+            lost = total - cursor - ts.size
+            if lost > 0:
+                self.dropped += lost
+        if lost > 0:
+            logging.warning("Reader fell %d samples (%.1f s) behind the acquisition buffer",
+                            lost, lost / self.fs)
+        return data[self._rows(picks)], ts, total
+
+    def wait(self, n_samples, timeout=None):
+        """Block until ``n_samples`` have been written (or timeout); used by scripts."""
+        with self._arrived:
+            return self._arrived.wait_for(lambda: self.times.total >= n_samples, timeout)
@@ -0,0 +1,156 @@
+"""Parallel corpus runner with a content-addressed result cache.
+
+Every recording is processed in a worker process with the offline engine
+(``funcpack.offline``). Results are stored on disk per output ("ppg",
+"emg") under a key made of the file contents hash, the parameters that
+output depends on and the source of the ``funcpack`` modules it runs, so an
+unchanged run is served from the cache and changing e.g. an EMG parameter
+only recomputes the EMG outputs.
+
+    python -m funcpack.batch dataset/*.edf -j 4
+"""
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from funcpack.config import load_config, select_channels
+from funcpack.filters import FilterBank
+from funcpack import offline
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "batch")
+CODE_FILES = ("buffers.py", "columnar.py", "config.py", "edf.py", "filters.py", "metrics.py", "offline.py")
+
+
+def file_hash(fname, block=1 << 20):
+    h = hashlib.sha256()
+    with open(fname, "rb") as f:
+        for chunk in iter(lambda: f.read(block), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def code_version():
+    """Hash of the funcpack sources the results depend on."""
+    h = hashlib.sha256()
+    here = os.path.dirname(os.path.abspath(__file__))
+    for name in CODE_FILES:
+        with open(os.path.join(here, name), "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()[:16]
+
+
+def output_params(config, ppg_window=8, hop=0.1):
+    """Parameters per output; only these enter that output's cache key."""
+    ppg, emg = config["ppg"], config["emg"]
+    return {
+        "ppg": {
+            "channels": ppg["channels"],
+            "band": FilterBank.HRV_BAND,
+            "order": ppg["filter_order"],
+            "prominence_factor": ppg["prominence_factor"],
+            "window_size": ppg_window,
+            "hop": hop,
+            "baseline_duration": ppg["baseline_duration"],
+        },
+        "emg": {
+            "channels": emg["channels"],
+            "band": FilterBank.EMG_BAND,
+            "order": emg["filter_order"],
+            "window_size": emg["window_size"],
+            "hop": emg["window_size"],
+            "baseline_duration": emg["baseline_duration"],
+        },
+    }
+
+
+def cache_key(digest, output, params, version):
+    blob = json.dumps({"file": digest, "output": output, "params": params, "code": version},
+                      sort_keys=True)
+    return hashlib.sha256(blob.encode()).hexdigest()
+
+
+def _compute(output, data, ch_names, fs, params):
+    picks = select_channels(ch_names, params["channels"])
+    if not picks:
+        return None
+    if output == "ppg":
+        return offline.analyze_ppg(data[picks[0]], fs, window_size=params["window_size"],
+                                   hop=params["hop"], baseline_duration=params["baseline_duration"],
+                                   prominence_factor=params["prominence_factor"], order=params["order"])
+    if data.shape[-1] < params["baseline_duration"] * fs:
+        return None
+    result = offline.analyze_emg(data[picks], fs, window_size=params["window_size"], hop=params["hop"],
+                                 baseline_duration=params["baseline_duration"], order=params["order"])
+    result["channels"] = [ch_names[i] for i in picks]
+    return result
+
+
+def process_file(fname, params, version, cache_dir=CACHE_DIR):
+    """Worker: results for one file, from the cache when possible."""
+    t0 = time.perf_counter()
+    digest = file_hash(fname)
+    results, cached, loaded = {}, {}, None
+
+    for output, p in params.items():
+        path = os.path.join(cache_dir, cache_key(digest, output, p, version) + ".pkl")
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                results[output] = pickle.load(f)
+            cached[output] = True
+            continue
+        if loaded is None:
+            loaded = offline.load_edf(fname)
+        results[output] = _compute(output, *loaded, p)
+        cached[output] = False
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(results[output], f)
+        os.replace(tmp, path)  # atomic, concurrent runs never see partial files
+
+    return {"fname": fname, "results": results, "cached": cached, "seconds": time.perf_counter() - t0}
+
+
+def run(fnames, config=None, jobs=None, cache_dir=CACHE_DIR, verbose=True, **kwargs):
+    """Process all files on a process pool; returns {fname: per-output results}."""
+    params = output_params(config or load_config(), **kwargs)
+    version = code_version()
+    out = {}
+    t0 = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=jobs or os.cpu_count()) as pool:
+        futures = [pool.submit(process_file, f, params, version, cache_dir) for f in fnames]
+        for future in as_completed(futures):
+            res = future.result()
+            out[res["fname"]] = res["results"]
+            if verbose:
+                state = ", ".join(f"{k}: {'cached' if v else 'computed'}" for k, v in res["cached"].items())
+                print(f"{res['seconds']:8.3f} s  {res['fname']}  ({state})")
+    if verbose:
+        print(f"{len(fnames)} files in {time.perf_counter() - t0:.2f} s")
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("fnames", nargs="+")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--config", default=None, help="JSON config overriding the defaults")
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    parser.add_argument("--ppg-window", type=float, default=8)
+    parser.add_argument("--hop", type=float, default=0.1)
+    parser.add_argument("-o", "--out", default=None, help="pickle all results to this file")
+    args = parser.parse_args()
+
+    results = run(args.fnames, load_config(args.config), jobs=args.jobs, cache_dir=args.cache_dir,
+                  ppg_window=args.ppg_window, hop=args.hop)
+    if args.out:
+        with open(args.out, "wb") as f:
+            pickle.dump(results, f)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+import numpy as np
+
+
+class RingBuffer:
+    """Fixed-size ring buffer that always returns the newest samples as a view.
+
+    Every sample is written twice (at ``i`` and ``i + capacity``), so the last
+    ``n`` samples are always contiguous in memory and ``last(n)`` can return a
+    NumPy view without copying. Data is 1-D, or 2-D ``(n_channels, capacity)``
+    when ``n_channels`` is given.
+    """
+
+    def __init__(self, capacity, n_channels=None, dtype=float):
+        self.capacity = int(capacity)
+        shape = (2 * self.capacity,) if n_channels is None else (n_channels, 2 * self.capacity)
+        self._data = np.zeros(shape, dtype=dtype)
+        self._pos = 0     # next write position in [0, capacity)
+        self.total = 0    # samples written since creation (monotonic write cursor)
+
+    def __len__(self):
+        return min(self.total, self.capacity)
+
+    def clear(self):
+        self._pos = 0
+        self.total = 0
+
+    def extend(self, values):
+        values = np.asarray(values)
+        n = values.shape[-1]
+        if n == 0:
+            return
+        if n > self.capacity:
+            values = values[..., -self.capacity:]
+            self.total += n - self.capacity
+            n = self.capacity
+
+        cap = self.capacity
+        first = min(n, cap - self._pos)
+        for offset in (0, cap):
+            start = self._pos + offset
+            self._data[..., start:start + first] = values[..., :first]
+        if first < n:
+            rest = n - first
+            self._data[..., :rest] = values[..., first:]
+            self._data[..., cap:cap + rest] = values[..., first:]
+
+        self._pos = (self._pos + n) % cap
+        self.total += n
+
+    def append(self, value):
+        self.extend(np.asarray(value)[..., np.newaxis])
+
+    def last(self, n=None):
+        """View of the newest ``n`` samples (all stored samples by default)."""
+        n = len(self) if n is None else min(int(n), len(self))
+        end = self._pos + self.capacity
+        return self._data[..., end - n:end]
+
+    def since(self, cursor):
+        """View of the samples written after write cursor ``cursor``."""
+        return self.last(self.total - cursor)
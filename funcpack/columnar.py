@@ -0,0 +1,209 @@
+"""Columnar signal cache converted from EDF.
+
+A recording becomes a directory with one contiguous ``.npy`` array of
+16-bit digital samples per channel and ``index.json`` with the channel
+names, units, scale and offset (physical = digital * scale + offset, SI
+units), the sample rate and the annotations with their sample offsets.
+``ColumnarReader`` memory-maps single channels and time ranges without
+copying and reads like ``funcpack.edf.EDFReader``, so ``open_recording``
+can hand either to the offline engine, the benchmarks and the player.
+
+    python -m funcpack.columnar dataset/*.edf
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+
+from funcpack.edf import EDFReader, channel_type
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "columnar")
+INDEX = "index.json"
+VERSION = 1
+
+
+def cache_path(fname, cache_dir=CACHE_DIR):
+    """Conversion directory of ``fname``, named after the file and its resolved path."""
+    stem = os.path.splitext(os.path.basename(fname))[0]
+    digest = hashlib.sha256(os.path.realpath(fname).encode()).hexdigest()[:12]
+    return os.path.join(cache_dir, f"{stem}-{digest}.col")
+
+
+def _source(fname):
+    st = os.stat(fname)
+    return {"path": os.path.abspath(fname), "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def convert(fname, out=None, block=60):
+    """Write the columnar form of an EDF file to ``out``; returns the directory.
+
+    Samples are copied ``block`` seconds at a time, so memory stays flat for
+    long recordings.
+    """
+    out = out or cache_path(fname)
+    tmp = f"{out}.{os.getpid()}.tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    with EDFReader(fname) as reader:
+        channels = []
+        step = max(int(block * reader.fs), 1)
+        for ch, name in enumerate(reader.ch_names):
+            fn = f"ch{ch:03d}.npy"
+            arr = np.lib.format.open_memmap(os.path.join(tmp, fn), mode="w+", dtype="<i2",
+                                            shape=(reader.n_times,))
+            for start in range(0, reader.n_times, step):
+                arr[start:start + step] = reader.read(start, start + step, picks=[ch], physical=False)[0]
+            arr.flush()
+            del arr
+            channels.append({"name": name, "unit": reader.units[ch], "file": fn,
+                             "scale": float(reader.scale[ch]), "offset": float(reader.offset[ch])})
+        index = {
+            "version": VERSION,
+            "source": _source(fname),
+            "fs": reader.fs,
+            "n_times": reader.n_times,
+            "start_date": reader.header["start_date"],
+            "start_time": reader.header["start_time"],
+            "channels": channels,
+            # onset, duration, description, first sample
+            "annotations": [[onset, duration, text, int(round(onset * reader.fs))]
+                            for onset, duration, text in reader.annotations()],
+        }
+    with open(os.path.join(tmp, INDEX), "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=1)
+    shutil.rmtree(out, ignore_errors=True)
+    os.replace(tmp, out)  # readers never see a half-written conversion
+    return out
+
+
+def is_current(path, fname):
+    """Whether ``path`` holds an up-to-date conversion of ``fname``."""
+    try:
+        with open(os.path.join(path, INDEX), encoding="utf-8") as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return False
+    return index.get("version") == VERSION and index.get("source") == _source(fname)
+
+
+class ColumnarReader:
+    """Memory-mapped reader of a converted recording.
+
+    Has the attributes and methods of ``EDFReader`` (``ch_names``,
+    ``units``, ``fs``, ``n_times``, ``scale``, ``offset``, ``picks``,
+    ``read``, ``annotations``); ``channel`` returns a zero-copy view of the
+    digital samples of one channel and time range.
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        with open(os.path.join(self.path, INDEX), encoding="utf-8") as f:
+            self.index = json.load(f)
+        if self.index.get("version") != VERSION:
+            raise ValueError(f"Unsupported columnar version {self.index.get('version')} in {self.path}")
+        channels = self.index["channels"]
+        self.fname = self.index["source"]["path"]
+        self.ch_names = [c["name"] for c in channels]
+        self.ch_types = [channel_type(name) for name in self.ch_names]
+        self.units = [c["unit"] for c in channels]
+        self.fs = self.index["fs"]
+        self.n_times = self.index["n_times"]
+        self.scale = np.array([c["scale"] for c in channels])
+        self.offset = np.array([c["offset"] for c in channels])
+        self._mm = [None] * len(channels)  # mapped on first use
+
+    @property
+    def duration(self):
+        return self.n_times / self.fs if self.fs else 0.0
+
+    def close(self):
+        self._mm = [None] * len(self._mm)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def picks(self, picks=None):
+        """Channel indices from names or indices (all channels by default)."""
+        if picks is None:
+            return list(range(len(self.ch_names)))
+        if isinstance(picks, (str, int, np.integer)):
+            picks = [picks]
+        return [self.ch_names.index(p) if isinstance(p, str) else int(p) for p in picks]
+
+    def channel(self, pick, start=0, stop=None):
+        """Digital samples ``[start, stop)`` of one channel, a view of the file."""
+        ch = self.picks(pick)[0]
+        if self._mm[ch] is None:
+            fn = os.path.join(self.path, self.index["channels"][ch]["file"])
+            self._mm[ch] = np.load(fn, mmap_mode="r")
+        return self._mm[ch][max(int(start), 0):self.n_times if stop is None else int(stop)]
+
+    def read(self, start=0, stop=None, picks=None, physical=True):
+        """``(n_channels, stop - start)`` array of samples ``[start, stop)``."""
+        stop = self.n_times if stop is None else min(int(stop), self.n_times)
+        start = max(int(start), 0)
+        picks = self.picks(picks)
+        out = np.empty((len(picks), max(stop - start, 0)), dtype=float if physical else np.int16)
+        for k, ch in enumerate(picks):
+            samples = self.channel(ch, start, stop)
+            if physical:
+                np.multiply(samples, self.scale[ch], out=out[k])
+                out[k] += self.offset[ch]
+            else:
+                out[k] = samples
+        return out
+
+    def annotations(self):
+        """``[(onset, duration, description)]`` like ``EDFReader.annotations``."""
+        return [(onset, duration, text) for onset, duration, text, _ in self.index["annotations"]]
+
+
+def open_recording(fname, cache_dir=CACHE_DIR, create=False):
+    """Reader for a recording: a ``.col`` directory, or an EDF file.
+
+    An EDF file is read from its conversion in ``cache_dir`` when that is up
+    to date (written first with ``create``), else from the file itself.
+    """
+    if os.path.isdir(fname):
+        return ColumnarReader(fname)
+    path = cache_path(fname, cache_dir)
+    if is_current(path, fname):
+        return ColumnarReader(path)
+    if create:
+        return ColumnarReader(convert(fname, path))
+    return EDFReader(fname)
+
+
+def load(fname, picks=None, cache_dir=CACHE_DIR):
+    """(data, ch_names, fs) like ``edf.load``, from the conversion when there is one."""
+    with open_recording(fname, cache_dir) as reader:
+        picks = reader.picks(picks)
+        return reader.read(picks=picks), [reader.ch_names[i] for i in picks], reader.fs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("fnames", nargs="+")
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    parser.add_argument("-f", "--force", action="store_true", help="convert even if up to date")
+    args = parser.parse_args()
+
+    for fname in args.fnames:
+        path = cache_path(fname, args.cache_dir)
+        if not args.force and is_current(path, fname):
+            print(f"  up to date  {fname}")
+            continue
+        t0 = time.perf_counter()
+        convert(fname, path)
+        print(f"{time.perf_counter() - t0:8.3f} s  {fname} -> {path}")
+
+
+if __name__ == "__main__":
+    main()
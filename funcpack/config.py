@@ -0,0 +1,106 @@
+# Configuration: channel selection and processing parameters
+import copy
+import json
+import os
+import re
+
+
+DEFAULT_CONFIG = {
+    "ppg": {
+        # first matching channel is used
+        "channels": {"names": ["EEG PPG", "PPG"], "first": True},
+        # offline/batch analysis: bandpass order, beat prominence (x std of the
+        # raw window) and baseline length in seconds
+        "filter_order": 3,
+        "prominence_factor": 0.3,
+        "baseline_duration": 60,
+    },
+    "emg": {
+        # for HD-EMG grids use e.g. {"types": ["emg"]} or {"pattern": "^EMG\\d+$"}
+        "channels": {"names": ["LFL", "RFL", "LEX", "REX"]},
+        "window_size": 0.3,
+        "baseline_duration": 20,
+        # bandpass order of the envelope and the baselines
+        "filter_order": 3,
+    },
+    "game": {
+        "left": "LEX",
+        "right": "LFL",
+    },
+    "player": {
+        # "Emulate Stream": replay speed (1 = real time), chunk size in samples, looping
+        "speed": 1.0,
+        "chunk_size": 200,
+        "loop": True,
+    },
+    "qos": {
+        # shed plot and label work when the worker or the GUI falls behind
+        "enabled": True,
+        "period": 0.25,
+        "high": 0.8,
+        "low": 0.5,
+        "max_lag": 0.05,
+    },
+    "dsp": {
+        # "thread": DSP on a compute thread of the GUI process; "process": the
+        # heart plot and the feedback baselines/features in worker processes
+        # reading shared memory
+        "backend": "thread",
+        "workers": 2,
+    },
+    "profiling": {
+        # per-tick stage timings, dumped to "dump" when the main window closes
+        "enabled": False,
+        "late_factor": 1.5,
+        "dump": "profile.json",
+    },
+}
+
+CONFIG_ENV = "EMULATOR_CONFIG"
+CONFIG_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config.json")
+
+
+# channel selections replace the default one, a merged spec would combine both filters
+REPLACE = ("channels",)
+
+
+def _merge(base, override):
+    for key, val in override.items():
+        if isinstance(val, dict) and isinstance(base.get(key), dict) and key not in REPLACE:
+            _merge(base[key], val)
+        else:
+            base[key] = val
+    return base
+
+
+def load_config(path=None):
+    """Defaults updated with a JSON file (``path``, $EMULATOR_CONFIG or ./config.json)."""
+    config = copy.deepcopy(DEFAULT_CONFIG)
+    path = path or os.environ.get(CONFIG_ENV) or CONFIG_FILE
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            _merge(config, json.load(f))
+    return config
+
+
+def select_channels(ch_names, spec, ch_types=None):
+    """Indices of the channels matching a selection spec.
+
+    ``spec`` may contain ``names`` (kept in the listed order), ``pattern``
+    (regular expression on the name), ``types`` (channel types, needs
+    ``ch_types``) and ``first`` (keep only the first match).
+    """
+    if "names" in spec:
+        picks = [ch_names.index(n) for n in spec["names"] if n in ch_names]
+    else:
+        picks = list(range(len(ch_names)))
+    if "pattern" in spec:
+        rx = re.compile(spec["pattern"])
+        picks = [i for i in picks if rx.search(ch_names[i])]
+    if "types" in spec:
+        if ch_types is None:
+            raise ValueError("Channel types are required for a type-based selection.")
+        picks = [i for i in picks if ch_types[i] in spec["types"]]
+    if spec.get("first"):
+        picks = picks[:1]
+    return picks
@@ -0,0 +1,161 @@
+# Memory-mapped EDF/EDF+ reader
+import numpy as np
+
+ANNOTATIONS = "EDF Annotations"
+# physical units are converted to SI like mne.io.read_raw_edf does
+UNIT_SCALE = {"V": 1.0, "mV": 1e-3, "uV": 1e-6, "µV": 1e-6, "nV": 1e-9}
+
+# EDF+ labels start with the signal type ("EMG Chin"); others are EEG, as in mne
+CH_TYPES = {"EEG": "eeg", "SEEG": "seeg", "ECOG": "ecog", "DBS": "dbs", "EOG": "eog", "ECG": "ecg",
+            "EMG": "emg", "BIO": "bio", "RESP": "resp", "TEMP": "temperature", "MISC": "misc",
+            "SAO2": "bio", "STIM": "stim"}
+
+_FIELDS = (("label", 16), ("transducer", 80), ("unit", 8), ("pmin", 8), ("pmax", 8),
+           ("dmin", 8), ("dmax", 8), ("prefilter", 80), ("n_samples", 8), ("reserved", 32))
+
+
+def channel_type(label):
+    """mne channel type of an EDF signal label (``mne.io.read_raw_edf(infer_types=True)``)."""
+    prefix = label.split(" ", 1)[0].upper() if " " in label else ""
+    return CH_TYPES.get(prefix, "eeg")
+
+
+def read_header(f):
+    """Fixed and per-signal EDF header fields of an open binary file."""
+    head = f.read(256)
+    ns = int(head[252:256])
+    header = {
+        "version": head[0:8].decode("ascii").strip(),
+        "start_date": head[168:176].decode("ascii").strip(),
+        "start_time": head[176:184].decode("ascii").strip(),
+        "header_bytes": int(head[184:192]),
+        "reserved": head[192:236].decode("ascii").strip(),
+        "n_records": int(head[236:244]),
+        "record_duration": float(head[244:252]),
+        "n_signals": ns,
+    }
+    block = f.read(256 * ns)
+    pos = 0
+    for name, width in _FIELDS:
+        header[name] = [block[pos + i * width:pos + (i + 1) * width].decode("latin-1").strip()
+                        for i in range(ns)]
+        pos += ns * width
+    header["n_samples"] = [int(n) for n in header["n_samples"]]
+    return header
+
+
+class EDFReader:
+    """EDF/EDF+ file opened as a memory map of its data records.
+
+    Only the header is parsed on open; samples are read lazily for the
+    requested channels and sample range, so memory stays flat for multi-hour
+    files. Values are physical, in SI units (as ``offline.load_edf``), unless
+    ``physical=False``. All data channels must share one sample rate; the
+    "EDF Annotations" signal is exposed through ``annotations()``.
+    """
+
+    def __init__(self, fname):
+        self.fname = str(fname)
+        with open(self.fname, "rb") as f:
+            self.header = h = read_header(f)
+
+        spr = h["n_samples"]
+        self._col = np.concatenate([[0], np.cumsum(spr)])
+        self._annot = [i for i, label in enumerate(h["label"]) if label == ANNOTATIONS]
+        self._signals = [i for i in range(h["n_signals"]) if i not in self._annot]
+        rates = {spr[i] for i in self._signals}
+        if len(rates) > 1:
+            raise ValueError(f"Channels with different sample rates are not supported: {sorted(rates)}")
+
+        self.ch_names = [h["label"][i] for i in self._signals]
+        self.ch_types = [channel_type(name) for name in self.ch_names]
+        self.units = [h["unit"][i] for i in self._signals]
+        self.record_samples = spr[self._signals[0]] if self._signals else 0
+        self.fs = self.record_samples / h["record_duration"]
+        self.n_records = h["n_records"]
+        if self.n_records < 0:  # still being written
+            size = (np.memmap(self.fname, mode="r").size - h["header_bytes"]) // 2
+            self.n_records = int(size // self._col[-1])
+        self.n_times = self.n_records * self.record_samples
+
+        # physical = digital * scale + offset
+        pmin, pmax, dmin, dmax = (np.array([float(h[k][i]) for i in self._signals])
+                                  for k in ("pmin", "pmax", "dmin", "dmax"))
+        unit = np.array([UNIT_SCALE.get(u, 1.0) for u in self.units])
+        self.scale = (pmax - pmin) / (dmax - dmin) * unit
+        self.offset = (pmin - dmin * (pmax - pmin) / (dmax - dmin)) * unit
+
+        self._mm = np.memmap(self.fname, dtype="<i2", mode="r", offset=h["header_bytes"],
+                             shape=(self.n_records, int(self._col[-1])))
+
+    @property
+    def duration(self):
+        return self.n_times / self.fs if self.fs else 0.0
+
+    def close(self):
+        self._mm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def picks(self, picks=None):
+        """Channel indices from names or indices (all channels by default)."""
+        if picks is None:
+            return list(range(len(self.ch_names)))
+        if isinstance(picks, (str, int, np.integer)):
+            picks = [picks]
+        return [self.ch_names.index(p) if isinstance(p, str) else int(p) for p in picks]
+
+    def read(self, start=0, stop=None, picks=None, physical=True):
+        """``(n_channels, stop - start)`` array of samples ``[start, stop)``."""
+        stop = self.n_times if stop is None else min(int(stop), self.n_times)
+        start = max(int(start), 0)
+        picks = self.picks(picks)
+        n = max(stop - start, 0)
+        out = np.empty((len(picks), n), dtype=float if physical else np.int16)
+        if n == 0:
+            return out
+
+        spr = self.record_samples
+        r0, r1 = start // spr, -(-stop // spr)
+        skip = start - r0 * spr
+        for k, ch in enumerate(picks):
+            col = self._col[self._signals[ch]]
+            # only the records of the range are touched, for this channel's columns
+            samples = self._mm[r0:r1, col:col + spr].reshape(-1)[skip:skip + n]
+            if physical:
+                np.multiply(samples, self.scale[ch], out=out[k])
+                out[k] += self.offset[ch]
+            else:
+                out[k] = samples
+        return out
+
+    def annotations(self):
+        """``[(onset, duration, description)]`` from the EDF+ annotation signal."""
+        result = []
+        for i in self._annot:
+            col = self._col[i]
+            raw = np.asarray(self._mm[:, col:col + self.header["n_samples"][i]]).tobytes()
+            for tal in raw.split(b"\x00"):
+                parts = tal.split(b"\x14")
+                timing = parts[0].split(b"\x15")
+                try:
+                    onset = float(timing[0])
+                except ValueError:
+                    continue
+                duration = float(timing[1]) if len(timing) > 1 and timing[1] else 0.0
+                for text in parts[1:]:
+                    if text:  # empty texts are the time-keeping TAL of each record
+                        result.append((onset, duration, text.decode("utf-8", "replace")))
+        return result
+
+
+def load(fname, picks=None):
+    """(data, ch_names, fs) like ``offline.load_edf``, without mne."""
+    with EDFReader(fname) as reader:
+        picks = reader.picks(picks)
+        return reader.read(picks=picks), [reader.ch_names[i] for i in picks], reader.fs
+
@@ -0,0 +1,90 @@
+# One EMG activation per new chunk, shared by every window that shows it
+import threading
+
+import numpy as np
+
+from funcpack.buffers import RingBuffer
+
+
+class EMGFeatureService:
+    """Latest per-channel EMG z-scores and a short history, computed once per chunk.
+
+    ``update()`` pulls the z-score feature of ``logic`` (an ``EMGFeedback``
+    with its baseline) from the shared ``funcpack.pipeline.Pipeline``; it is
+    the only call that does DSP and is meant for one driver, e.g. a
+    scheduler job on the compute worker. Without a pipeline the values are
+    computed elsewhere (``feedback.EMGFeatureTask`` in a worker process)
+    and handed in with ``push``. When a new chunk arrived the values are
+    stored and passed to the subscribers, on the driver's thread. Readers on any thread use ``latest()`` / ``history()``, which
+    only copy the cached values, so a 30 fps game frame or a new plot costs
+    no filtering.
+    """
+
+    def __init__(self, pipeline, logic, picks, history=256):
+        self.pipeline = pipeline
+        self.channels = list(logic.channels)
+        self.key = logic.attach(pipeline, picks) if pipeline is not None else None
+        self.ts = None  # newest sample behind the latest values
+        self.values = np.zeros(len(self.channels))
+        self._times = RingBuffer(history)
+        self._history = RingBuffer(history, n_channels=len(self.channels))
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self.updates = 0
+
+    # ---------------------------- producer ---------------------------
+    def update(self):
+        """Take the values of the newest chunk; returns them as ``latest()``, or None if nothing new."""
+        return self.push(*self.pipeline.pull(self.key))
+
+    def push(self, zscores, ts):
+        """Store the values of a chunk; returns them as ``latest()``, or None if not new."""
+        if zscores is None or ts is None or ts == self.ts:
+            return None
+        with self._lock:
+            self.values = np.array(zscores, dtype=float)
+            self.ts = ts
+            self._times.append(ts)
+            self._history.append(self.values)
+            self.updates += 1
+            subscribers = list(self._subscribers)
+        snapshot = self.latest()
+        for callback in subscribers:
+            callback(snapshot)
+        return snapshot
+
+    def close(self):
+        """Drop the pipeline feature; the cached values stay readable."""
+        with self._lock:
+            self._subscribers.clear()
+        if self.key is not None:
+            self.pipeline.release(self.key)
+            self.key = None
+
+    # ---------------------------- readers ----------------------------
+    def latest(self):
+        """{channel: z-score} plus ``ts`` of the newest sample (None before the first chunk)."""
+        with self._lock:
+            result = dict(zip(self.channels, self.values.tolist()))
+            result["ts"] = self.ts
+            return result
+
+    def history(self, seconds=None):
+        """(ts, z-scores ``(n_channels, n)``) of the last ``seconds``, all kept by default."""
+        with self._lock:
+            ts = self._times.last().copy()
+            values = self._history.last().copy()
+        if seconds is not None and ts.size:
+            keep = ts > ts[-1] - seconds
+            ts, values = ts[keep], values[:, keep]
+        return ts, values
+
+    def subscribe(self, callback):
+        """Call ``callback(latest())`` after every new chunk, from the thread running ``update``."""
+        with self._lock:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
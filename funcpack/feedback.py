@@ -0,0 +1,360 @@
+# Feedback logic of the biofeedback windows, shared by the GUI and the headless replay
+import numpy as np
+
+from funcpack.metrics import (EMGBaselineAccumulator, EMGEngine, PPGBaselineAccumulator, PPGBeatTracker,
+                              get_online_EMG, get_online_PPG)
+from funcpack.plotting import minmax_decimate
+from funcpack.profiling import NULL_PROFILER
+from funcpack.qos import NORMAL, PLOT_OFF
+
+PPG_KEYS = ("hr_change", "sdnn_change", "rmssd_change", "rmssd_corrected_change")
+
+
+def change_to_rgb(val):
+    """Map change value [-1, +1] → color (red–gray–green) as (r, g, b)."""
+    val = max(-1, min(1, val))
+    if val < 0:
+        return (255, int(255*(1+val)), int(255*(1+val)))  # redder for negative
+    return (int(255*(1-val)), 255, int(255*(1-val)))  # greener for positive
+
+
+# ================================= PPG ========================================
+
+def ppg_stage(pipeline, pick, window, lookback=0):
+    """Shared beat tracker of channel ``pick`` in a ``funcpack.pipeline.Pipeline``; returns its key.
+
+    Trackers are shared only with the same window: the prominence threshold
+    depends on it, so other windows detect (slightly) different beats.
+    """
+    fs = int(pipeline.fs)
+    return pipeline.stage(("ppg.beats", pick, window),
+                          lambda: PPGBeatTracker(fs, window=window),
+                          picks=pick, lookback=lookback)
+
+
+def heart_view(tracker, window, level=NORMAL, width=500, profiler=NULL_PROFILER):
+    """What ``HeartApp`` renders from an up-to-date tracker (None until enough beats)."""
+    with profiler.stage("heart.features"):
+        params = tracker.heart_params(window)
+    if not params:
+        return None
+
+    params["ts"] = tracker.last_ts
+    if level >= PLOT_OFF:
+        return params
+
+    # causally filtered trace kept by the tracker, peaks index into it;
+    # decimated to the plot width and shown relative to the newest sample
+    with profiler.stage("heart.decimate"):
+        signal = tracker.filtered.last()
+        t = tracker.times.last() - tracker.last_ts
+        peaks = params["peaks"]
+        peaks = peaks[peaks >= 0]
+        params["peak_t"], params["peak_y"] = t[peaks], signal[peaks]
+        t_plot, y_plot = minmax_decimate(t, signal, width if level == NORMAL else width // 4)
+        params["t"], params["signal"] = t_plot, np.array(y_plot)  # detach from the ring buffer
+    return params
+
+
+class HeartPlot:
+    """HR/HRV labels and the PPG trace of ``HeartApp``, without Qt.
+
+    ``source`` is an ``AcquisitionService`` or a ``shm.SharedSource``; each
+    ``step`` feeds the samples that arrived since the previous one and
+    returns what to render (None until enough beats are tracked).
+    """
+
+    def __init__(self, source, pick, window=15):
+        self.source = source
+        self.pick = pick
+        self.window = window
+        self.cursor = 0
+        self.tracker = PPGBeatTracker(int(source.fs), window=window)
+
+    def step(self, level=NORMAL, width=500, profiler=NULL_PROFILER):
+        # zero-copy view of the samples that arrived since the last tick
+        with profiler.stage("heart.acquire"):
+            ppg, ts, self.cursor = self.source.since(self.cursor, picks=self.pick)
+        if ts.size == 0:
+            return None
+
+        # incremental beat detection (filtering and peak search in one pass)
+        with profiler.stage("heart.filter"):
+            self.tracker.update(ppg, ts)
+        return heart_view(self.tracker, self.window, level, width, profiler)
+
+
+class PPGFeedback:
+    """Baseline and training steps of ``FeedWindow``, without Qt.
+
+    ``baseline_step`` and ``feedback_step`` take the samples that arrived
+    since the previous call; the caller decides when to call them (worker
+    jobs in the GUI, a virtual clock in ``funcpack.replay``).
+    """
+
+    def __init__(self, fs, baseline_duration=60, window=8, lookback=20):
+        self.fs = int(fs)
+        self.window = window
+        self.lookback = lookback
+        self.accumulator = PPGBaselineAccumulator(self.fs, duration=baseline_duration)
+        self.baseline_params = None
+        self.tracker = None
+
+    def baseline_step(self, ppg, ts):
+        self.accumulator.update(ppg, ts)
+        if not self.accumulator.done:
+            return {"progress": self.accumulator.progress}
+        self.baseline_params = self.accumulator.params()
+        return {"progress": 1.0, "params": self.baseline_params}
+
+    def start_training(self, cursor):
+        """Fresh beat tracker; returns the cursor to read from (``lookback`` s back)."""
+        self.tracker = PPGBeatTracker(self.fs, window=self.window)
+        return max(0, cursor - self.lookback * self.fs)
+
+    def attach(self, pipeline, pick):
+        """Train on a shared pipeline tracker instead of ``start_training``; returns its key."""
+        return ppg_stage(pipeline, pick, self.window, lookback=self.lookback)
+
+    def feedback_step(self, ppg, ts, profiler=NULL_PROFILER):
+        """Changes relative to the baseline, plus ``ts`` of the newest sample."""
+        with profiler.stage("ppg_feedback.filter"):
+            self.tracker.update(ppg, ts)
+        return self.features(self.tracker, profiler)
+
+    def features(self, tracker, profiler=NULL_PROFILER):
+        """Changes relative to the baseline from an up-to-date tracker."""
+        with profiler.stage("ppg_feedback.features"):
+            data = get_online_PPG(None, self.fs, self.baseline_params, window_size=self.window,
+                                  tracker=tracker)
+        data.pop("current_params", None)  # remove raw params
+        data["ts"] = tracker.last_ts
+        return data
+
+
+class PPGBaselineTask:
+    """``PPGFeedback.baseline_step`` on a ``shm.SharedSource``, a ``ProcessBackend`` task.
+
+    Reads the samples from the moment it is built; ``step`` returns the
+    progress and, once complete, the scalar baseline parameters.
+    """
+
+    def __init__(self, source, pick, baseline_duration=60):
+        self.source = source
+        self.pick = pick
+        self.cursor = source.cursor
+        self.logic = PPGFeedback(source.fs, baseline_duration=baseline_duration)
+
+    def step(self):
+        ppg, ts, self.cursor = self.source.since(self.cursor, picks=self.pick)
+        result = self.logic.baseline_step(ppg, ts)
+        if "params" in result:  # the peak indices stay in the worker
+            result["params"] = {k: v for k, v in result["params"].items() if np.isscalar(v)}
+        return result
+
+
+class PPGFeedbackTask:
+    """``PPGFeedback`` training on a ``shm.SharedSource``, a ``ProcessBackend`` task.
+
+    Starts ``lookback`` seconds back with its own tracker; ``step`` returns
+    the ``feedback_step`` changes (None when no samples arrived).
+    """
+
+    def __init__(self, source, pick, baseline_params, window=8, lookback=20):
+        self.source = source
+        self.pick = pick
+        self.logic = PPGFeedback(source.fs, window=window, lookback=lookback)
+        self.logic.baseline_params = baseline_params
+        self.cursor = self.logic.start_training(source.cursor)
+
+    def step(self):
+        ppg, ts, self.cursor = self.source.since(self.cursor, picks=self.pick)
+        if ts.size == 0:
+            return None
+        return self.logic.feedback_step(ppg, ts)
+
+
+def ppg_colors(data):
+    """Circle color per change; we move HR down and HRV up."""
+    return {key: change_to_rgb((-val if key == "hr_change" else val) - 1)
+            for key, val in data.items() if key in PPG_KEYS}
+
+
+def ppg_labels(data):
+    return {
+        "hr": f"HR: {100*data['hr_change']:.1f} %",
+        "sdnn": f"SDNN: {100*data['sdnn_change']:.1f} %",
+        "rmssd": f"RMSSD: {100*data['rmssd_change']:.1f} %",
+        "rmssd_corrected": f"RMSSD Corrected: {100*data['rmssd_corrected_change']:.1f} %",
+    }
+
+
+# ================================= EMG ========================================
+
+def emg_stage(pipeline, picks, channels, window_size, lookback=0, order=3):
+    """Shared envelope of the channels ``picks`` in a ``funcpack.pipeline.Pipeline``; returns its key."""
+    fs = pipeline.fs
+    return pipeline.stage(("emg.envelope", tuple(picks), window_size, order),
+                          lambda: EMGEngine(fs, channels, window_size=window_size, order=order),
+                          picks=list(picks), lookback=lookback)
+
+
+class EMGFeedback:
+    """Baseline and training steps of ``FeedWindowEMG``, without Qt."""
+
+    def __init__(self, fs, channels, window_size=0.3, baseline_duration=20, lookback=2, order=3):
+        self.fs = fs
+        self.channels = list(channels)
+        self.lookback = lookback
+        # all channels in one vectorized pass
+        self.engine = EMGEngine(fs, self.channels, window_size=window_size,
+                                baseline_duration=baseline_duration, order=order)
+        # the baseline is accumulated from the samples as they arrive
+        self.accumulator = EMGBaselineAccumulator(fs, len(self.channels), duration=baseline_duration,
+                                                  chunk_size=window_size, order=order)
+
+    def baseline_step(self, sig, ts):
+        self.accumulator.update(sig, ts)
+        if not self.accumulator.done:
+            return {"progress": self.accumulator.progress}
+        self.engine.baseline = self.accumulator.params()
+        return {"progress": 1.0, "params": self.engine.baseline}
+
+    def channel_baselines(self):
+        """{channel: {"mean_emg", "std_emg"}} of the collected baseline."""
+        params = self.engine.baseline
+        return {ch: {"mean_emg": params["mean_emg"][k], "std_emg": params["std_emg"][k]}
+                for k, ch in enumerate(self.channels)}
+
+    def start_training(self, cursor):
+        return max(0, cursor - int(self.lookback * self.fs))
+
+    def feedback_step(self, sig, ts, profiler=NULL_PROFILER):
+        """Z-score per channel in percent, plus ``ts`` of the newest sample."""
+        with profiler.stage("emg_feedback.filter"):
+            self.engine.update(sig, ts)
+        with profiler.stage("emg_feedback.features"):
+            return self.percent(self.engine.zscores(), self.engine.last_ts)
+
+    def attach(self, pipeline, picks):
+        """Z-scores of this baseline on the shared envelope; returns the feature key.
+
+        The feature value is ``(zscores, ts)``; every window attached with
+        the same baseline reads the same cached value.
+        """
+        stage = emg_stage(pipeline, picks, self.channels, self.engine.window_size, lookback=self.lookback,
+                          order=self.engine.order)
+        return pipeline.feature(("emg.zscores", stage, id(self)), stage, self._zscores)
+
+    def _zscores(self, engine):
+        return get_online_EMG(None, self.fs, self.engine.baseline, envelope=engine.envelope), engine.last_ts
+
+    def percent(self, zscores, ts):
+        """Feedback values as returned by ``feedback_step``."""
+        result = dict(zip(self.channels, 100 * zscores))
+        result["ts"] = ts
+        return result
+
+
+class EMGBaselineTask:
+    """``EMGFeedback.baseline_step`` on a ``shm.SharedSource``, a ``ProcessBackend`` task."""
+
+    def __init__(self, source, picks, channels, window_size=0.3, baseline_duration=20, order=3):
+        self.source = source
+        self.picks = list(picks)
+        self.cursor = source.cursor
+        self.logic = EMGFeedback(source.fs, channels, window_size=window_size,
+                                 baseline_duration=baseline_duration, order=order)
+
+    def step(self):
+        sig, ts, self.cursor = self.source.since(self.cursor, picks=self.picks)
+        return self.logic.baseline_step(sig, ts)
+
+
+class EMGFeatureTask:
+    """Z-scores of an ``EMGFeedback`` baseline on a ``shm.SharedSource``, a ``ProcessBackend`` task.
+
+    ``step`` returns ``{"zscores", "ts"}`` of the newest chunk (None when no
+    samples arrived), what ``emg_service.EMGFeatureService.push`` takes.
+    """
+
+    def __init__(self, source, picks, channels, baseline, window_size=0.3, lookback=2, order=3):
+        self.source = source
+        self.picks = list(picks)
+        self.logic = EMGFeedback(source.fs, channels, window_size=window_size, lookback=lookback, order=order)
+        self.logic.engine.baseline = baseline
+        self.cursor = self.logic.start_training(source.cursor)
+
+    def step(self):
+        sig, ts, self.cursor = self.source.since(self.cursor, picks=self.picks)
+        if ts.size == 0:
+            return None
+        engine = self.logic.engine
+        engine.update(sig, ts)
+        return {"zscores": engine.zscores(), "ts": engine.last_ts}
+
+
+def emg_label(result, channels):
+    feed_string = ""
+    for channel in channels:
+        feed_string += f"{channel}: {result[channel]:.2f} %   "
+    return f"Cumulative Change: {feed_string}"
+
+
+# ================================= Game =======================================
+
+class PongGame:
+    """Ball physics and EMG paddle control of ``GameWindow``, one call per frame."""
+
+    BALL_SIZE = 15
+    PADDLE_Y = 410
+
+    def __init__(self, width=500, height=450, paddle_width=80, paddle_height=10, sensitivity=10):
+        self.width, self.height = width, height
+        self.paddle_width, self.paddle_height = paddle_width, paddle_height
+        self.sensitivity = sensitivity
+        self.ball_pos = [240, 200]
+        self.ball_vel = [4, 3]
+        self.paddle_x = 210
+        self.score = 0
+
+    def step(self, left, right):
+        """Advance one frame with the left/right z-scores; returns the bar values and ``diff``."""
+        # Движение мяча
+        self.ball_pos[0] += self.ball_vel[0]
+        self.ball_pos[1] += self.ball_vel[1]
+
+        # Столкновения со стенами
+        if self.ball_pos[0] <= 0 or self.ball_pos[0] >= self.width - self.BALL_SIZE:
+            self.ball_vel[0] *= -1
+        if self.ball_pos[1] <= 0:
+            self.ball_vel[1] *= -1
+
+        # Проверка на касание ракетки
+        if self.ball_pos[1] >= self.PADDLE_Y:
+            if self.paddle_x <= self.ball_pos[0] <= self.paddle_x + self.paddle_width:
+                self.ball_vel[1] *= -1
+                self.score += 1
+            else:
+                # Промах — рестарт
+                self.ball_pos = [self.width//2, self.height//2]
+                self.ball_vel = [4, 3]
+                self.score = 0
+
+        left = max(left, 0)
+        right = max(right, 0)
+
+        # Разность управляет движением
+        diff = - left + right  # >0 → вправо, <0 → влево
+        self.paddle_x += diff * self.sensitivity
+        self.paddle_x = max(0, min(self.width - self.paddle_width, self.paddle_x))
+
+        # Нормализация для индикаторов
+        return {
+            "left_bar": max(0, min(100, int(50 + 50 * left))),
+            "right_bar": max(0, min(100, int(50 + 50 * right))),
+            "diff": diff,
+        }
+
+    def state(self):
+        return {"ball": list(self.ball_pos), "paddle_x": self.paddle_x, "score": self.score}
@@ -1,13 +1,81 @@
 import numpy as np
-from scipy.signal import butter, filtfilt, find_peaks
+from functools import lru_cache
+from scipy.signal import butter, filtfilt, find_peaks, sosfilt, sosfilt_zi, sosfiltfilt
 
 def bandpass_HRV(sig, fs, low=0.5, high=8.0, order=3):
-    nyq = 0.5 * fs
-    b, a = butter(order, [low / nyq, high / nyq], btype="band")
+    b, a = design_ba(fs, low, high, order)
     return filtfilt(b, a, sig)
 
 def bandpass_EMG(sig, fs, low=55, high=95, order=3):
-    nyq = 0.5 * fs
-    b, a = butter(order, [low / nyq, high / nyq], btype="band")
+    b, a = design_ba(fs, low, high, order)
     return filtfilt(b, a, sig)
 
+
+# ============================ Filter design cache =============================
+
+@lru_cache(maxsize=64)
+def design_ba(fs, low, high, order=3):
+    """Butterworth bandpass (b, a), designed once per (fs, band, order)."""
+    nyq = 0.5 * fs
+    return butter(order, [low / nyq, high / nyq], btype="band")
+
+@lru_cache(maxsize=64)
+def design_sos(fs, low, high, order=3):
+    """Butterworth bandpass as second-order sections, designed once per (fs, band, order)."""
+    nyq = 0.5 * fs
+    return butter(order, [low / nyq, high / nyq], btype="band", output="sos")
+
+
+# ============================ Streaming filter bank ===========================
+
+class FilterBank:
+    """Bandpass filter with per-channel state for streaming data.
+
+    ``process`` filters only the newly arrived samples (causal, keeps ``zi``
+    between calls), so the cost of a tick is proportional to the number of
+    new samples and not to the window length. ``zero_phase`` runs the same
+    design forwards and backwards for offline use.
+
+    Data is 1-D (one channel) or 2-D ``(n_channels, n_samples)``.
+    """
+
+    HRV_BAND = (0.5, 8.0)
+    EMG_BAND = (55, 95)
+
+    def __init__(self, fs, low, high, order=3):
+        self.fs = fs
+        self.low = low
+        self.high = high
+        self.order = order
+        self.sos = design_sos(fs, low, high, order)
+        self.zi = None  # (n_sections, n_channels, 2), created on first chunk
+
+    @classmethod
+    def hrv(cls, fs, order=3):
+        return cls(fs, *cls.HRV_BAND, order)
+
+    @classmethod
+    def emg(cls, fs, order=3):
+        return cls(fs, *cls.EMG_BAND, order)
+
+    def reset(self):
+        self.zi = None
+
+    def process(self, chunk):
+        """Causally filter new samples, continuing from the previous call."""
+        chunk = np.asarray(chunk, dtype=float)
+        squeeze = chunk.ndim == 1
+        x = chunk[np.newaxis, :] if squeeze else chunk
+        if x.shape[1] == 0:
+            return chunk.copy()
+
+        if self.zi is None or self.zi.shape[1] != x.shape[0]:
+            # start in steady state for the first sample to avoid a DC step transient
+            self.zi = sosfilt_zi(self.sos)[:, np.newaxis, :] * x[np.newaxis, :, 0, np.newaxis]
+
+        y, self.zi = sosfilt(self.sos, x, axis=-1, zi=self.zi)
+        return y[0] if squeeze else y
+
+    def zero_phase(self, sig, axis=-1):
+        """Offline zero-phase filtering; does not touch the streaming state."""
+        return sosfiltfilt(self.sos, sig, axis=axis)
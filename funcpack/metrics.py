@@ -1,7 +1,10 @@
 # metrics HRV and EMG
-from funcpack.filters import bandpass_HRV, bandpass_EMG
+from funcpack.filters import bandpass_HRV, bandpass_EMG, FilterBank
+from funcpack.buffers import RingBuffer
 import numpy as np
 from scipy.signal import find_peaks
+from collections import deque
+import bisect
 
 
 
@@ -58,7 +61,54 @@ def get_baseline_PPG(sig, fs, duration=60):
 
 
 
-def get_online_PPG(sig, fs, baseline_params, window_size=5):
+class PPGBaselineAccumulator:
+    """Collects the PPG baseline while the data arrives.
+
+    Samples are fed to a ``PPGBeatTracker`` spanning the whole baseline, so
+    beats and RR statistics are ready the moment ``duration`` seconds of
+    samples have been received; progress counts received samples, not
+    wall-clock time.
+    """
+
+    def __init__(self, fs, duration=60, prominence_factor=0.3, order=3):
+        self.fs = fs
+        self.duration = duration
+        self.needed = int(duration * fs)
+        self.tracker = PPGBeatTracker(fs, window=duration, prominence_factor=prominence_factor, order=order)
+
+    @property
+    def received(self):
+        return self.tracker.raw.total
+
+    @property
+    def progress(self):
+        return min(1.0, self.received / self.needed)
+
+    @property
+    def done(self):
+        return self.received >= self.needed
+
+    def update(self, chunk, ts=None):
+        # stop at the baseline length, later samples belong to the training
+        chunk = chunk[:max(0, self.needed - self.received)]
+        return self.tracker.update(chunk, None if ts is None else ts[:chunk.size])
+
+    def params(self):
+        params = self.tracker.heart_params(self.duration)
+        if params is None:
+            raise ValueError("Not enough peaks detected in the baseline signal.")
+        return params
+
+
+
+def get_online_PPG(sig, fs, baseline_params, window_size=5, tracker=None):
+    
+    if tracker is not None:
+        # streaming path: beats were already detected as the samples arrived
+        params = tracker.heart_params(window_size)
+        if params is None:
+            raise ValueError("Not enough beats tracked in the current window.")
+        return compare_heart_params(params, baseline_params)
     
     num_samples = window_size * fs
     if len(sig) < num_samples:
@@ -70,6 +120,12 @@ def get_online_PPG(sig, fs, baseline_params, window_size=5):
         raise ValueError("Not enough peaks detected in the current signal window.")
     # TODO process anomalies in the signal
     
+    return compare_heart_params(params, baseline_params)
+
+
+
+def compare_heart_params(params, baseline_params):
+    
     # Compare with baseline
     hr_change = params["hr"] / baseline_params["hr"]
     sdnn_change = params["sdnn"] / baseline_params["sdnn"]
@@ -83,7 +139,287 @@ def get_online_PPG(sig, fs, baseline_params, window_size=5):
         "rmssd_change": rmssd_change,
         "rmssd_corrected_change": rmssd_corrected_change
     }
-    
+
+
+
+def rr_params(rr_intervals):
+    """HRV metrics of an RR series (s), same keys as ``compute_heart_params``."""
+    mean_rr = np.mean(rr_intervals)
+    rmssd = np.sqrt(np.mean(np.square(np.diff(rr_intervals))))
+    return {
+        "mean_rr": mean_rr,
+        "sdnn": np.std(rr_intervals),
+        "rmssd": rmssd,
+        "num_peaks": len(rr_intervals) + 1,
+        "hr": int(60 / np.median(rr_intervals)),
+        "rmssd_corrected": rmssd / (mean_rr ** 3)
+    }
+
+
+
+class RRWindowStats:
+    """Sliding-window HRV statistics over an RR series with O(1) updates.
+
+    Mean RR and SDNN use Welford updates (with removal), RMSSD a running sum
+    of squared successive differences and HR the median from a sorted list.
+    The window is count-based (``max_count`` intervals), time-based
+    (``max_seconds``, default the standard 5-minute HRV window) or both; an
+    interval stays in a time window while the beat that starts it does, which
+    matches ``np.diff`` over the beats of a window in ``compute_heart_params``.
+    """
+
+    RESYNC_EVERY = 10000  # recompute the running sums now and then to bound float drift
+
+    def __init__(self, max_count=None, max_seconds=300, limit=4096):
+        self.max_count = max_count
+        self.max_seconds = max_seconds
+        self.limit = limit if max_count is None else min(max_count, limit)
+        self.clear()
+
+    def clear(self):
+        self._items = deque()   # (start time, rr)
+        self._sorted = []
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._ssd = 0.0         # sum of squared successive differences
+        self._updates = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def add(self, t, rr):
+        """Add the RR interval ``rr`` whose first beat is at time ``t``."""
+        if self._items:
+            self._ssd += (rr - self._items[-1][1]) ** 2
+        self._items.append((t, rr))
+        bisect.insort(self._sorted, rr)
+
+        n = len(self._items)
+        delta = rr - self._mean
+        self._mean += delta / n
+        self._m2 += delta * (rr - self._mean)
+
+        while len(self._items) > self.limit:
+            self._pop()
+        self._updates += 1
+        if self._updates % self.RESYNC_EVERY == 0:
+            self._resync()
+
+    def expire(self, now):
+        """Drop intervals that fell out of a time-based window ending at ``now``."""
+        if self.max_seconds is None:
+            return
+        while self._items and self._items[0][0] <= now - self.max_seconds:
+            self._pop()
+
+    def _pop(self):
+        _, rr = self._items.popleft()
+        if self._items:
+            self._ssd -= (self._items[0][1] - rr) ** 2
+        del self._sorted[bisect.bisect_left(self._sorted, rr)]
+
+        n = len(self._items)
+        if n == 0:
+            self._mean = self._m2 = self._ssd = 0.0
+            return
+        delta = rr - self._mean
+        self._mean -= delta / n
+        self._m2 -= delta * (rr - self._mean)
+
+    def _resync(self):
+        rr = np.array([item[1] for item in self._items])
+        self._mean = rr.mean() if rr.size else 0.0
+        self._m2 = np.sum(np.square(rr - self._mean))
+        self._ssd = np.sum(np.square(np.diff(rr)))
+
+    def median(self):
+        n = len(self._sorted)
+        mid = n // 2
+        return self._sorted[mid] if n % 2 else 0.5 * (self._sorted[mid - 1] + self._sorted[mid])
+
+    def params(self):
+        """Current window metrics, same keys as ``rr_params``; None below 2 intervals."""
+        n = len(self._items)
+        if n < 2:
+            return None
+        mean_rr = self._mean
+        rmssd = np.sqrt(max(self._ssd, 0.0) / (n - 1))
+        return {
+            "mean_rr": mean_rr,
+            "sdnn": np.sqrt(max(self._m2, 0.0) / n),
+            "rmssd": rmssd,
+            "num_peaks": n + 1,
+            "hr": int(60 / self.median()),
+            "rmssd_corrected": rmssd / (mean_rr ** 3)
+        }
+
+
+
+def _unseen(ts, last_ts):
+    """Index of the first sample in ``ts`` newer than ``last_ts``."""
+    if last_ts is None:
+        return 0
+    return int(np.searchsorted(ts, last_ts, side="right"))
+
+
+
+class PPGBeatTracker:
+    """Online PPG beat detector.
+
+    New samples are filtered causally (``FilterBank``) as they arrive and
+    each sample is looked at once. A local maximum becomes a beat when the
+    signal fell ``prominence_factor * std(raw window)`` below it on both
+    sides (the std comes from running sums over the last ``window``
+    seconds) and no higher peak follows within the refractory ``distance``,
+    the rules of the batch ``find_peaks`` call in ``compute_heart_params``.
+    Beats and RR intervals go into ring buffers and into one
+    ``RRWindowStats`` per requested metrics window, so ``heart_params``
+    costs O(1) per call.
+    """
+
+    def __init__(self, fs, window=15, prominence_factor=0.3, distance=0.3, max_beats=4096, order=3):
+        self.fs = fs
+        self.window = window
+        self.prominence_factor = prominence_factor
+        self.distance = max(int(distance * fs), 1)
+        self.max_beats = max_beats
+        self.filter = FilterBank.hrv(fs, order)
+
+        n = int(window * fs)
+        self.raw = RingBuffer(n)
+        self.filtered = RingBuffer(n)
+        self.times = RingBuffer(n)
+        self._sum = 0.0     # running sums of the raw window for the prominence threshold
+        self._sumsq = 0.0
+
+        self.beat_times = RingBuffer(max_beats)
+        self.beat_index = RingBuffer(max_beats, dtype=np.int64)
+        self.rr = RingBuffer(max_beats)
+        self._stats = {}    # window_size -> RRWindowStats
+
+        # detector state: lowest point since the last beat and highest point after it
+        self._trough = None
+        self._peak = None       # (index, height, time) of the highest sample since the trough
+        self._pending = None    # prominent peak waiting out the refractory period
+        self.last_ts = None
+
+    # ---------------------------- feeding ----------------------------
+    def update(self, chunk, ts=None, filtered=None):
+        """Feed newly arrived raw samples (and their LSL timestamps).
+
+        ``filtered`` is the chunk already through this tracker's bandpass,
+        for callers that filtered the whole recording in one pass.
+        """
+        chunk = np.asarray(chunk, dtype=float)
+        if chunk.size == 0:
+            return 0
+        start = self.raw.total
+        if ts is None:
+            ts = (start + np.arange(chunk.size)) / self.fs
+        self.last_ts = ts[-1]
+
+        cap = self.raw.capacity
+        n_out = max(0, len(self.raw) + chunk.size - cap)
+        if chunk.size >= cap or self.raw.total // cap != (self.raw.total + chunk.size) // cap:
+            # resync once per buffer length so the running sums do not drift
+            window = np.concatenate([self.raw.last(), chunk])[-cap:]
+            self._sum = window.sum()
+            self._sumsq = np.square(window).sum()
+        else:
+            evicted = self.raw.last()[:n_out]
+            self._sum += chunk.sum() - evicted.sum()
+            self._sumsq += np.square(chunk).sum() - np.square(evicted).sum()
+
+        y = self.filter.process(chunk) if filtered is None else filtered
+        self.raw.extend(chunk)
+        self.filtered.extend(y)
+        self.times.extend(ts)
+        self._detect(y, ts, start)
+        return chunk.size
+
+    def update_window(self, sig, ts):
+        """Feed a window from ``stream.get_data``; only unseen samples are used."""
+        first = _unseen(ts, self.last_ts)
+        return self.update(sig[first:], ts[first:])
+
+    # ---------------------------- detection --------------------------
+    def _signal_std(self):
+        n = len(self.raw)
+        mean = self._sum / n
+        return np.sqrt(max(self._sumsq / n - mean * mean, 0.0))
+
+    def _detect(self, y, ts, start):
+        """Walk the new filtered samples ``y``; ``start`` is the absolute index of ``y[0]``."""
+        prom = self.prominence_factor * self._signal_std()
+        trough, peak, pending = self._trough, self._peak, self._pending
+        if trough is None:
+            trough = y[0]  # the first beat's left base reaches back to the first sample
+        height = -np.inf if peak is None else peak[1]
+        for i, v in enumerate(y.tolist()):
+            if v > height:
+                peak, height = (start + i, v, ts[i]), v
+            elif v <= height - prom and height - trough >= prom:
+                # prominent on both sides; of two beats closer than distance the higher one stays
+                if pending is None:
+                    if not self.beat_index.total or peak[0] - self.beat_index.last(1)[0] >= self.distance:
+                        pending = peak
+                elif height > pending[1]:
+                    pending = peak
+                trough, peak, height = v, None, -np.inf
+            elif v < trough:
+                trough, peak, height = v, None, -np.inf
+            # final once no higher peak can come within distance of it
+            if pending is not None and start + i - pending[0] >= self.distance and (
+                    peak is None or peak[0] - pending[0] >= self.distance or height <= pending[1]):
+                self._confirm(*pending)
+                pending = None
+        self._trough, self._peak, self._pending = trough, peak, pending
+
+    def _confirm(self, idx, height, time):
+        if self.beat_times.total:
+            previous = self.beat_times.last(1)[0]
+            self.rr.append(time - previous)
+            for stats in self._stats.values():
+                stats.add(previous, time - previous)
+        self.beat_times.append(time)
+        self.beat_index.append(idx)
+
+    # ---------------------------- metrics ----------------------------
+    def beats(self, window_size=None):
+        """Timestamps of the beats within the last ``window_size`` seconds."""
+        times = self.beat_times.last()
+        if window_size is None or self.last_ts is None:
+            return times
+        return times[np.searchsorted(times, self.last_ts - window_size, side="right"):]
+
+    def window_stats(self, window_size=None):
+        """``RRWindowStats`` of the last ``window_size`` seconds, kept up to date from now on."""
+        window_size = self.window if window_size is None else window_size
+        stats = self._stats.get(window_size)
+        if stats is None:
+            stats = self._stats[window_size] = RRWindowStats(max_seconds=window_size, limit=self.max_beats)
+            n_rr = max(min(len(self.rr), len(self.beat_times) - 1), 0)
+            for t, rr in zip(self.beat_times.last(n_rr + 1)[:-1].tolist(), self.rr.last(n_rr).tolist()):
+                stats.add(t, rr)
+        if self.last_ts is not None:
+            stats.expire(self.last_ts)
+        return stats
+
+    def heart_params(self, window_size=None):
+        """Metrics over the last ``window_size`` seconds, same keys as ``compute_heart_params``.
+
+        ``signal_mean`` and ``signal_std`` are those of the tracker's
+        ``window``, the samples the prominence threshold comes from.
+        """
+        params = self.window_stats(window_size).params()
+        if params is None or not len(self.raw):
+            return None
+        n_window = min(int((self.window if window_size is None else window_size) * self.fs), len(self.raw))
+        params["peaks"] = self.beat_index.last(params["num_peaks"]) - (self.raw.total - n_window)
+        params["signal_mean"] = self._sum / len(self.raw)
+        params["signal_std"] = self._signal_std()
+        return params
+
 
 
 # ================================= EMG ========================================
@@ -113,46 +449,67 @@ def compute_emg_params(sig, fs, window_size=0.3, baseline = False):
     
     cropped = filtered[border:-border]
     cropped = cropped - np.mean(cropped)  # remove DC offset
-    cumsum_emg = np.sum(np.abs(cropped))
+    # scale to the full window so it is comparable with the baseline chunk sums
+    cumsum_emg = np.sum(np.abs(cropped)) * len(sig) / len(cropped)
     return cumsum_emg
 
 
-        
-def get_baseline_EMG(sig, fs, duration=20, chunk_size=0.3):
-    
+
+def rectified_sum(filtered):
+    """EMG activation of bandpassed windows: remove the window mean, rectify, sum.
+
+    Works along the last axis, so one call covers a window, a stack of
+    baseline chunks or the strided windows of a whole recording. The
+    envelope and both baselines go through it, so their values compare.
+    """
+    return np.abs(filtered - filtered.mean(axis=-1, keepdims=True)).sum(axis=-1)
+
+
+
+def get_baseline_EMG(sig, fs, duration=20, chunk_size=0.3, causal=False, order=3):
+    """Mean/std of the rectified sum over ``chunk_size`` chunks of the baseline.
+
+    ``sig`` is one channel or ``(n_channels, n_samples)``; for 2-D input the
+    returned values are per-channel arrays. The baseline is filtered once and
+    viewed as ``(n_chunks, samples_per_chunk)``, so every sample is used and no
+    per-chunk borders are thrown away. ``causal=True`` uses the same causal
+    filter as ``EMGEnvelope`` so the baseline matches the streaming z-score.
+    """
+    sig = np.asarray(sig, dtype=float)
     num_samples = int(duration * fs)
-    # print("num_samples for baseline EMG:", num_samples)
-    # print("len sig:", len(sig))
-    # print(sig.shape)
-    if len(sig) < num_samples:
+    if sig.shape[-1] < num_samples:
         raise Warning("Signal is shorter than the specified baseline duration.")
         return None
     
-    baseline_sig = sig[-num_samples:]
+    if causal:
+        filtered = FilterBank.emg(fs, order).process(sig[..., -num_samples:])
+    else:
+        filtered = bandpass_EMG(sig[..., -num_samples:], fs, order=order)
     samples_per_chunk = int(chunk_size * fs)
-    chunks = np.array_split(baseline_sig, len(baseline_sig) // samples_per_chunk)
+    n_chunks = num_samples // samples_per_chunk
     
-    cumsum_list = []
+    # newest n_chunks * samples_per_chunk samples as (..., n_chunks, samples_per_chunk), no copy
+    chunks = filtered[..., filtered.shape[-1] - n_chunks * samples_per_chunk:]
+    chunks = chunks.reshape(filtered.shape[:-1] + (n_chunks, samples_per_chunk))
     
-    for chunk in chunks:
-        
-        cumsum = compute_emg_params(chunk, fs)
-        if cumsum is not None:
-            cumsum_list.append(cumsum)
-            
-    mean_emg = np.mean(cumsum_list)
-    std_emg = np.std(cumsum_list)
+    cumsum_list = rectified_sum(chunks)
     
     params = {
-        "mean_emg": mean_emg,
-        "std_emg": std_emg
+        "mean_emg": cumsum_list.mean(axis=-1),
+        "std_emg": cumsum_list.std(axis=-1)
     }
     
     return params
 
 
 
-def get_online_EMG(sig, fs, baseline_params, window_size=0.3):
+def get_online_EMG(sig, fs, baseline_params, window_size=0.3, envelope=None):
+    
+    if envelope is not None:
+        # streaming path: the envelope is always up to date, nothing to refilter
+        if baseline_params is None:
+            return None
+        return envelope.zscore(baseline_params)
     
     num_samples = int(window_size * fs)
     if len(sig) < num_samples:
@@ -168,4 +525,165 @@ def get_online_EMG(sig, fs, baseline_params, window_size=0.3):
     # Compare with baseline
     mean_emg_change = (params - baseline_params["mean_emg"]) / baseline_params["std_emg"]
     
-    return mean_emg_change
\ No newline at end of file
+    return mean_emg_change
+
+
+
+class EMGEnvelope:
+    """Streaming rectified-sum EMG envelope.
+
+    Each new sample goes through the causal EMG bandpass (``FilterBank``)
+    into a ring buffer of the last ``window_size`` seconds, carried over
+    between calls; ``value`` runs ``rectified_sum`` over that window, the
+    chain of the ``get_baseline_EMG`` chunks, so a window that lines up with
+    a baseline chunk gives exactly that chunk's sum. Feeding costs O(1) per
+    sample and a read is one vectorized pass over the window.
+
+    Data is 1-D (one channel) or 2-D ``(n_channels, n_samples)``.
+    """
+
+    def __init__(self, fs, window_size=0.3, n_channels=None, order=3):
+        self.fs = fs
+        self.window = int(window_size * fs)
+        self.filter = FilterBank.emg(fs, order)
+        self.filtered = RingBuffer(self.window, n_channels)
+        self.last_ts = None
+
+    def update(self, chunk, ts=None):
+        """Feed newly arrived raw samples; returns the number of samples used."""
+        chunk = np.asarray(chunk, dtype=float)
+        n = chunk.shape[-1]
+        if n == 0:
+            return 0
+        if ts is not None:
+            self.last_ts = ts[-1]
+        self.filtered.extend(self.filter.process(chunk))
+        return n
+
+    def update_window(self, sig, ts):
+        """Feed a window from ``stream.get_data``; only unseen samples are used."""
+        first = _unseen(ts, self.last_ts)
+        return self.update(sig[..., first:], ts[first:])
+
+    @property
+    def value(self):
+        """Rectified sum over the window (extrapolated while the window fills up)."""
+        window = self.filtered.last()
+        n = window.shape[-1]
+        if n == 0:
+            return np.full(window.shape[:-1], np.nan)
+        return rectified_sum(window) * self.window / n
+
+    def zscore(self, baseline_params):
+        return (self.value - baseline_params["mean_emg"]) / baseline_params["std_emg"]
+
+
+
+class EMGEngine:
+    """Vectorized EMG pipeline for a ``(channels x samples)`` array.
+
+    Filtering, envelope, baseline mean/std and z-scores all operate along the
+    sample axis for every channel at once, so per-tick cost stays roughly flat
+    as the channel count grows (HD-EMG grids). ``channels`` are the names of
+    the rows, usually picked with ``funcpack.config.select_channels``.
+    """
+
+    def __init__(self, fs, channels, window_size=0.3, baseline_duration=20, order=3):
+        self.fs = fs
+        self.channels = list(channels)
+        self.window_size = window_size
+        self.baseline_duration = baseline_duration
+        self.order = order
+        self.envelope = EMGEnvelope(fs, window_size, n_channels=len(self.channels), order=order)
+        self.baseline = None
+
+    def set_baseline(self, sig):
+        """Baseline mean/std per channel from raw ``(channels x samples)`` data."""
+        self.baseline = get_baseline_EMG(sig, self.fs, duration=self.baseline_duration,
+                                         chunk_size=self.window_size, causal=True, order=self.order)
+        return self.baseline
+
+    def update(self, chunk, ts=None):
+        return self.envelope.update(chunk, ts)
+
+    @property
+    def last_ts(self):
+        """Timestamp of the newest sample fed to the engine."""
+        return self.envelope.last_ts
+
+    def update_window(self, sig, ts):
+        return self.envelope.update_window(sig, ts)
+
+    def zscores(self):
+        """Current z-score per channel (array aligned with ``channels``)."""
+        return get_online_EMG(None, self.fs, self.baseline, envelope=self.envelope)
+
+    def as_dict(self, values=None):
+        values = self.zscores() if values is None else values
+        return dict(zip(self.channels, values))
+
+
+
+class EMGBaselineAccumulator:
+    """Collects the EMG baseline incrementally, chunk by chunk.
+
+    New samples go through the same causal filter as ``EMGEnvelope``; each
+    completed ``chunk_size`` chunk adds its ``rectified_sum`` to per-channel
+    Welford statistics. Like ``get_baseline_EMG``, the chunks
+    are the newest ones of the ``duration`` window: when it is not a whole
+    number of chunks, the first samples only run through the filter. The
+    result matches ``get_baseline_EMG(causal=True)`` on the first
+    ``duration`` seconds and is ready as soon as they have been received.
+    """
+
+    def __init__(self, fs, n_channels, duration=20, chunk_size=0.3, order=3):
+        self.fs = fs
+        self.samples_per_chunk = int(chunk_size * fs)
+        self.n_chunks = int(duration * fs) // self.samples_per_chunk
+        self.skip = int(duration * fs) - self.n_chunks * self.samples_per_chunk  # filtered, not used
+        self.filter = FilterBank.emg(fs, order)
+        self._chunk = np.zeros((n_channels, self.samples_per_chunk))
+        self._fill = 0
+        self.count = 0
+        self._mean = np.zeros(n_channels)
+        self._m2 = np.zeros(n_channels)
+        self.received = 0
+
+    @property
+    def progress(self):
+        return min(1.0, self.count / self.n_chunks)
+
+    @property
+    def done(self):
+        return self.count >= self.n_chunks
+
+    def update(self, chunk, ts=None):
+        """Feed new raw ``(channels x samples)`` data."""
+        if self.done:
+            return 0
+        y = self.filter.process(chunk)
+        # the leading samples that do not fill a whole chunk only run through the filter
+        pos = min(max(self.skip - self.received, 0), y.shape[-1])
+        self.received += y.shape[-1]
+        while pos < y.shape[-1] and not self.done:
+            take = min(self.samples_per_chunk - self._fill, y.shape[-1] - pos)
+            self._chunk[:, self._fill:self._fill + take] = y[:, pos:pos + take]
+            self._fill += take
+            pos += take
+            if self._fill == self.samples_per_chunk:
+                self._add_chunk()
+                self._fill = 0
+        return pos
+
+    def _add_chunk(self):
+        value = rectified_sum(self._chunk)
+        self.count += 1
+        delta = value - self._mean
+        self._mean += delta / self.count
+        self._m2 += delta * (value - self._mean)
+
+    def params(self):
+        return {
+            "mean_emg": self._mean.copy(),
+            "std_emg": np.sqrt(self._m2 / max(self.count, 1))
+        }
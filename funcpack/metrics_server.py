@@ -0,0 +1,192 @@
+"""Headless metrics server: input streams in, metric streams out.
+
+Connects to one or more LSL streams and runs the ``funcpack.metrics``
+pipeline on each in its own thread, without Qt or Matplotlib. Results are
+published as low-rate LSL outlets, ``<stream>_PPG`` (hr, sdnn, rmssd,
+rmssd_corrected over the last ``ppg_window`` seconds) and ``<stream>_EMG``
+(z-score per channel in percent, once the EMG baseline of the first
+``baseline_duration`` seconds is collected). Every sample carries the
+timestamp of the newest input sample behind it.
+
+    python -m funcpack.metrics_server --stream PPG_Stream
+    python -m funcpack.metrics_server --replay dataset/NeoRec_2025-11-04_16-47-32.edf --speed 4
+"""
+import argparse
+import logging
+import threading
+import time
+
+import numpy as np
+
+from funcpack.acquisition import AcquisitionService
+from funcpack.config import load_config
+from funcpack.feedback import EMGFeedback
+from funcpack.metrics import PPGBeatTracker
+from funcpack.player import EDFPlayer, LSLOutput
+
+PPG_METRICS = ("hr", "sdnn", "rmssd", "rmssd_corrected")
+
+
+class MemoryOutput:
+    """Outlet stand-in that keeps the pushed samples, for runs without LSL."""
+
+    def __init__(self, ch_names, fs, name="", **kwargs):
+        self.ch_names = list(ch_names)
+        self.name = name
+        self.samples = []  # (ts, values)
+
+    def push(self, data, ts):
+        self.samples.extend(zip(np.asarray(ts).tolist(), np.asarray(data).T.tolist()))
+
+    def disconnect(self):
+        pass
+
+
+class MetricsSession:
+    """The metrics pipeline of one input stream, run on a thread.
+
+    ``stream`` is anything ``AcquisitionService`` accepts (``StreamLSL``,
+    ``player.LocalStream``); ``output`` builds the outlets, ``LSLOutput`` by
+    default. ``step()`` processes what arrived since the last call and may
+    be driven by hand instead of ``start()``.
+    """
+
+    def __init__(self, stream, name, config=None, rate=4, ppg_window=8, output=LSLOutput):
+        config = config or load_config()
+        self.name = name
+        self.rate = rate
+        self.ppg_window = ppg_window
+        self.acquisition = AcquisitionService(stream, bufsize=60)
+        self.fs = int(self.acquisition.fs)
+        ch_names = self.acquisition.ch_names
+        self.outputs = {}
+
+        picks = self.acquisition.picks(config["ppg"]["channels"])
+        self.ppg_idx = picks[0] if picks else None
+        if self.ppg_idx is not None:
+            self.tracker = PPGBeatTracker(self.fs, window=ppg_window)
+            self.outputs["ppg"] = output(PPG_METRICS, rate, name=f"{name}_PPG", stype="PPGMetrics")
+
+        self.emg_ids = self.acquisition.picks(config["emg"]["channels"])
+        if self.emg_ids:
+            emg = config["emg"]
+            channels = [ch_names[i] for i in self.emg_ids]
+            self.emg = EMGFeedback(self.fs, channels, window_size=emg["window_size"],
+                                   baseline_duration=emg["baseline_duration"], order=emg["filter_order"])
+            self.emg_ready = False
+            self.outputs["emg"] = output(channels, rate, name=f"{name}_EMG", stype="EMGMetrics")
+
+        self.cursors = {"ppg": 0, "emg": 0}
+        self.published = {key: 0 for key in self.outputs}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def step(self):
+        """Update the metrics with the new samples and publish; returns what was pushed."""
+        pushed = {}
+        if self.ppg_idx is not None:
+            ppg, ts, self.cursors["ppg"] = self.acquisition.since(self.cursors["ppg"], picks=self.ppg_idx)
+            if ts.size:
+                self.tracker.update(ppg, ts)
+                params = self.tracker.heart_params(self.ppg_window)
+                if params is not None:
+                    pushed["ppg"] = self._push("ppg", [params[k] for k in PPG_METRICS], self.tracker.last_ts)
+
+        if self.emg_ids:
+            sig, ts, self.cursors["emg"] = self.acquisition.since(self.cursors["emg"], picks=self.emg_ids)
+            if ts.size:
+                if not self.emg_ready:
+                    # the baseline is the first samples of the stream
+                    self.emg_ready = "params" in self.emg.baseline_step(sig, ts)
+                else:
+                    result = self.emg.feedback_step(sig, ts)
+                    ts_last = result.pop("ts")
+                    pushed["emg"] = self._push("emg", [result[ch] for ch in self.emg.channels], ts_last)
+        return pushed
+
+    def _push(self, key, values, ts):
+        values = np.asarray(values, dtype=float)
+        self.outputs[key].push(values[:, None], np.array([ts]))
+        self.published[key] += 1
+        return values
+
+    # ---------------------------- lifecycle --------------------------
+    def start(self):
+        self.acquisition.start()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=f"metrics-{self.name}", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+        self._thread = None
+        self.acquisition.stop()
+        for output in self.outputs.values():
+            output.disconnect()
+
+    def _run(self):
+        interval = 1.0 / self.rate
+        next_tick = time.monotonic()
+        while not self._stop.is_set():
+            try:
+                self.step()
+            except Exception as e:  # e.g. too few beats yet, the next tick retries
+                logging.debug("Metrics %s failed: %s", self.name, e)
+            next_tick += interval
+            self._stop.wait(max(0.0, next_tick - time.monotonic()))
+
+
+def connect(name=None, source_id=None, bufsize=60):
+    """A connected ``StreamLSL`` by name and/or source id."""
+    from mne_lsl.stream import StreamLSL  # only needed for live streams
+
+    return StreamLSL(bufsize=bufsize, name=name, source_id=source_id).connect()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--stream", action="append", default=[], help="input stream name, repeatable")
+    parser.add_argument("--replay", action="append", default=[],
+                        help="EDF file to replay as an input stream (local test), repeatable")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed")
+    parser.add_argument("--rate", type=float, default=4, help="metric updates per second")
+    parser.add_argument("--ppg-window", type=float, default=8, help="HRV window, s")
+    parser.add_argument("--config", default=None, help="JSON config overriding the defaults")
+    args = parser.parse_args()
+    if not args.stream and not args.replay:
+        parser.error("give at least one --stream or --replay")
+    logging.basicConfig(level=logging.INFO)
+    config = load_config(args.config)
+
+    players = []
+    names = list(args.stream)
+    for k, fname in enumerate(args.replay):
+        name = f"Replay_{k}"
+        players.append(EDFPlayer(fname, speed=args.speed, output="lsl", name=name).start())
+        names.append(name)
+
+    sessions = []
+    try:
+        for name in names:
+            session = MetricsSession(connect(name=name), name, config, rate=args.rate,
+                                     ppg_window=args.ppg_window).start()
+            logging.info("%s -> %s", name, ", ".join(f"{name}_{k.upper()}" for k in session.outputs))
+            sessions.append(session)
+        while True:
+            time.sleep(5)
+            logging.info("published: %s", "; ".join(
+                f"{s.name} " + ", ".join(f"{k} {n}" for k, n in s.published.items()) for s in sessions))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for session in sessions:
+            session.stop()
+        for player in players:
+            player.stop()
+
+
+if __name__ == "__main__":
+    main()
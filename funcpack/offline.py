@@ -0,0 +1,179 @@
+# Offline analysis: whole-recording sliding-window metrics
+import os
+
+import numpy as np
+
+from funcpack.config import load_config, select_channels
+from funcpack.filters import FilterBank
+from funcpack.metrics import PPGBaselineAccumulator, PPGBeatTracker, get_baseline_EMG, rectified_sum
+
+
+def load_edf(fname, picks=None):
+    """(data, ch_names, fs) of an EDF file, physical units, read once.
+
+    Served from the columnar cache (``funcpack.columnar``) when the file has
+    an up-to-date conversion.
+    """
+    from funcpack import columnar
+
+    path = columnar.cache_path(fname)
+    if os.path.isdir(fname) or columnar.is_current(path, fname):
+        return columnar.load(fname, picks)
+
+    import mne  # only needed for offline use
+
+    raw = mne.io.read_raw_edf(fname, preload=True, verbose="ERROR")
+    data = raw.get_data(picks=picks)
+    ch_names = raw.ch_names if picks is None else [raw.ch_names[i] for i in picks]
+    return data, ch_names, raw.info["sfreq"]
+
+
+# ================================= PPG ========================================
+
+def analyze_ppg(ppg, fs, window_size=8, hop=0.1, baseline_duration=60, prominence_factor=0.3, order=3):
+    """HR/SDNN/RMSSD time series for every window position of a whole recording.
+
+    The recording is filtered once and its beats are detected once, by
+    feeding it in ``hop`` sized chunks like the live timer to the same
+    ``PPGBeatTracker`` the GUI uses.
+    The window of every hop (the beats confirmed by then, newer than
+    ``window_size`` seconds) is found with ``np.searchsorted`` and its
+    statistics come from cumulative sums of RR, RR² and the squared
+    successive differences, so the values match what ``get_online_PPG``
+    showed live at each tick. Changes are relative to a baseline over the
+    first ``baseline_duration`` seconds.
+    """
+    ppg = np.asarray(ppg, dtype=float)
+    ts = np.arange(ppg.size) / fs
+    step = max(int(hop * fs), 1)
+    max_beats = int(ppg.size / fs * 4) + 16  # keep every beat of the recording
+
+    tracker = PPGBeatTracker(fs, window=window_size, prominence_factor=prominence_factor,
+                             max_beats=max_beats, order=order)
+    filtered = tracker.filter.process(ppg)
+    confirmed = []
+    for start in range(0, ppg.size, step):
+        tracker.update(ppg[start:start + step], ts[start:start + step], filtered[start:start + step])
+        confirmed.append(tracker.beat_times.total)
+    ends = ts[np.minimum(np.arange(step, ppg.size + step, step), ppg.size) - 1]
+
+    beats = tracker.beats()
+    hi = np.array(confirmed)  # beats [lo, hi) are in the window, intervals [lo, hi - 1)
+    lo = np.minimum(np.searchsorted(beats, ends - window_size, side="right"), hi)
+    m = np.maximum(hi - lo - 1, 0)
+    valid = m >= 2
+
+    rr = np.diff(beats)
+    shifted = rr - (rr.mean() if rr.size else 0.0)  # keeps the variance sums well conditioned
+    c1 = np.concatenate([[0.0], np.cumsum(shifted)])
+    c2 = np.concatenate([[0.0], np.cumsum(np.square(shifted))])
+    c3 = np.concatenate([[0.0], np.cumsum(np.square(np.diff(rr)))])
+    last = np.maximum(hi - 1, lo)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean_shift = (c1[last] - c1[lo]) / m
+        mean_rr = mean_shift + (rr.mean() if rr.size else 0.0)
+        sdnn = np.sqrt(np.maximum((c2[last] - c2[lo]) / m - mean_shift ** 2, 0.0))
+        rmssd = np.sqrt((c3[np.maximum(last - 1, lo)] - c3[lo]) / (m - 1))
+        rmssd_corrected = rmssd / mean_rr ** 3
+
+    # the median changes only when a beat enters or leaves the window
+    hr = np.full(hi.size, np.nan)
+    pairs, inverse = np.unique(np.stack([lo[valid], last[valid]]), axis=1, return_inverse=True)
+    medians = np.array([np.median(rr[a:b]) for a, b in pairs.T])
+    hr[valid] = np.floor(60 / medians)[np.ravel(inverse)]
+
+    params = {"mean_rr": mean_rr, "sdnn": sdnn, "rmssd": rmssd, "num_peaks": np.where(valid, m + 1, 0),
+              "hr": hr, "rmssd_corrected": rmssd_corrected}
+    for key in ("mean_rr", "sdnn", "rmssd", "rmssd_corrected"):
+        params[key] = np.where(valid, params[key], np.nan)
+    result = {"t": ends, "beats": beats, **params}
+
+    n_baseline = int(baseline_duration * fs)
+    if ppg.size >= n_baseline:
+        accumulator = PPGBaselineAccumulator(fs, duration=baseline_duration,
+                                             prominence_factor=prominence_factor, order=order)
+        accumulator.update(ppg[:n_baseline], ts[:n_baseline])
+        try:
+            baseline = accumulator.params()
+        except ValueError:
+            baseline = None
+        if baseline is not None:
+            result["baseline"] = baseline
+            for key in ("hr", "sdnn", "rmssd", "rmssd_corrected"):
+                result[f"{key}_change"] = params[key] / baseline[key]
+    return result
+
+
+# ================================= EMG ========================================
+
+def emg_envelope(emg, fs, window_size=0.3, order=3, idx=None, block=4096):
+    """``EMGEnvelope.value`` after each of the samples ``idx`` (all by default) of a whole recording.
+
+    The recording is filtered once; the windows ending at ``idx`` are
+    strided views of it, reduced with ``rectified_sum`` ``block`` windows
+    at a time so memory stays bounded.
+    """
+    emg = np.asarray(emg, dtype=float)
+    filtered = FilterBank.emg(fs, order).process(emg)
+    w = int(window_size * fs)
+    n = emg.shape[-1]
+    idx = np.arange(n) if idx is None else np.asarray(idx)
+    out = np.empty(emg.shape[:-1] + (idx.size,))
+
+    # partial windows at the start are extrapolated like EMGEnvelope.value
+    partial = np.flatnonzero(idx < w - 1)
+    for k in partial:
+        out[..., k] = rectified_sum(filtered[..., :idx[k] + 1]) * w / (idx[k] + 1)
+    full = np.flatnonzero(idx >= w - 1)
+    if full.size:
+        windows = np.lib.stride_tricks.sliding_window_view(filtered, w, axis=-1)
+        for lo in range(0, full.size, block):
+            k = full[lo:lo + block]
+            out[..., k] = rectified_sum(windows[..., idx[k] - (w - 1), :])
+    return out
+
+
+def analyze_emg(emg, fs, window_size=0.3, hop=0.3, baseline_duration=20, order=3):
+    """EMG envelope and z-scores per ``hop`` for every channel of a whole recording.
+
+    The recording is filtered once, the envelope is evaluated on strided
+    windows at the hops only and the baseline is taken from the first
+    ``baseline_duration`` seconds with ``get_baseline_EMG(causal=True)``, as
+    ``FeedWindowEMG`` does live.
+    """
+    emg = np.atleast_2d(np.asarray(emg, dtype=float))
+    step = max(int(hop * fs), 1)
+    idx = np.arange(step - 1, emg.shape[-1], step)
+    value = emg_envelope(emg, fs, window_size, order, idx=idx)
+
+    baseline = get_baseline_EMG(emg[:, :int(baseline_duration * fs)], fs, duration=baseline_duration,
+                                chunk_size=window_size, causal=True, order=order)
+    zscore = (value - baseline["mean_emg"][:, np.newaxis]) / baseline["std_emg"][:, np.newaxis]
+    return {"t": idx / fs, "value": value, "zscore": zscore, "baseline": baseline}
+
+
+# ============================== Recording =====================================
+
+def analyze_recording(fname, config=None, ppg_window=8, hop=0.1):
+    """Load a recording once and compute the PPG and EMG time series."""
+    config = config or load_config()
+    data, ch_names, fs = load_edf(fname)
+    result = {"fname": str(fname), "fs": fs, "ch_names": ch_names}
+
+    ppg_config = config["ppg"]
+    ppg = select_channels(ch_names, ppg_config["channels"])
+    if ppg:
+        result["ppg"] = analyze_ppg(data[ppg[0]], fs, window_size=ppg_window, hop=hop,
+                                    baseline_duration=ppg_config["baseline_duration"],
+                                    prominence_factor=ppg_config["prominence_factor"],
+                                    order=ppg_config["filter_order"])
+
+    emg = select_channels(ch_names, config["emg"]["channels"])
+    emg_config = config["emg"]
+    if emg and data.shape[-1] >= emg_config["baseline_duration"] * fs:
+        result["emg"] = analyze_emg(data[emg], fs, window_size=emg_config["window_size"],
+                                    hop=emg_config["window_size"],
+                                    baseline_duration=emg_config["baseline_duration"],
+                                    order=emg_config["filter_order"])
+        result["emg"]["channels"] = [ch_names[i] for i in emg]
+    return result
@@ -0,0 +1,123 @@
+# Declarative source -> filter -> features graph, each stage computed once per new chunk
+import threading
+
+from funcpack.acquisition import AcquisitionService
+
+
+class Pipeline:
+    """Shared DSP graph over one acquisition.
+
+    A *stage* is a stateful object (``PPGBeatTracker``, ``EMGEngine``, ...)
+    fed with the rows ``picks`` of every new chunk through its
+    ``update(data, ts)``; a *feature* is a function of one stage's object,
+    evaluated at most once per chunk. Both are registered under a key that
+    names everything they depend on (kind, channels, parameters), so a
+    second consumer asking for the same key shares the existing node
+    instead of filtering the same samples again.
+
+    Consumers ``pull`` at their own rate: the first pull after new samples
+    reads them once from the source and feeds every stage, later pulls in
+    the same chunk are served from the cache. Nodes are reference counted;
+    ``release`` drops them when the last consumer is gone.
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self.fs = source.fs
+        self.cursor = source.cursor  # stages see the samples from here on
+        self.version = 0             # chunks processed
+        self.stages = {}
+        self.features = {}
+        self._lock = threading.RLock()
+
+    # ---------------------------- graph ------------------------------
+    def stage(self, key, factory, picks=None, lookback=0):
+        """Register (or share) the stage ``key``; ``factory()`` builds its object.
+
+        A new stage is first fed the last ``lookback`` seconds before the
+        current position, so it does not start cold.
+        """
+        with self._lock:
+            node = self.stages.get(key)
+            if node is None:
+                obj = factory()
+                node = self.stages[key] = {"obj": obj, "picks": picks, "refs": 0, "updates": 0}
+                if lookback:
+                    start = max(0, self.cursor - int(lookback * self.fs))
+                    data, ts, _ = self.source.since(start, picks=picks)
+                    n = self.cursor - start  # history only, the next chunk comes with advance()
+                    obj.update(data[..., :n], ts[:n])
+            node["refs"] += 1
+            return key
+
+    def feature(self, key, stage, fn):
+        """Register (or share) the feature ``key`` = ``fn(stage object)``.
+
+        Takes over the caller's reference to ``stage`` (as returned by
+        ``stage()``), the feature holds it until it is released.
+        """
+        with self._lock:
+            node = self.features.get(key)
+            if node is None:
+                node = self.features[key] = {"stage": stage, "fn": fn, "refs": 0, "version": -1,
+                                             "value": None, "computed": 0, "cached": 0}
+            else:
+                self.release(stage)  # the existing feature already holds one
+            node["refs"] += 1
+            return key
+
+    def release(self, key):
+        """Drop one reference to a stage or feature."""
+        with self._lock:
+            for nodes in (self.features, self.stages):
+                node = nodes.get(key)
+                if node is None:
+                    continue
+                node["refs"] -= 1
+                if node["refs"] <= 0:
+                    del nodes[key]
+                    if nodes is self.features:
+                        self.release(node["stage"])
+                return
+
+    # ---------------------------- data -------------------------------
+    def advance(self):
+        """Feed the samples that arrived since the last call to every stage; returns their number."""
+        with self._lock:
+            data, ts, total = self.source.since(self.cursor)
+            if ts.size == 0:
+                return 0
+            self.cursor = total
+            for node in self.stages.values():
+                node["obj"].update(data[AcquisitionService._rows(node["picks"])], ts)
+                node["updates"] += 1
+            self.version += 1
+            return ts.size
+
+    def pull_stage(self, key):
+        """The stage object, up to date with the source."""
+        with self._lock:
+            self.advance()
+            return self.stages[key]["obj"]
+
+    def pull(self, key):
+        """The feature value for the newest chunk, computed once per chunk."""
+        with self._lock:
+            self.advance()
+            node = self.features[key]
+            if node["version"] != self.version:
+                node["value"] = node["fn"](self.stages[node["stage"]]["obj"])
+                node["version"] = self.version
+                node["computed"] += 1
+            else:
+                node["cached"] += 1
+            return node["value"]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "chunks": self.version,
+                "stages": {str(k): {"refs": n["refs"], "updates": n["updates"]} for k, n in self.stages.items()},
+                "features": {str(k): {"refs": n["refs"], "computed": n["computed"], "cached": n["cached"]}
+                             for k, n in self.features.items()},
+            }
@@ -0,0 +1,266 @@
+"""Lightweight EDF player: memory-mapped file, faster than real time.
+
+Reads chunks lazily from ``EDFReader`` (or the columnar conversion, see
+``funcpack.columnar``) and pushes them to an LSL outlet or to an in-process
+``LocalStream`` at ``speed`` times real time (``inf`` for as fast as the
+consumer reads), with looping and seeking. Timestamps
+follow the recording (``start + sample / fs``) so RR intervals stay right
+at any speed; ``EDFPlayer.push_time`` maps them back to the local clock
+time their chunk was pushed, which is what latency is measured from. The
+channel types of the EDF labels go with the stream.
+
+    python -m funcpack.player dataset/type_1_150s.edf --speed 10
+"""
+import argparse
+import math
+import threading
+import time
+import uuid
+
+import numpy as np
+
+from funcpack.buffers import RingBuffer
+from funcpack.columnar import open_recording
+
+PUSH_LOG = 4096  # chunks whose push time is kept for push_time()
+
+
+class LocalStream:
+    """In-process stand-in for ``StreamLSL`` fed by a player.
+
+    Provides what ``AcquisitionService`` uses: ``info`` (``sfreq``,
+    ``ch_names``), ``n_new_samples``, ``get_data(winsize)`` and
+    ``get_channel_types()``. With ``backpressure`` the producer blocks while
+    the unread samples would overflow the buffer, so nothing is lost when
+    replaying as fast as possible.
+    """
+
+    def __init__(self, ch_names, fs, bufsize=60, ch_types=None, backpressure=True):
+        self.info = {"sfreq": float(fs), "ch_names": list(ch_names)}
+        self.ch_types = ch_types or ["misc"] * len(ch_names)
+        self.backpressure = backpressure
+        capacity = int(bufsize * fs)
+        self.data = RingBuffer(capacity, n_channels=len(ch_names))
+        self.times = RingBuffer(capacity)
+        self._read = 0  # write cursor at the last get_data
+        self._cond = threading.Condition()
+        self.connected = True
+
+    def connect(self):
+        self.connected = True
+        return self
+
+    def disconnect(self):
+        with self._cond:
+            self.connected = False
+            self._cond.notify_all()
+
+    def get_channel_types(self):
+        return list(self.ch_types)
+
+    @property
+    def n_new_samples(self):
+        with self._cond:
+            return min(self.times.total - self._read, self.times.capacity)
+
+    def get_data(self, winsize=None):
+        """(data, ts) of the last ``winsize`` seconds; marks everything as read."""
+        with self._cond:
+            n = None if winsize is None else int(round(winsize * self.info["sfreq"]))
+            data, ts = self.data.last(n).copy(), self.times.last(n).copy()
+            self._read = self.times.total
+            self._cond.notify_all()
+        return data, ts
+
+    def push(self, data, ts):
+        with self._cond:
+            if self.backpressure:
+                room = self.times.capacity - data.shape[-1]
+                self._cond.wait_for(lambda: not self.connected or self.times.total - self._read <= room)
+            self.data.extend(data)
+            self.times.extend(ts)
+
+
+class LSLOutput:
+    """Pushes chunks to an LSL outlet (``mne_lsl.lsl``)."""
+
+    def __init__(self, ch_names, fs, name="PPG_Stream", stype="", source_id=None, chunk_size=200,
+                 ch_types=None):
+        from mne_lsl.lsl import StreamInfo, StreamOutlet, local_clock  # only needed for LSL output
+
+        self.clock = local_clock  # timestamps must be on the LSL clock
+        info = StreamInfo(name, stype, len(ch_names), fs, "float32", source_id or uuid.uuid4().hex)
+        info.set_channel_names(ch_names)
+        if ch_types is not None:
+            info.set_channel_types(ch_types)
+        self.info = info
+        self.outlet = StreamOutlet(info, chunk_size=chunk_size)
+
+    def push(self, data, ts):
+        outlet = self.outlet
+        if outlet is None:  # disconnected while the player was stopping
+            return
+        # timestamp of the newest sample, the earlier ones follow the nominal rate
+        outlet.push_chunk(np.ascontiguousarray(data.T, dtype=np.float32), timestamp=float(ts[-1]))
+
+    def disconnect(self):
+        self.outlet = None
+
+
+class EDFPlayer:
+    """Replays an EDF file in chunks on a background thread.
+
+    ``output`` is "local" (``self.stream`` is a ``LocalStream`` to hand to
+    ``AcquisitionService``) or "lsl" (an outlet named ``name``). ``speed``
+    may be changed while playing; ``seek(seconds)`` jumps within the file
+    while the output timestamps keep increasing like a live stream.
+    """
+
+    def __init__(self, fname, chunk_size=200, speed=1.0, loop=True, picks=None, output="local",
+                 name="PPG_Stream", source_id=None, bufsize=60, clock=None):
+        self.reader = open_recording(fname)
+        self.picks = self.reader.picks(picks)
+        self.ch_names = [self.reader.ch_names[i] for i in self.picks]
+        self.ch_types = [self.reader.ch_types[i] for i in self.picks]
+        self.fs = self.reader.fs
+        self.chunk_size = chunk_size
+        self.loop = loop
+        if output == "local":
+            self.stream = LocalStream(self.ch_names, self.fs, bufsize=bufsize, ch_types=self.ch_types)
+            self.clock = clock or time.monotonic
+        elif output == "lsl":
+            self.stream = LSLOutput(self.ch_names, self.fs, name=name, source_id=source_id,
+                                    chunk_size=chunk_size, ch_types=self.ch_types)
+            self.clock = clock or self.stream.clock
+        else:
+            raise ValueError(f"Unknown output {output!r}, use 'local' or 'lsl'")
+
+        self.position = 0   # next sample of the file
+        self.pushed = 0     # samples pushed since start (stream time)
+        self._speed = speed
+        self._anchor = None  # (clock, pushed) the pacing is measured from
+        self._t0 = None      # timestamp of the first pushed sample
+        # (timestamp of the last sample, clock after the push) per chunk
+        self._pushes = RingBuffer(PUSH_LOG, n_channels=2)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.finished = threading.Event()
+
+    # ---------------------------- control ----------------------------
+    @property
+    def speed(self):
+        return self._speed
+
+    @speed.setter
+    def speed(self, value):
+        with self._lock:
+            self._speed = value
+            self._anchor = None  # re-anchor the pacing at the new speed
+
+    def seek(self, seconds):
+        with self._lock:
+            self.position = min(max(int(seconds * self.fs), 0), self.reader.n_times)
+            self._anchor = None
+
+    @property
+    def time(self):
+        """Current position in the file, seconds."""
+        return self.position / self.fs
+
+    def push_time(self, ts):
+        """Clock time the sample stamped ``ts`` was pushed, ``None`` if unknown.
+
+        At ``speed`` != 1 the timestamps run at the recording's pace, not
+        the clock's; latency is measured from the push (see
+        ``profiling.LatencyMonitor``).
+        """
+        with self._lock:
+            last_ts, pushed_at = self._pushes.last()
+            # half a sample of slack for timestamps rounded on the way
+            i = int(np.searchsorted(last_ts, ts - 0.5 / self.fs))
+            if i == last_ts.size or (i == 0 and ts < last_ts[0] - (self.chunk_size + 0.5) / self.fs):
+                return None
+            return float(pushed_at[i])
+
+    def start(self):
+        self._stop.clear()
+        self.finished.clear()
+        self._thread = threading.Thread(target=self._run, name="edf-player", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self.stream.disconnect()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+        self._thread = None
+
+    # ---------------------------- playback ---------------------------
+    def _next_chunk(self):
+        with self._lock:
+            if self.position >= self.reader.n_times:
+                if not self.loop:
+                    return None
+                self.position = 0
+            start = self.position
+            stop = min(start + self.chunk_size, self.reader.n_times)
+            self.position = stop
+        return self.reader.read(start, stop, picks=self.picks)
+
+    def _run(self):
+        while not self._stop.is_set():
+            data = self._next_chunk()
+            if data is None:
+                break
+            n = data.shape[-1]
+
+            with self._lock:
+                now = self.clock()
+                if self._t0 is None:
+                    self._t0 = now
+                if self._anchor is None:
+                    self._anchor = (now, self.pushed)
+                speed, (t_anchor, p_anchor) = self._speed, self._anchor
+            # a chunk is released when its last sample is due
+            due = t_anchor + (self.pushed + n - p_anchor) / self.fs / speed if math.isfinite(speed) else now
+            if due > now and self._stop.wait(due - now):
+                break
+
+            ts = self._t0 + (self.pushed + np.arange(n)) / self.fs
+            self.stream.push(data, ts)
+            with self._lock:
+                self._pushes.append([ts[-1], self.clock()])
+            self.pushed += n
+        self.finished.set()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("fname")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed, inf for as fast as possible")
+    parser.add_argument("--chunk-size", type=int, default=200)
+    parser.add_argument("--no-loop", action="store_true")
+    parser.add_argument("--seek", type=float, default=0.0, help="start position, s")
+    parser.add_argument("--name", default="PPG_Stream")
+    parser.add_argument("--source-id", default=None)
+    args = parser.parse_args()
+
+    player = EDFPlayer(args.fname, chunk_size=args.chunk_size, speed=args.speed, loop=not args.no_loop,
+                       output="lsl", name=args.name, source_id=args.source_id)
+    player.seek(args.seek)
+    player.start()
+    print(f"Playing {args.fname} ({', '.join(player.ch_names)}, {player.fs:g} Hz) as '{args.name}' "
+          f"at {args.speed:g}x, Ctrl+C to stop")
+    try:
+        while not player.finished.wait(0.5):
+            pass
+    except KeyboardInterrupt:
+        pass
+    finally:
+        player.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+# Helpers for fast plotting of long traces
+import numpy as np
+
+
+def minmax_decimate(t, y, n_bins):
+    """Reduce a trace to the min and max of ``n_bins`` equal bins.
+
+    With ``n_bins`` set to the plot width in pixels the drawn line looks the
+    same as the full trace (spikes stay visible), but the draw cost depends
+    on the screen width instead of the number of samples.
+    """
+    n_bins = max(int(n_bins), 1)
+    n = y.shape[-1]
+    if n <= 2 * n_bins:
+        return t, y
+
+    per_bin = n // n_bins
+    start = n - per_bin * n_bins  # drop the oldest remainder, keep the newest samples
+    yb = y[start:].reshape(n_bins, per_bin)
+    tb = t[start:].reshape(n_bins, per_bin)
+
+    imin = yb.argmin(axis=1)
+    imax = yb.argmax(axis=1)
+    # keep the min and max of every bin in time order
+    idx = np.stack([np.minimum(imin, imax), np.maximum(imin, imax)], axis=1)
+    rows = np.arange(n_bins)[:, np.newaxis]
+    return tb[rows, idx].ravel(), yb[rows, idx].ravel()
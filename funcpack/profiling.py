@@ -0,0 +1,253 @@
+# Per-tick instrumentation: stage timers and timer-loop health in fixed-size histograms
+import json
+import math
+import threading
+import time
+
+
+class Histogram:
+    """Durations (seconds) in a fixed number of log-spaced bins.
+
+    Adding a value is O(1) and memory does not grow with the session length;
+    percentiles are resolved to the upper edge of their bin (~13 % wide with
+    the defaults).
+    """
+
+    def __init__(self, lo=1e-6, hi=10.0, n_bins=128):
+        self.lo, self.hi, self.n_bins = lo, hi, n_bins
+        self._log_lo = math.log(lo)
+        self._scale = n_bins / (math.log(hi) - self._log_lo)
+        self.reset()
+
+    def reset(self):
+        self.counts = [0] * self.n_bins
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value):
+        if value <= self.lo:
+            i = 0
+        else:
+            i = min(int((math.log(value) - self._log_lo) * self._scale), self.n_bins - 1)
+        self.counts[i] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def edges(self):
+        return [math.exp(self._log_lo + i / self._scale) for i in range(self.n_bins + 1)]
+
+    def percentile(self, q):
+        if not self.count:
+            return float("nan")
+        target = q / 100 * self.count
+        acc = 0
+        for i, c in enumerate(self.counts):
+            acc += c
+            if c and acc >= target:
+                return min(math.exp(self._log_lo + (i + 1) / self._scale), self.max)
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else float("nan"),
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "max": self.max,
+        }
+
+
+class _Stage:
+    __slots__ = ("profiler", "name", "t0")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.name, time.perf_counter() - self.t0)
+        return False
+
+
+class Profiler:
+    """Stage timings and timer-loop health of a session.
+
+    ``with profiler.stage("heart.filter"):`` times a block, ``record`` adds a
+    duration measured elsewhere and ``tick(loop, interval)`` is called at the
+    top of a timer slot: the time since the previous tick goes into the
+    ``<loop>.interval`` histogram and intervals longer than ``late_factor``
+    times the nominal one are counted as late (plus the ticks they missed);
+    loops without a period are only timed. Safe to use from the GUI, worker and acquisition threads at once.
+    """
+
+    enabled = True
+
+    def __init__(self, late_factor=1.5):
+        self.late_factor = late_factor
+        self.histograms = {}
+        self.loops = {}
+        self.started = time.time()
+        self._lock = threading.Lock()
+
+    def stage(self, name):
+        return _Stage(self, name)
+
+    def record(self, name, seconds):
+        with self._lock:
+            hist = self.histograms.get(name)
+            if hist is None:
+                hist = self.histograms[name] = Histogram()
+            hist.add(seconds)
+
+    def tick(self, loop, interval):
+        """Start of a timer slot; ``interval`` 0 or None means no fixed period (nothing is late)."""
+        now = time.perf_counter()
+        interval = interval or 0.0
+        with self._lock:
+            state = self.loops.get(loop)
+            if state is None:
+                self.loops[loop] = {"interval": interval, "ticks": 0, "late": 0, "missed": 0, "last": now}
+                return
+            dt = now - state["last"]
+            state["last"] = now
+            state["interval"] = interval
+            state["ticks"] += 1
+            if interval > 0 and dt > self.late_factor * interval:
+                state["late"] += 1
+                state["missed"] += max(int(dt / interval) - 1, 0)
+        self.record(f"{loop}.interval", dt)
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
+            self.loops.clear()
+            self.started = time.time()
+
+    def summary(self):
+        """{"uptime", "stages": {name: stats}, "loops": {loop: counters}}, times in seconds."""
+        with self._lock:
+            return {
+                "uptime": time.time() - self.started,
+                "stages": {name: h.summary() for name, h in sorted(self.histograms.items())},
+                "loops": {loop: {k: v for k, v in s.items() if k != "last"}
+                          for loop, s in sorted(self.loops.items())},
+            }
+
+    def dump(self, path, **extra):
+        """Summary plus the raw histogram bins (and ``extra`` sections) as JSON."""
+        report = self.summary()
+        report.update(extra)
+        with self._lock:
+            report["histograms"] = {name: {"counts": list(h.counts)} for name, h in self.histograms.items()}
+        report["edges"] = Histogram().edges()
+        report["started"] = time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started))
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=1)
+        return path
+
+
+class LatencyMonitor:
+    """Sample-to-feedback latency per consumer.
+
+    Where feedback is rendered, ``record(name, sample_ts)`` is called with the
+    timestamp of the newest sample the feedback reflects; the latency is the
+    time since then on ``clock``, which must be the clock the stream
+    timestamps are in (``mne_lsl.lsl.local_clock`` for LSL streams). Always
+    on: one histogram update per rendered frame.
+
+    A replayed stream is stamped on the recording's timeline, which drifts
+    from the clock at any speed but 1; ``source`` (``EDFPlayer.push_time``)
+    then maps a sample timestamp to the clock time it was pushed.
+    """
+
+    def __init__(self, clock=time.monotonic, source=None):
+        self.clock = clock
+        self.source = source
+        self.histograms = {}
+        self.negative = 0  # samples stamped in the future, i.e. clocks out of sync
+        self._lock = threading.Lock()
+
+    def record(self, name, sample_ts, now=None):
+        if sample_ts is not None and self.source is not None:
+            sample_ts = self.source(sample_ts)
+        if sample_ts is None:
+            return None
+        latency = (self.clock() if now is None else now) - sample_ts
+        with self._lock:
+            hist = self.histograms.get(name)
+            if hist is None:
+                hist = self.histograms[name] = Histogram()
+            if latency < 0:
+                self.negative += 1
+            hist.add(latency)
+        return latency
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
+            self.negative = 0
+
+    def summary(self):
+        with self._lock:
+            return {name: h.summary() for name, h in sorted(self.histograms.items())}
+
+    def report(self):
+        lines = [f"{name:>14}: n={s['count']}, mean {1e3 * s['mean']:.1f} ms, p50 {1e3 * s['p50']:.1f} ms, "
+                 f"p90 {1e3 * s['p90']:.1f} ms, p99 {1e3 * s['p99']:.1f} ms, max {1e3 * s['max']:.1f} ms"
+                 for name, s in self.summary().items()]
+        if self.negative:
+            lines.append(f"{self.negative} samples had timestamps ahead of the clock")
+        return "\n".join(lines)
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class NullProfiler:
+    """Stands in for ``Profiler`` when instrumentation is off; every call is a no-op."""
+
+    enabled = False
+    _stage = _NullStage()
+
+    def stage(self, name):
+        return self._stage
+
+    def record(self, name, seconds):
+        pass
+
+    def tick(self, loop, interval):
+        pass
+
+    def reset(self):
+        pass
+
+    def summary(self):
+        return {"uptime": 0.0, "stages": {}, "loops": {}}
+
+    def dump(self, path, **extra):
+        return None
+
+
+NULL_PROFILER = NullProfiler()
+
+
+def make_profiler(config):
+    """``Profiler`` or the shared no-op one, from the "profiling" config section."""
+    if not config.get("enabled"):
+        return NULL_PROFILER
+    return Profiler(late_factor=config.get("late_factor", 1.5))
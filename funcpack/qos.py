@@ -0,0 +1,92 @@
+# Quality of service: shed optional work when the pipeline falls behind
+import logging
+
+# degradation levels, each one includes the ones before it
+NORMAL = 0
+PLOT_DECIMATED = 1   # plot at a lower rate and resolution
+PLOT_OFF = 2         # plot not drawn, labels still updated
+LABELS_SLOW = 3      # text labels refreshed at a low rate
+LEVELS = ("normal", "plot decimated", "plot off", "labels slow")
+# never shed: the EMG game control and the feedback circles
+
+
+class LoadShedder:
+    """Picks a degradation level from periodic load measurements.
+
+    ``update`` is called every ``period`` seconds with the compute worker's
+    cumulative busy time, the GUI event-loop lag and the number of coalesced
+    (dropped stale) jobs. When the worker is busier than ``high`` of the
+    time, the lag exceeds ``max_lag`` or jobs are being dropped for
+    ``degrade_after`` consecutive checks, one more level is shed; after
+    ``recover_after`` consecutive checks below ``low`` load and half the
+    lag, one level is restored. Every change is logged with its cause.
+    """
+
+    def __init__(self, high=0.8, low=0.5, max_lag=0.05, degrade_after=2, recover_after=8,
+                 max_level=LABELS_SLOW, label_interval=0.5):
+        self.high, self.low, self.max_lag = high, low, max_lag
+        self.degrade_after, self.recover_after = degrade_after, recover_after
+        self.max_level = max_level
+        self.label_interval = label_interval
+        self.level = NORMAL
+        self._labels = {}  # label group -> time of its last refresh
+        self.history = []  # (time, old level, new level, cause)
+        self._last = None  # (time, busy, coalesced) of the previous check
+        self._over = 0
+        self._under = 0
+
+    @property
+    def name(self):
+        return LEVELS[self.level]
+
+    def update(self, now, busy, lag, coalesced):
+        """Feed one measurement; returns the new level when it changed, else None."""
+        if self._last is None:
+            self._last = (now, busy, coalesced)
+            return None
+        t0, busy0, coalesced0 = self._last
+        self._last = (now, busy, coalesced)
+        dt = now - t0
+        if dt <= 0:
+            return None
+        load = (busy - busy0) / dt
+        dropped = coalesced - coalesced0
+
+        causes = []
+        if load > self.high:
+            causes.append(f"worker {100 * load:.0f}% busy")
+        if lag > self.max_lag:
+            causes.append(f"GUI lag {1e3 * lag:.0f} ms")
+        if dropped > 0:
+            causes.append(f"{dropped} stale jobs dropped")
+
+        if causes:
+            self._under = 0
+            self._over += 1
+            if self._over >= self.degrade_after and self.level < self.max_level:
+                self._over = 0
+                return self._set(now, self.level + 1, ", ".join(causes))
+        elif load < self.low and lag < self.max_lag / 2:
+            self._over = 0
+            self._under += 1
+            if self._under >= self.recover_after and self.level > NORMAL:
+                self._under = 0
+                return self._set(now, self.level - 1, f"load back to {100 * load:.0f}%")
+        else:
+            self._over = self._under = 0
+        return None
+
+    def labels_due(self, group, now):
+        """Whether a group of text labels should be refreshed now."""
+        last = self._labels.get(group)
+        if self.level < LABELS_SLOW or last is None or now - last >= self.label_interval:
+            self._labels[group] = now
+            return True
+        return False
+
+    def _set(self, now, level, cause):
+        old, self.level = self.level, level
+        self.history.append((now, old, level, cause))
+        log = logging.warning if level > old else logging.info
+        log("QoS: %s -> %s (%s)", LEVELS[old], LEVELS[level], cause)
+        return level
@@ -0,0 +1,241 @@
+"""Headless replay of the biofeedback windows on a virtual clock.
+
+Drives the same path as the GUI (``AcquisitionService`` → ``DataScheduler``
+→ ``funcpack.pipeline`` → ``funcpack.feedback``) from an EDF file without Qt, LSL or wall-clock
+timers. Chunks of ``chunk_size`` samples arrive at the time of their last
+sample; the consumers run with the GUI's rates and priorities, deferred
+ones at their scheduler deadline, and the game advances one frame every
+33 ms of virtual time. Training starts as soon as a baseline is complete.
+The result is the timestamped sequence of feedback values, circle colours,
+labels and game frames the windows would have shown.
+
+Computation is treated as instantaneous: results are applied at the time
+their job was scheduled, so worker latency and QoS shedding are not modelled.
+
+    python -m funcpack.replay dataset/*.edf -j 4 -o replay.json
+"""
+import argparse
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from funcpack.acquisition import AcquisitionService
+from funcpack.config import load_config, select_channels
+from funcpack.columnar import open_recording
+from funcpack.emg_service import EMGFeatureService
+from funcpack.feedback import EMGFeedback, PPGFeedback, PongGame, emg_label, ppg_colors, ppg_labels
+from funcpack.pipeline import Pipeline
+from funcpack.player import LocalStream
+from funcpack.scheduler import DataScheduler
+
+# name: (rate, priority), as registered by the windows
+CONSUMERS = {
+    "ppg_baseline": (5, 1),
+    "ppg_feedback": (10, 2),
+    "emg_baseline": (5, 1),
+    "emg_features": (30, 2),
+}
+FRAME = 0.033  # GameWindow timer interval, s
+
+
+def _plain(d):
+    """Values as Python numbers and lists, for JSON."""
+    return {k: np.asarray(v).tolist() for k, v in d.items()}
+
+
+class Replay:
+    """One recording replayed through the feedback logic.
+
+    ``run()`` returns ``{"events": [...], "stats": {...}}``; every event has
+    the virtual time ``t``, the consumer ``name`` and the timestamp ``ts``
+    of the newest sample behind it. ``duration`` limits the replayed
+    seconds; ``ppg``/``emg``/``game`` switch the parts off.
+    """
+
+    def __init__(self, fname, config=None, chunk_size=200, duration=None, ppg=True, emg=True, game=True):
+        self.fname = str(fname)
+        self.config = config or load_config()
+        self.chunk_size = chunk_size
+        self.reader = open_recording(self.fname)
+        self.fs = self.reader.fs
+        stop = self.reader.n_times if duration is None else int(duration * self.fs)
+        self.n_times = min(stop, self.reader.n_times)
+
+        self.now = 0.0
+        self.stream = LocalStream(self.reader.ch_names, self.fs, backpressure=False)
+        self.acquisition = AcquisitionService(self.stream, bufsize=60)
+        self.pipeline = Pipeline(self.acquisition)
+        self.scheduler = DataScheduler()
+        self.events = []
+
+        ch_names = self.reader.ch_names
+        ppg_picks = select_channels(ch_names, self.config["ppg"]["channels"]) if ppg else []
+        self.ppg_idx = ppg_picks[0] if ppg_picks else None
+        self.emg_ids = select_channels(ch_names, self.config["emg"]["channels"]) if emg else []
+        self.emg_names = [ch_names[i] for i in self.emg_ids]
+        self.game_enabled = game
+        self.ppg = self.emg = self.game = None
+        self.features = None  # EMGFeatureService after the EMG baseline
+        self.cursors = {}
+        self.keys = {}  # pipeline nodes of the training consumers
+        self.next_frame = None
+
+    # ---------------------------- consumers ----------------------------
+    def _add(self, name, callback):
+        rate, priority = CONSUMERS[name]
+
+        def job():
+            # a failed job is skipped like in the compute worker, and kept in the record
+            try:
+                callback()
+            except Exception as e:
+                logging.debug("Job %s failed: %s", name, e)
+                self._record(name, self.acquisition.last_ts, error=str(e))
+
+        self.scheduler.add(name, job, rate=rate, priority=priority)
+
+    def _since(self, name, picks):
+        data, ts, self.cursors[name] = self.acquisition.since(self.cursors[name], picks=picks)
+        return data, ts
+
+    def _record(self, name, ts, **fields):
+        self.events.append(dict(t=round(self.now, 6), name=name, ts=None if ts is None else float(ts), **fields))
+
+    def _ppg_baseline(self):
+        result = self.ppg.baseline_step(*self._since("ppg", self.ppg_idx))
+        if "params" not in result:
+            return
+        self.scheduler.remove("ppg_baseline")
+        self._record("ppg_baseline", self.acquisition.last_ts, params=_plain(result["params"]))
+        self.keys["ppg_feedback"] = self.ppg.attach(self.pipeline, self.ppg_idx)
+        self._add("ppg_feedback", self._ppg_feedback)
+
+    def _ppg_feedback(self):
+        data = self.ppg.features(self.pipeline.pull_stage(self.keys["ppg_feedback"]))
+        ts = data.pop("ts", None)
+        self._record("ppg_feedback", ts, values=_plain(data), colors=ppg_colors(data), labels=ppg_labels(data))
+
+    def _emg_baseline(self):
+        result = self.emg.baseline_step(*self._since("emg", self.emg_ids))
+        if "params" not in result:
+            return
+        self.scheduler.remove("emg_baseline")
+        self._record("emg_baseline", self.acquisition.last_ts,
+                     params={ch: _plain(p) for ch, p in self.emg.channel_baselines().items()})
+        # the feedback labels are pushed by the service, the game frames read it
+        self.features = EMGFeatureService(self.pipeline, self.emg, self.emg_ids)
+        self.features.subscribe(self._emg_feedback)
+        self._add("emg_features", self.features.update)
+        if self.game_enabled:
+            self.game = PongGame()
+            self.next_frame = self.now + FRAME
+
+    def _emg_feedback(self, latest):
+        ts = latest["ts"]
+        result = {ch: 100 * latest[ch] for ch in self.emg_names}
+        self._record("emg_feedback", ts, values=_plain(result), label=emg_label(result, self.emg_names))
+
+    def _frame(self):
+        game = self.config["game"]
+        result = self.features.latest()
+        bars = self.game.step(result.get(game["left"], 0), result.get(game["right"], 0))
+        bars["diff"] = float(bars["diff"])
+        self._record("game", result["ts"], **bars, **self.game.state())
+
+    # ---------------------------- clock ----------------------------
+    def _advance(self, until):
+        """Run deadlines and game frames due before ``until``, in time order."""
+        while True:
+            deadline = self.scheduler.next_deadline(self.acquisition.cursor)
+            if deadline is not None:
+                deadline = max(deadline, self.now)
+            frame = self.next_frame
+            t = min((x for x in (deadline, frame) if x is not None), default=None)
+            if t is None or t >= until:
+                return
+            self.now = t
+            if t == frame:
+                self._frame()
+                self.next_frame += FRAME
+            else:
+                self.scheduler.run(self.acquisition.cursor, self.now)
+
+    def run(self):
+        start = time.perf_counter()
+        if self.ppg_idx is not None:
+            self.ppg = PPGFeedback(self.fs)
+            self.cursors["ppg"] = 0
+            self._add("ppg_baseline", self._ppg_baseline)
+        if self.emg_ids:
+            emg = self.config["emg"]
+            self.emg = EMGFeedback(self.fs, self.emg_names, window_size=emg["window_size"],
+                                   baseline_duration=emg["baseline_duration"], order=emg["filter_order"])
+            self.cursors["emg"] = 0
+            self._add("emg_baseline", self._emg_baseline)
+
+        for lo in range(0, self.n_times, self.chunk_size):
+            hi = min(lo + self.chunk_size, self.n_times)
+            arrival = hi / self.fs  # a chunk is complete when its last sample is
+            self._advance(arrival)
+            self.now = arrival
+            self.stream.push(self.reader.read(lo, hi), np.arange(lo, hi) / self.fs)
+            self.acquisition.poll()
+            self.scheduler.run(self.acquisition.cursor, self.now)
+        # the deferred consumers still see the last chunk
+        self._advance(self.now + 1.0)
+
+        counts = {}
+        for event in self.events:
+            counts[event["name"]] = counts.get(event["name"], 0) + 1
+        return {
+            "fname": self.fname,
+            "fs": self.fs,
+            "duration": self.n_times / self.fs,
+            "seconds": time.perf_counter() - start,
+            "events": self.events,
+            "stats": {"events": counts, "scheduler": self.scheduler.stats(), "pipeline": self.pipeline.stats()},
+        }
+
+
+def replay(fname, config=None, **kwargs):
+    return Replay(fname, config, **kwargs).run()
+
+
+def run(fnames, config=None, jobs=None, verbose=True, **kwargs):
+    """Replay all files on a process pool; returns {fname: result}."""
+    out = {}
+    with ProcessPoolExecutor(max_workers=jobs or os.cpu_count()) as pool:
+        futures = [pool.submit(replay, f, config, **kwargs) for f in fnames]
+        for future in as_completed(futures):
+            res = future.result()
+            out[res["fname"]] = res
+            if verbose:
+                counts = ", ".join(f"{k}: {v}" for k, v in res["stats"]["events"].items())
+                print(f"{res['seconds']:8.3f} s  {res['fname']}  ({res['duration']:.0f} s replayed; {counts})")
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("fnames", nargs="+")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--config", default=None, help="JSON config overriding the defaults")
+    parser.add_argument("--chunk-size", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=None, help="replay only the first seconds")
+    parser.add_argument("--no-game", action="store_true")
+    parser.add_argument("-o", "--out", default=None, help="write all events to this JSON file")
+    args = parser.parse_args()
+
+    results = run(args.fnames, load_config(args.config), jobs=args.jobs, chunk_size=args.chunk_size,
+                  duration=args.duration, game=not args.no_game)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# Data-driven update scheduling: consumers run when new samples arrive
+import math
+
+
+class DataScheduler:
+    """Decides which consumers to run when the acquisition write cursor moves.
+
+    Every consumer has a target ``rate`` (upper bound on runs per second), a
+    ``priority`` (higher runs first within one wake-up) and ``min_samples``
+    (new samples needed before it is worth running again). A consumer is due
+    when at least ``min_samples`` arrived since its last run and its rate
+    allows it; wake-ups with no new data for it are skipped, and data that
+    arrives while it is rate-limited is coalesced into its next run.
+
+    The scheduler holds no clock or thread; the caller passes the cursor and
+    the time and runs what ``due`` returns (see ``update_scheduler.py`` for the
+    Qt side, ``next_deadline`` tells when to wake up for deferred work).
+    """
+
+    def __init__(self):
+        self.consumers = {}
+
+    def add(self, name, callback, rate=None, priority=0, min_samples=1):
+        self.consumers[name] = {
+            "callback": callback,
+            "interval": 1.0 / rate if rate else 0.0,
+            "priority": priority,
+            "min_samples": min_samples,
+            "cursor": None,       # write cursor at the last run
+            "last": -math.inf,    # time of the last run
+            "runs": 0,
+            "coalesced": 0,       # wake-ups merged into a later run by the rate limit
+            "idle": 0,            # wake-ups with nothing new for this consumer
+        }
+
+    def remove(self, name):
+        self.consumers.pop(name, None)
+
+    def set_rate(self, name, rate):
+        if name in self.consumers:
+            self.consumers[name]["interval"] = 1.0 / rate if rate else 0.0
+
+    def __contains__(self, name):
+        return name in self.consumers
+
+    def _has_data(self, c, cursor):
+        return c["cursor"] is None or cursor - c["cursor"] >= c["min_samples"]
+
+    def due(self, cursor, now):
+        """Names to run now, highest priority first; they are marked as run."""
+        ready = []
+        for name, c in self.consumers.items():
+            if not self._has_data(c, cursor):
+                c["idle"] += 1
+                continue
+            if now < c["last"] + c["interval"]:  # same sum as next_deadline
+                c["coalesced"] += 1
+                continue
+            c["cursor"], c["last"] = cursor, now
+            c["runs"] += 1
+            ready.append(name)
+        ready.sort(key=lambda name: -self.consumers[name]["priority"])
+        return ready
+
+    def run(self, cursor, now):
+        """Call the due consumers; returns their names."""
+        names = self.due(cursor, now)
+        for name in names:
+            c = self.consumers.get(name)
+            if c is not None:  # a callback may remove a later consumer
+                c["callback"]()
+        return names
+
+    def next_deadline(self, cursor):
+        """Earliest time a consumer with unprocessed data may run (None if none waits)."""
+        times = [c["last"] + c["interval"] for c in self.consumers.values() if self._has_data(c, cursor)]
+        return min(times) if times else None
+
+    def stats(self):
+        return {name: {k: c[k] for k in ("runs", "coalesced", "idle")} for name, c in self.consumers.items()}
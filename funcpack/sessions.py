@@ -0,0 +1,151 @@
+# Several participants in one process: one metrics pipeline per stream, one shared DSP pool
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from funcpack.config import load_config
+from funcpack.metrics_server import PPG_METRICS, MetricsSession
+from funcpack.player import EDFPlayer, LSLOutput
+
+
+class SessionManager:
+    """Owns N independent participant sessions and schedules their DSP.
+
+    Every participant is a ``MetricsSession`` (own stream, acquisition
+    thread, trackers and outlets). A single ticker submits each session's
+    ``step`` to a shared thread pool ``rate`` times per second; a session
+    whose previous step is still running is skipped for that tick, so a slow
+    participant only delays itself and never queues work ahead of the others.
+    ``status()`` is a snapshot for the dashboard.
+    """
+
+    def __init__(self, config=None, rate=4, ppg_window=8, workers=None, output=LSLOutput):
+        self.config = config or load_config()
+        self.rate = rate
+        self.ppg_window = ppg_window
+        self.output = output
+        self.workers = workers or os.cpu_count()
+        self.pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="session-dsp")
+        self.sessions = {}
+        self._state = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    # ---------------------------- participants ------------------------
+    def add(self, name, stream, player=None):
+        """Start a session on ``stream``; ``player`` is stopped with it."""
+        if name in self.sessions:
+            raise ValueError(f"Session {name!r} already exists")
+        session = MetricsSession(stream, name, self.config, rate=self.rate, ppg_window=self.ppg_window,
+                                 output=self.output)
+        session.acquisition.start()
+        with self._lock:
+            self.sessions[name] = session
+            self._state[name] = {"player": player, "future": None, "latest": {}, "updated": None,
+                                 "runs": 0, "skipped": 0, "errors": 0, "error": None, "busy": 0.0}
+        return session
+
+    def add_stream(self, name, stream_name=None, source_id=None):
+        """Session on a live LSL stream."""
+        from funcpack.metrics_server import connect
+
+        return self.add(name, connect(name=stream_name or name, source_id=source_id))
+
+    def add_replay(self, name, fname, speed=1.0, loop=True):
+        """Session on an EDF file replayed in-process (no LSL input needed)."""
+        player = EDFPlayer(fname, speed=speed, loop=loop, output="local")
+        session = self.add(name, player.stream, player=player)
+        player.start()
+        return session
+
+    def remove(self, name):
+        with self._lock:
+            session = self.sessions.pop(name, None)
+            state = self._state.pop(name, None)
+        if session is None:
+            return
+        if state["future"] is not None:
+            state["future"].cancel()
+        if state["player"] is not None:
+            state["player"].stop()
+        session.stop()
+
+    # ---------------------------- scheduling --------------------------
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="session-ticker", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+        self._thread = None
+        for name in list(self.sessions):
+            self.remove(name)
+        self.pool.shutdown(wait=True, cancel_futures=True)
+
+    def _run(self):
+        interval = 1.0 / self.rate
+        next_tick = time.monotonic()
+        while not self._stop.is_set():
+            self.tick()
+            next_tick += interval
+            self._stop.wait(max(0.0, next_tick - time.monotonic()))
+
+    def tick(self):
+        """Submit one step per idle session; returns the names submitted."""
+        submitted = []
+        with self._lock:
+            for name, state in self._state.items():
+                if state["future"] is not None and not state["future"].done():
+                    state["skipped"] += 1
+                    continue
+                state["future"] = self.pool.submit(self._step, name, self.sessions[name], state)
+                submitted.append(name)
+        return submitted
+
+    def _step(self, name, session, state):
+        t0 = time.perf_counter()
+        try:
+            pushed = session.step()
+        except Exception as e:  # e.g. too few beats yet, the next tick retries
+            logging.debug("Session %s failed: %s", name, e)
+            state["errors"] += 1
+            state["error"] = str(e)
+            pushed = {}
+        state["busy"] += time.perf_counter() - t0
+        state["runs"] += 1
+        if pushed:
+            latest = state["latest"]
+            if "ppg" in pushed:
+                latest.update(zip(PPG_METRICS, pushed["ppg"].tolist()))
+            if "emg" in pushed:
+                latest.update(zip(session.emg.channels, pushed["emg"].tolist()))
+            state["updated"] = time.monotonic()
+            state["error"] = None
+
+    def status(self):
+        """{name: state} of every participant."""
+        now = time.monotonic()
+        out = {}
+        with self._lock:
+            for name, session in self.sessions.items():
+                state = self._state[name]
+                emg = session.emg.accumulator.progress if session.emg_ids and not session.emg_ready else None
+                out[name] = {
+                    "latest": dict(state["latest"]),
+                    "age": None if state["updated"] is None else now - state["updated"],
+                    "emg_baseline": emg,  # progress while the EMG baseline is collected
+                    "runs": state["runs"],
+                    "skipped": state["skipped"],
+                    "errors": state["errors"],
+                    "error": state["error"],
+                    "step": state["busy"] / state["runs"] if state["runs"] else 0.0,
+                    "published": dict(session.published),
+                }
+        return out
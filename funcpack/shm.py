@@ -0,0 +1,330 @@
+"""Shared-memory acquisition and multiprocess DSP backend.
+
+``SharedAcquisition`` is an ``AcquisitionService`` whose ring buffers live
+in ``multiprocessing.shared_memory`` blocks. ``ProcessBackend`` starts
+worker processes that attach to them read-only (``SharedSource``, the same
+``since``/``get_window`` interface) and run stateful tasks on zero-copy
+views, so filtering and peak detection never take the GUI process's GIL.
+Each task lives in one worker and is stepped on request; results return
+on a single queue drained by one thread, and a task is never queued
+again while its previous step is pending. Dead workers are restarted with
+their tasks; ``stop`` shuts the workers down and frees the shared memory.
+
+Tasks: HeartApp's plot (``feedback.HeartPlot``), the baselines and the
+training of the feedback windows (``feedback.PPGBaselineTask``,
+``PPGFeedbackTask``, ``EMGBaselineTask``, ``EMGFeatureTask``). Each step
+returns a small dict (progress, scalar parameters, one value per channel),
+so the GUI process only renders and its CPU time does not grow with the
+channel count; the game reads the z-scores cached on the GUI side by
+``emg_service.EMGFeatureService.push``.
+"""
+import logging
+import multiprocessing as mp
+import queue
+import signal
+import threading
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from funcpack.acquisition import AcquisitionService
+
+HEADER = 64  # bytes before the samples; the write counter is the first int64
+CHECK_INTERVAL = 0.2  # s between worker liveness checks
+
+
+class SharedRing:
+    """``RingBuffer`` layout in a shared memory block: one writer, readers in any process.
+
+    The samples are written twice (``i`` and ``i + capacity``) so the last
+    ``n`` are contiguous, and the write counter ``total`` is updated after
+    the samples, so a reader that takes ``total`` first only sees complete
+    data. Views stay valid while the writer adds less than ``capacity - n``
+    samples, as with ``AcquisitionService``.
+    """
+
+    def __init__(self, capacity, n_channels=None, name=None, create=True):
+        self.capacity = int(capacity)
+        self.n_channels = n_channels
+        shape = (2 * self.capacity,) if n_channels is None else (n_channels, 2 * self.capacity)
+        size = HEADER + 8 * int(np.prod(shape))
+        self.shm = shared_memory.SharedMemory(name=name, create=create, size=size if create else 0)
+        self.owner = create
+        self._total = np.ndarray((1,), dtype=np.int64, buffer=self.shm.buf)
+        self._data = np.ndarray(shape, dtype=float, buffer=self.shm.buf, offset=HEADER)
+        if create:
+            self._total[0] = 0
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def spec(self):
+        """What another process needs to ``attach``."""
+        return {"capacity": self.capacity, "n_channels": self.n_channels, "name": self.name}
+
+    @classmethod
+    def attach(cls, spec):
+        return cls(spec["capacity"], spec["n_channels"], name=spec["name"], create=False)
+
+    @property
+    def total(self):
+        return int(self._total[0])
+
+    def __len__(self):
+        return min(self.total, self.capacity)
+
+    def clear(self):
+        self._total[0] = 0
+
+    def extend(self, values):
+        values = np.asarray(values)
+        n = values.shape[-1]
+        if n == 0:
+            return
+        cap = self.capacity
+        total = self.total
+        if n > cap:
+            total += n - cap
+            values = values[..., -cap:]
+        m = values.shape[-1]
+        pos = total % cap
+        first = min(m, cap - pos)
+        for offset in (0, cap):
+            self._data[..., pos + offset:pos + offset + first] = values[..., :first]
+        if first < m:
+            rest = m - first
+            self._data[..., :rest] = values[..., first:]
+            self._data[..., cap:cap + rest] = values[..., first:]
+        self._total[0] = total + m  # publish after the samples are in place
+
+    def append(self, value):
+        self.extend(np.asarray(value)[..., np.newaxis])
+
+    def last(self, n=None, total=None):
+        """View of the newest ``n`` samples as of write counter ``total`` (now by default)."""
+        total = self.total if total is None else total
+        stored = min(total, self.capacity)
+        n = stored if n is None else min(int(n), stored)
+        end = total % self.capacity + self.capacity
+        return self._data[..., end - n:end]
+
+    def since(self, cursor, total=None):
+        total = self.total if total is None else total
+        return self.last(total - cursor, total)
+
+    def close(self):
+        self._total = self._data = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+class SharedAcquisition(AcquisitionService):
+    """``AcquisitionService`` writing into ``SharedRing`` buffers."""
+
+    def __init__(self, stream, bufsize=60, **kwargs):
+        super().__init__(stream, bufsize=bufsize, **kwargs)
+        capacity = self.times.capacity
+        self.data = SharedRing(capacity, n_channels=len(self.ch_names))
+        self.times = SharedRing(capacity)
+
+    def spec(self):
+        return {"fs": self.fs, "ch_names": self.ch_names, "ch_types": self.ch_types,
+                "data": self.data.spec(), "times": self.times.spec()}
+
+    def close(self):
+        """Free the shared memory, after ``stop`` and after the workers are gone."""
+        self.data.close()
+        self.times.close()
+
+
+class SharedSource:
+    """Read-only view of a ``SharedAcquisition`` from a worker process."""
+
+    def __init__(self, spec):
+        self.fs = spec["fs"]
+        self.ch_names = spec["ch_names"]
+        self.ch_types = spec["ch_types"]
+        self.data = SharedRing.attach(spec["data"])
+        self.times = SharedRing.attach(spec["times"])
+
+    _rows = staticmethod(AcquisitionService._rows)
+
+    @property
+    def cursor(self):
+        return self.times.total
+
+    def get_window(self, winsize=None, picks=None):
+        total = self.times.total  # the data ring is never behind the times ring
+        n = None if winsize is None else int(winsize * self.fs)
+        return self.data.last(n, total)[self._rows(picks)], self.times.last(n, total)
+
+    def since(self, cursor, picks=None):
+        total = self.times.total
+        return self.data.since(cursor, total)[self._rows(picks)], self.times.since(cursor, total), total
+
+    def close(self):
+        self.data.close()
+        self.times.close()
+
+
+def _worker_main(spec, jobs, results):
+    """Worker process: build tasks, step them, post the results."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl+C is handled by the parent
+    source = SharedSource(spec)
+    tasks = {}
+    while True:
+        msg = jobs.get()
+        if msg is None:
+            break
+        op, key, args, kwargs = msg
+        if op == "remove":
+            tasks.pop(key, None)
+            continue
+        t0 = time.perf_counter()
+        try:
+            if op == "add":
+                tasks[key] = args[0](source, *args[1:], **kwargs)
+                continue
+            result, error = tasks[key].step(*args, **kwargs), None
+        except Exception as e:
+            result, error = None, f"{type(e).__name__}: {e}"
+        results.put((key, result, error, time.perf_counter() - t0))
+    source.close()
+
+
+class ProcessBackend:
+    """Runs tasks on worker processes attached to a ``SharedAcquisition``.
+
+    ``add(key, factory, *args)`` builds ``factory(source, *args)`` in one of
+    the workers (``factory`` must be importable, e.g. ``feedback.HeartPlot``);
+    ``submit(key, ...)`` calls its ``step(...)`` there, unless the previous
+    step of ``key`` is still pending (counted in ``coalesced``). Results and
+    errors are passed to ``on_result(key, result)`` / ``on_error(key, error)``
+    from the drain thread. ``busy`` sums the workers' step time.
+    """
+
+    def __init__(self, acquisition, workers=2, on_result=None, on_error=None, context="spawn"):
+        self.acquisition = acquisition
+        self.spec = acquisition.spec()
+        self.on_result = on_result or (lambda key, result: None)
+        self.on_error = on_error or (lambda key, error: logging.debug("Task %s failed: %s", key, error))
+        self.ctx = mp.get_context(context)
+        self.results = self.ctx.Queue()
+        self.n_workers = workers
+        self.workers = [None] * workers  # (process, job queue)
+        self.tasks = {}       # key -> (worker index, factory, args, kwargs)
+        self.pending = set()  # keys with a step in flight
+        self.coalesced = 0
+        self.busy = 0.0
+        self.restarts = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    # ---------------------------- lifecycle --------------------------
+    def start(self):
+        for i in range(self.n_workers):
+            self._spawn(i)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._drain, name="dsp-results", daemon=True)
+        self._thread.start()
+        return self
+
+    def _spawn(self, i):
+        jobs = self.ctx.Queue()
+        proc = self.ctx.Process(target=_worker_main, args=(self.spec, jobs, self.results),
+                                name=f"dsp-{i}", daemon=True)
+        proc.start()
+        self.workers[i] = (proc, jobs)
+
+    def stop(self, timeout=2):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+        self._thread = None
+        for proc, jobs in filter(None, self.workers):
+            if proc.is_alive():
+                jobs.put(None)
+        for proc, jobs in filter(None, self.workers):
+            proc.join(timeout)
+            if proc.is_alive():
+                proc.terminate()
+                proc.join(timeout)
+            jobs.close()
+        self.workers = [None] * self.n_workers
+        self.results.close()
+
+    # ---------------------------- tasks ------------------------------
+    def add(self, key, factory, *args, **kwargs):
+        with self._lock:
+            if key in self.tasks:
+                self._send(self.tasks[key][0], ("remove", key, (), {}))
+            # the least loaded worker
+            load = [sum(1 for w, *_ in self.tasks.values() if w == i) for i in range(self.n_workers)]
+            i = load.index(min(load))
+            self.tasks[key] = (i, factory, args, kwargs)
+            self.pending.discard(key)
+            self._send(i, ("add", key, (factory,) + args, kwargs))
+
+    def remove(self, key):
+        with self._lock:
+            task = self.tasks.pop(key, None)
+            self.pending.discard(key)
+            if task is not None:
+                self._send(task[0], ("remove", key, (), {}))
+
+    def submit(self, key, *args, **kwargs):
+        """Step ``key`` with these arguments; False when its previous step is pending."""
+        with self._lock:
+            if key not in self.tasks:
+                raise KeyError(key)
+            if key in self.pending:
+                self.coalesced += 1
+                return False
+            self.pending.add(key)
+            self._send(self.tasks[key][0], ("step", key, args, kwargs))
+        return True
+
+    def _send(self, i, msg):
+        if self.workers[i] is not None:
+            self.workers[i][1].put(msg)
+
+    # ---------------------------- results ----------------------------
+    def _drain(self):
+        next_check = time.monotonic()
+        while not self._stop.is_set():
+            # on a timer: results of the other workers must not hide a crashed one
+            if time.monotonic() >= next_check:
+                self._check_workers()
+                next_check = time.monotonic() + CHECK_INTERVAL
+            try:
+                key, result, error, busy = self.results.get(timeout=CHECK_INTERVAL)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):  # queue closed during shutdown
+                break
+            self.busy += busy
+            with self._lock:
+                self.pending.discard(key)
+            if error is None:
+                self.on_result(key, result)
+            else:
+                self.on_error(key, error)
+
+    def _check_workers(self):
+        """Restart crashed workers and rebuild their tasks (their state starts over)."""
+        for i, worker in enumerate(self.workers):
+            if worker is None or worker[0].is_alive() or self._stop.is_set():
+                continue
+            logging.warning("DSP worker %d exited with code %s, restarting", i, worker[0].exitcode)
+            worker[1].close()
+            with self._lock:
+                self._spawn(i)
+                self.restarts += 1
+                for key, (w, factory, args, kwargs) in self.tasks.items():
+                    if w == i:
+                        self.pending.discard(key)
+                        self._send(i, ("add", key, (factory,) + args, kwargs))
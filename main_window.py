@@ -1,6 +1,4 @@
 import sys
-import numpy as np
-from scipy.signal import butter, filtfilt, find_peaks
 from PyQt5.QtWidgets import (
     QDialog, QVBoxLayout, QListWidget, QPushButton,
     QHBoxLayout, QLabel, QMessageBox, QWidget, QApplication, QFileDialog
@@ -9,20 +7,26 @@ from PyQt5.QtWidgets import (
 import logging
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
-from mne_lsl.player import PlayerLSL as Player
 from mne_lsl.stream import StreamLSL as Stream
-from mne_lsl.lsl import resolve_streams
+from mne_lsl.lsl import resolve_streams, local_clock
 from feed_window import FeedWindow
-from funcpack.metrics import compute_heart_params
+from compute_worker import ComputeWorker, ProcessComputeWorker
+from update_scheduler import UpdateScheduler
+from funcpack.feedback import HeartPlot, heart_view, ppg_stage
+from funcpack.pipeline import Pipeline
+from funcpack.acquisition import AcquisitionService
+from funcpack.config import load_config
+from funcpack.player import EDFPlayer
+from funcpack.profiling import LatencyMonitor, make_profiler
+from funcpack.qos import LoadShedder, NORMAL, PLOT_DECIMATED, PLOT_OFF, LABELS_SLOW
 
 import time
 import uuid
 
-def bandpass_filter(sig, fs, low=0.5, high=8.0, order=3):
-    nyq = 0.5 * fs
-    b, a = butter(order, [low / nyq, high / nyq], btype="band")
-    return filtfilt(b, a, sig)
-
+PLOT_FPS = 30      # max plot refresh rate, updates follow the arrival of new samples
+PLOT_WINDOW = 15   # seconds shown in the plot
+# plot/label job rate per QoS level
+QOS_HEART_RATE = {NORMAL: PLOT_FPS, PLOT_DECIMATED: 10, PLOT_OFF: 10, LABELS_SLOW: 2}
 
 class HeartApp(QWidget):
     def __init__(self):
@@ -40,6 +44,7 @@ class HeartApp(QWidget):
         self.connect_button = QPushButton("Connect to Stream")
         self.PPG_button = QPushButton("Open PPG FEED")
         self.EMG_button = QPushButton("Open EMG FEED")
+        self.diagnostics_button = QPushButton("Diagnostics")
         
         self.layout.addWidget(self.start_btn)
         self.layout.addWidget(self.stop_btn)
@@ -47,6 +52,7 @@ class HeartApp(QWidget):
 
         self.layout.addWidget(self.PPG_button)
         self.layout.addWidget(self.EMG_button)
+        self.layout.addWidget(self.diagnostics_button)
         
         # Labels for metrics
         self.hr_label = QLabel("HR: -- bpm")
@@ -68,6 +74,16 @@ class HeartApp(QWidget):
         self.canvas = FigureCanvas(self.fig)
         self.ax = self.fig.add_subplot(111)
         self.layout.addWidget(self.canvas)
+        
+        # persistent artists: each frame only updates their data and blits them
+        self.ax.set_title("PPG Signal")
+        self.ax.set_xlim(-PLOT_WINDOW, 0)
+        self.ax.set_xlabel("Time, s")
+        (self.trace_line,) = self.ax.plot([], [], label="PPG", animated=True)
+        (self.peak_line,) = self.ax.plot([], [], "ro", label="Peaks", animated=True)
+        self.ax.legend(loc="upper left")
+        self.background = None
+        self.canvas.mpl_connect("draw_event", self._on_draw)
 
 
         # Signals ----------------------------------------
@@ -76,11 +92,43 @@ class HeartApp(QWidget):
         self.connect_button.clicked.connect(self.connect_stream)
         self.PPG_button.clicked.connect(self.open_PPG_feed_window)
         self.EMG_button.clicked.connect(self.open_EMG_feed_window)
+        self.diagnostics_button.clicked.connect(self.open_diagnostics_window)
         
         # State variables ------------------------
         self.player = None
         self.stream = None
-        self.timer = None
+        self.heart = None
+        self.acquisition = None
+        self.pipeline = None  # shared filter/feature graph of the thread-worker consumers
+        self.ppg_idx = None
+        
+        # per-tick stage timings, a no-op unless enabled in the config
+        self.profiling_config = load_config()["profiling"]
+        self.profiler = make_profiler(self.profiling_config)
+        # newest LSL timestamp -> rendered feedback, per window
+        self.latency = LatencyMonitor(clock=local_clock)
+        
+        # DSP runs here, the GUI thread only renders the results
+        self.worker = ComputeWorker()
+        self.worker.result_ready.connect(self.on_result)
+        self.worker.start()
+        # optional: the heart pipeline in worker processes reading shared memory
+        self.dsp_config = load_config()["dsp"]
+        self.dsp = None
+        
+        # update slots run when new samples arrive, not on fixed timers
+        self.scheduler = UpdateScheduler(self.profiler, parent=self)
+        
+        # load shedding: plot first, then labels; the game and circles are never shed
+        from PyQt5.QtCore import QTimer
+        qos = load_config()["qos"]
+        self.qos = LoadShedder(high=qos["high"], low=qos["low"], max_lag=qos["max_lag"])
+        self.qos_period = qos["period"]
+        self.qos_due = None
+        self.qos_timer = QTimer(self)
+        self.qos_timer.timeout.connect(self._check_load)
+        if qos["enabled"]:
+            self.qos_timer.start(int(1000 * self.qos_period))
     
     # Открыть окно биологической обратной связи для PPG
     def open_PPG_feed_window(self): 
@@ -93,6 +141,11 @@ class HeartApp(QWidget):
         self.emg_feed_window = FeedWindowEMG(self)
         self.emg_feed_window.exec_()
 
+    def open_diagnostics_window(self):
+        from diagnostics_window import DiagnosticsWindow
+        self.diagnostics_window = DiagnosticsWindow(self)
+        self.diagnostics_window.show()
+
     # Подключиться к LSL потоку
     def connect_stream(self):
         """Let the user pick an LSL stream and connect to it (PyQt5 + mne-lsl)."""
@@ -148,6 +201,7 @@ class HeartApp(QWidget):
             try:
                 # Connect to the chosen stream
                 self.stream = Stream(bufsize=60, name=s.name).connect()
+                self._start_acquisition()
                 QMessageBox.information(
                     self,
                     "Connected",
@@ -160,10 +214,7 @@ class HeartApp(QWidget):
         else:
             logging.info("User cancelled connection.")
             
-        from PyQt5.QtCore import QTimer
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.update_plot)
-        self.timer.start(1000)  # update every 500ms
+        self._start_updates()
         
     # Эмуляция LSL потока из EDF файла    
     def start_stream(self):
@@ -176,79 +227,161 @@ class HeartApp(QWidget):
         #self.player = Player(fname, chunk_size=200).start()
         ppg_stream = uuid.uuid4().hex
 
-        self.player = Player(fname, chunk_size=200, source_id=ppg_stream, name='PPG_Stream').start()
+        # memory-mapped replay, the file is read chunk by chunk
+        player = load_config()["player"]
+        self.player = EDFPlayer(fname, chunk_size=player["chunk_size"], speed=player["speed"],
+                                loop=player["loop"], output="lsl", source_id=ppg_stream,
+                                name='PPG_Stream').start()
+        # latency from the push, the timestamps follow the recording at any speed
+        self.latency.source = self.player.push_time
 
         # connect to stream
         self.stream = Stream(bufsize=60, source_id=ppg_stream, name="PPG_Stream").connect()
         print(self.stream.info)
+        self._start_acquisition()
 
 
-        # update periodically
-        from PyQt5.QtCore import QTimer
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.update_plot)
-        self.timer.start(400)  # update every 500ms
+        # update when new samples arrive
+        self._start_updates()
+
+    def _start_updates(self):
+        # the plot is the first thing to give way to feedback windows
+        self.scheduler.add("heart", self.update_plot, rate=QOS_HEART_RATE[self.qos.level], priority=0)
+
+    def _check_load(self):
+        # a late QoS tick means the GUI thread is saturated
+        now = time.monotonic()
+        lag = max(0.0, now - self.qos_due) if self.qos_due is not None else 0.0
+        self.qos_due = now + self.qos_period
+        busy, coalesced = self.worker.busy, self.worker.coalesced
+        if self.dsp is not None:
+            busy, coalesced = busy + self.dsp.busy, coalesced + self.dsp.coalesced
+        level = self.qos.update(now, busy, lag, coalesced)
+        if level is not None:
+            self.scheduler.set_rate("heart", QOS_HEART_RATE[level])
+
+    # Один фоновый поток читает LSL для всех окон
+    def _start_acquisition(self):
+        self._stop_acquisition()
+        if self.dsp_config["backend"] == "process":
+            from funcpack.shm import SharedAcquisition
+            self.acquisition = SharedAcquisition(self.stream, bufsize=60, profiler=self.profiler).start()
+        else:
+            self.acquisition = AcquisitionService(self.stream, bufsize=60, profiler=self.profiler).start()
+        self.scheduler.attach(self.acquisition)
+        self.pipeline = Pipeline(self.acquisition)
+        picks = self.acquisition.picks(load_config()["ppg"]["channels"])
+        self.ppg_idx = picks[0] if picks else None
+        self.heart = None
+        if self.dsp_config["backend"] == "process":
+            self.dsp = ProcessComputeWorker(self.acquisition, workers=self.dsp_config["workers"], parent=self)
+            self.dsp.result_ready.connect(self.on_result)
+            self.dsp.start()
+            # the feedback windows add their baseline and feature tasks here too,
+            # the GUI process only renders the small result dicts
+            if self.ppg_idx is not None:
+                self.dsp.add("heart", HeartPlot, self.ppg_idx, window=15)
+
+    def _stop_acquisition(self):
+        if self.dsp is not None:  # workers first, they read the shared buffers
+            self.dsp.stop()
+            self.dsp = None
+        if self.acquisition is not None:
+            self.acquisition.stop()
+            if hasattr(self.acquisition, "close"):
+                self.acquisition.close()
 
     # Stop emulation and streaming
     def stop_stream(self):
-        if self.timer:
-            self.timer.stop()
+        self.scheduler.remove("heart")
+        self.scheduler.attach(None)
+        self._stop_acquisition()
         if self.player:
             self.player.stop()
         self.player = None
+        self.latency.source = None
         self.stream = None
-        self.ax.clear()
+        self.acquisition = None
+        self.pipeline = None
+        self.heart = None
+        self.trace_line.set_data([], [])
+        self.peak_line.set_data([], [])
         self.canvas.draw()
 
     def update_plot(self):
-        # get recent 5s of data
-        data, ts = self.stream.get_data(15)  # 20 seconds
-        if data.shape[1] == 0:
-            return
-        
-        ch_list = self.stream.info["ch_names"]        
-        ppg_names = ['EEG PPG', 'PPG']
-        
-        for p in ppg_names:
-            if p in ch_list:
-                ppg_name = p
-                break
-            else:
-                ppg_name = None
-                
-        if not ppg_name:
+        if self.ppg_idx is None:
             raise ValueError("No PPG channel found in stream!")
-        
-        ppg_idx = self.stream.info["ch_names"].index(ppg_name)
-        
-        ppg = data[ppg_idx, :]  # first channel
-        fs = int(self.stream.info["sfreq"])
+        if self.dsp is not None:
+            self.dsp.submit("heart", self.qos.level, self.plot_width)
+        else:
+            # the plot width is Matplotlib state, read here on the GUI thread
+            self.worker.submit("heart", self.compute_heart, self.qos.level, self.plot_width)
 
-        # filter
-        signal = bandpass_filter(ppg, fs)
-        #prominence = 0.5 * np.std(signal)
-        #peaks, _ = find_peaks(signal, distance=int(0.4 * fs), prominence=prominence)
+    def compute_heart(self, level, width):
+        """Runs in the compute worker: feed new samples, return what to render."""
+        if self.heart is None:
+            self.heart = ppg_stage(self.pipeline, self.ppg_idx, 15)
+        # new samples go through every pipeline stage once, whichever consumer pulls first
+        with self.profiler.stage("heart.filter"):
+            tracker = self.pipeline.pull_stage(self.heart)
+        return heart_view(tracker, 15, level, width, self.profiler)
 
-        # compute metrics
-        #if len(peaks) > 2 and max(ts) > 20:
-            
-        params = compute_heart_params(ppg, fs)
-        
-        if params:
-            
+    def on_result(self, key, params):
+        if key != "heart" or not params:
+            return
+        with self.profiler.stage("heart.render"):
+            self._render(params)
+        self.latency.record("plot", params["ts"])
+
+    def _render(self, params):
+        if self.qos.labels_due("heart", time.monotonic()):
             self.hr_label.setText(f"HR: {params['hr']:.1f} bpm")
             self.sdnn_label.setText(f"SDNN: {params['sdnn']:.3f} s")
             self.rmssd_label.setText(f"RMSSD: {params['rmssd']:.3f} s")
             self.rmssd_corrected_label.setText(f"RMSSD Corrected: {params['rmssd_corrected']:.3f} s")
-            peaks = params["peaks"]
-            # plot
-            self.ax.clear()
-            self.ax.plot(ts, signal, label="PPG")
-            self.ax.plot(ts[peaks], signal[peaks], "ro", label="Peaks")
-            self.ax.set_title("PPG Signal")
-            self.ax.legend()
+        if "signal" in params:  # not computed while the plot is shed
+            self.render_plot(params["t"], params["signal"], params["peak_t"], params["peak_y"])
+
+    @property
+    def plot_width(self):
+        return int(self.ax.bbox.width) or 500
+
+    def _on_draw(self, event):
+        # full redraws (resize, new y-limits) refresh the cached background
+        self.background = self.canvas.copy_from_bbox(self.ax.bbox)
+        self._blit()
+
+    def _blit(self):
+        if self.background is None:
+            return
+        self.canvas.restore_region(self.background)
+        self.ax.draw_artist(self.trace_line)
+        self.ax.draw_artist(self.peak_line)
+        self.canvas.blit(self.ax.bbox)
+
+    def render_plot(self, t, signal, peak_t, peak_y):
+        self.trace_line.set_data(t, signal)
+        self.peak_line.set_data(peak_t, peak_y)
+        
+        # full redraw only when the trace leaves the y-limits or shrinks a lot
+        lo, hi = self.ax.get_ylim()
+        ymin, ymax = signal.min(), signal.max()
+        if self.background is None or ymin < lo or ymax > hi or (ymax - ymin) < 0.3 * (hi - lo):
+            margin = 0.1 * (ymax - ymin) or 1.0
+            self.ax.set_ylim(ymin - margin, ymax + margin)
             self.canvas.draw()
+        else:
+            self._blit()
 
+    def closeEvent(self, event):
+        self.stop_stream()
+        self.worker.stop()
+        if self.latency.histograms:
+            logging.info("Sample-to-feedback latency:\n%s", self.latency.report())
+        if self.profiler.enabled and self.profiling_config.get("dump"):
+            path = self.profiler.dump(self.profiling_config["dump"], latency=self.latency.summary())
+            logging.info("Profile written to %s", path)
+        super().closeEvent(event)
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
@@ -0,0 +1,80 @@
+"""AcquisitionService: slow readers and a failing stream."""
+import time
+
+import numpy as np
+
+from funcpack.acquisition import AcquisitionService
+
+FS = 100
+
+
+class Stream:
+    """Minimal ``StreamLSL`` look-alike: ``push`` makes samples available."""
+
+    def __init__(self, n_channels=2):
+        self.info = {"sfreq": FS, "ch_names": [f"ch{i}" for i in range(n_channels)]}
+        self.n_channels = n_channels
+        self.total = 0
+        self.n_new_samples = 0
+        self.fail = 0  # number of get_data calls that raise
+
+    def get_channel_types(self):
+        return ["misc"] * self.n_channels
+
+    def push(self, n):
+        self.total += n
+        self.n_new_samples += n
+
+    def get_data(self, winsize):
+        if self.fail:
+            self.fail -= 1
+            raise ConnectionError("stream lost")
+        n = int(round(winsize * FS))
+        self.n_new_samples = 0
+        ts = np.arange(self.total - n, self.total) / FS
+        return np.tile(ts, (self.n_channels, 1)), ts
+
+
+def test_slow_reader_gets_the_buffer_and_the_gap_is_counted(caplog):
+    stream = Stream()
+    acquisition = AcquisitionService(stream, bufsize=1)
+    stream.push(60)
+    acquisition.poll()
+    data, ts, cursor = acquisition.since(0)
+    assert ts.size == 60 and acquisition.dropped == 0
+
+    stream.push(250)
+    acquisition.poll()
+    data, ts, cursor = acquisition.since(cursor)
+    assert cursor == 310
+    assert ts.size == 100
+    np.testing.assert_array_equal(ts, np.arange(210, 310) / FS)
+    assert acquisition.dropped == 150
+    assert "150 samples" in caplog.text
+
+
+def test_poll_errors_are_kept_and_retried():
+    stream = Stream()
+    acquisition = AcquisitionService(stream, interval=0.001, max_backoff=0.01)
+    stream.fail = 3
+    stream.push(10)
+    acquisition.start()
+    try:
+        assert acquisition.wait(10, timeout=2)
+        assert acquisition.alive
+        assert acquisition.failures == 3
+        deadline = time.monotonic() + 1
+        while acquisition.error is not None and time.monotonic() < deadline:
+            time.sleep(0.001)
+        assert acquisition.error is None  # cleared once a poll succeeds again
+
+        stream.fail = 10 ** 6
+        stream.push(5)
+        deadline = time.monotonic() + 1
+        while acquisition.error is None and time.monotonic() < deadline:
+            time.sleep(0.001)
+        assert isinstance(acquisition.error, ConnectionError)
+        assert acquisition.alive
+    finally:
+        acquisition.stop()
+    assert not acquisition.alive
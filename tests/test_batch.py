@@ -0,0 +1,66 @@
+"""Batch runner: cache keys per output and what a parameter change recomputes."""
+import copy
+import os
+
+import numpy as np
+
+from funcpack import batch
+from funcpack.config import DEFAULT_CONFIG
+
+DATASET = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "dataset")
+FNAME = os.path.join(DATASET, "NeoRec_2025-11-04_16-47-32.edf")
+
+
+def keys(config, version="v1", digest="abc"):
+    params = batch.output_params(config)
+    return {output: batch.cache_key(digest, output, p, version) for output, p in params.items()}
+
+
+def test_a_parameter_changes_only_its_output_key():
+    base = keys(DEFAULT_CONFIG)
+    assert keys(copy.deepcopy(DEFAULT_CONFIG)) == base
+
+    for section, key, value in [("ppg", "prominence_factor", 0.5), ("ppg", "filter_order", 4),
+                                ("ppg", "baseline_duration", 30), ("emg", "window_size", 0.2),
+                                ("emg", "filter_order", 4), ("emg", "channels", {"names": ["LEX"]})]:
+        config = copy.deepcopy(DEFAULT_CONFIG)
+        config[section][key] = value
+        changed = keys(config)
+        other = "emg" if section == "ppg" else "ppg"
+        assert changed[section] != base[section], key
+        assert changed[other] == base[other], key
+
+    # the file contents and the code are part of every key
+    assert all(a != b for a, b in zip(base.values(), keys(DEFAULT_CONFIG, digest="abd").values()))
+    assert all(a != b for a, b in zip(base.values(), keys(DEFAULT_CONFIG, version="v2").values()))
+
+
+def test_code_version_covers_the_offline_engine():
+    assert len(batch.code_version()) == 16
+    assert batch.code_version() == batch.code_version()
+    assert {"offline.py", "metrics.py", "filters.py", "columnar.py", "edf.py"} <= set(batch.CODE_FILES)
+
+
+def test_only_the_changed_output_is_recomputed(tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    version = batch.code_version()
+    params = batch.output_params(DEFAULT_CONFIG)
+
+    first = batch.process_file(FNAME, params, version, cache_dir)
+    assert first["cached"] == {"ppg": False, "emg": False}
+    assert first["results"]["ppg"]["t"].size > 0
+    assert first["results"]["emg"]["channels"] == ["LEX"]
+
+    again = batch.process_file(FNAME, params, version, cache_dir)
+    assert again["cached"] == {"ppg": True, "emg": True}
+    np.testing.assert_array_equal(again["results"]["ppg"]["hr"], first["results"]["ppg"]["hr"])
+    np.testing.assert_array_equal(again["results"]["emg"]["zscore"], first["results"]["emg"]["zscore"])
+
+    config = copy.deepcopy(DEFAULT_CONFIG)
+    config["emg"]["filter_order"] = 4
+    changed = batch.process_file(FNAME, batch.output_params(config), version, cache_dir)
+    assert changed["cached"] == {"ppg": True, "emg": False}
+    assert not np.allclose(changed["results"]["emg"]["value"], first["results"]["emg"]["value"])
+
+    # new code invalidates everything
+    assert batch.process_file(FNAME, params, "other", cache_dir)["cached"] == {"ppg": False, "emg": False}
@@ -0,0 +1,46 @@
+"""Columnar cache: conversion against mne and cache locations."""
+import glob
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+from funcpack import columnar
+
+DATASET = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "dataset")
+FNAME = os.path.join(DATASET, "type_1_20s.edf")
+
+
+@pytest.mark.parametrize("fname", sorted(glob.glob(os.path.join(DATASET, "*.edf"))),
+                         ids=os.path.basename)
+def test_matches_mne(fname, tmp_path):
+    mne = pytest.importorskip("mne")
+    raw = mne.io.read_raw_edf(fname, preload=True, verbose="ERROR")
+
+    path = columnar.convert(fname, str(tmp_path / "rec.col"))
+    assert columnar.is_current(path, fname)
+    with columnar.ColumnarReader(path) as reader:
+        assert reader.ch_names == raw.ch_names
+        assert reader.fs == raw.info["sfreq"]
+        np.testing.assert_allclose(reader.read(), raw.get_data(), rtol=0, atol=1e-12)
+        # a time range of one channel is a slice of the whole read
+        np.testing.assert_array_equal(reader.read(100, 600, picks=[-1]), reader.read()[-1:, 100:600])
+
+
+def test_same_name_in_two_directories(tmp_path):
+    first = tmp_path / "a" / "rec.edf"
+    second = tmp_path / "b" / "rec.edf"
+    for fname in (first, second):
+        fname.parent.mkdir()
+        shutil.copy(FNAME, fname)
+
+    cache_dir = str(tmp_path / "cache")
+    assert columnar.cache_path(str(first), cache_dir) != columnar.cache_path(str(second), cache_dir)
+    assert columnar.cache_path(str(first), cache_dir) == columnar.cache_path(str(first), cache_dir)
+
+    columnar.open_recording(str(first), cache_dir, create=True).close()
+    # the other file's conversion is not served for this one
+    assert not columnar.is_current(columnar.cache_path(str(second), cache_dir), str(second))
+    with columnar.open_recording(str(second), cache_dir) as reader:
+        assert not isinstance(reader, columnar.ColumnarReader)
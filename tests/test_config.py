@@ -0,0 +1,72 @@
+"""Configuration: defaults, overrides and channel selection; the multichannel EMG engine."""
+import json
+
+import numpy as np
+import pytest
+
+from funcpack.config import CONFIG_ENV, DEFAULT_CONFIG, load_config, select_channels
+from funcpack.metrics import EMGEngine
+
+FS = 1000
+NAMES = ["PPG", "LFL", "RFL", "EMG1", "EMG2", "LEX", "REX"]
+
+
+def test_defaults_without_a_file(tmp_path, monkeypatch):
+    monkeypatch.delenv(CONFIG_ENV, raising=False)
+    config = load_config(str(tmp_path / "missing.json"))
+    assert config == DEFAULT_CONFIG
+    # a copy: callers may change it
+    config["emg"]["window_size"] = 1.0
+    assert DEFAULT_CONFIG["emg"]["window_size"] == 0.3
+
+
+def test_overrides_are_merged(tmp_path, monkeypatch):
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps({"emg": {"window_size": 0.5, "channels": {"pattern": "^EMG\\d+$"}},
+                                "dsp": {"backend": "process"}}))
+    config = load_config(str(path))
+    assert config["emg"]["window_size"] == 0.5
+    # a channel selection replaces the default one, other sections are merged key by key
+    assert config["emg"]["channels"] == {"pattern": "^EMG\\d+$"}
+    assert select_channels(NAMES, config["emg"]["channels"]) == [3, 4]
+    assert config["emg"]["baseline_duration"] == DEFAULT_CONFIG["emg"]["baseline_duration"]
+    assert config["dsp"] == {"backend": "process", "workers": DEFAULT_CONFIG["dsp"]["workers"]}
+    assert config["ppg"] == DEFAULT_CONFIG["ppg"]
+
+    # the environment variable names the file when no path is given
+    monkeypatch.setenv(CONFIG_ENV, str(path))
+    assert load_config() == config
+
+
+def test_select_channels():
+    assert select_channels(NAMES, DEFAULT_CONFIG["emg"]["channels"]) == [1, 2, 5, 6]
+    assert select_channels(NAMES, DEFAULT_CONFIG["ppg"]["channels"]) == [0]
+    # listed order, missing names skipped
+    assert select_channels(NAMES, {"names": ["REX", "XYZ", "LFL"]}) == [6, 1]
+    assert select_channels(NAMES, {"pattern": "^EMG\\d+$"}) == [3, 4]
+    assert select_channels(NAMES, {"pattern": "EX$", "first": True}) == [5]
+
+    types = ["misc", "emg", "emg", "emg", "emg", "eeg", "eeg"]
+    assert select_channels(NAMES, {"types": ["emg"]}, types) == [1, 2, 3, 4]
+    assert select_channels(NAMES, {"types": ["emg"], "pattern": "^EMG"}, types) == [3, 4]
+    with pytest.raises(ValueError):
+        select_channels(NAMES, {"types": ["emg"]})
+
+
+def test_engine_channels_are_independent():
+    """Every row of the multichannel engine equals a single-channel engine on it."""
+    rng = np.random.default_rng(0)
+    sig = rng.standard_normal((4, 30 * FS)) * np.array([[1], [2], [0.5], [4]])
+    names = ["LFL", "RFL", "LEX", "REX"]
+    engine = EMGEngine(FS, names)
+    engine.set_baseline(sig[:, :20 * FS])
+    singles = [EMGEngine(FS, [name]) for name in names]
+    for k, single in enumerate(singles):
+        single.set_baseline(sig[k:k + 1, :20 * FS])
+
+    for start in range(20 * FS, sig.shape[-1], 100):
+        engine.update(sig[:, start:start + 100])
+        values = engine.as_dict()
+        for k, single in enumerate(singles):
+            single.update(sig[k:k + 1, start:start + 100])
+            assert values[names[k]] == pytest.approx(single.zscores()[0], rel=1e-12)
@@ -0,0 +1,102 @@
+"""EMG baseline and envelope: streaming against the batch paths."""
+import numpy as np
+import pytest
+
+from funcpack.filters import FilterBank
+from funcpack.metrics import EMGBaselineAccumulator, EMGEnvelope, get_baseline_EMG, rectified_sum
+from funcpack.offline import emg_envelope
+
+FS = 250
+
+
+def feed(accumulator, sig, seed=0):
+    """Feed ``sig`` in random chunk sizes, as LSL delivers it."""
+    rng = np.random.default_rng(seed)
+    pos = 0
+    while pos < sig.shape[-1]:
+        n = int(rng.integers(1, 120))
+        accumulator.update(sig[:, pos:pos + n])
+        pos += n
+
+
+@pytest.mark.parametrize("duration, chunk_size", [
+    (20, 0.3),    # 5000 samples = 66 chunks of 75 + 50
+    (12, 0.25),   # 3000 samples = 48 chunks of 62 + 24
+    (6, 0.2),     # 1500 samples = 30 chunks of 50, a whole number
+])
+def test_matches_get_baseline_emg(duration, chunk_size):
+    rng = np.random.default_rng(1)
+    sig = rng.standard_normal((3, int((duration + 5) * FS))) * np.array([[1.0], [5.0], [0.2]])
+    accumulator = EMGBaselineAccumulator(FS, 3, duration=duration, chunk_size=chunk_size)
+    feed(accumulator, sig)
+    assert accumulator.done
+
+    n = int(duration * FS)
+    batch = get_baseline_EMG(sig[:, :n], FS, duration=duration, chunk_size=chunk_size, causal=True)
+    params = accumulator.params()
+    np.testing.assert_allclose(params["mean_emg"], batch["mean_emg"], rtol=1e-9)
+    np.testing.assert_allclose(params["std_emg"], batch["std_emg"], rtol=1e-9)
+
+
+def test_progress_counts_chunks():
+    accumulator = EMGBaselineAccumulator(FS, 1, duration=20, chunk_size=0.3)
+    accumulator.update(np.zeros((1, 2500)))
+    assert 0 < accumulator.progress < 1 and not accumulator.done
+    accumulator.update(np.zeros((1, 2500)))
+    assert accumulator.progress == 1.0 and accumulator.done
+
+
+@pytest.mark.parametrize("chunk_size", [0.3, 0.2])
+def test_envelope_equals_the_baseline_chunks(chunk_size):
+    """At every chunk boundary the envelope is that chunk's baseline value."""
+    duration = 6
+    rng = np.random.default_rng(2)
+    sig = rng.standard_normal((2, duration * FS)) * np.array([[1.0], [3.0]]) + np.array([[0.5], [-2.0]])
+    envelope = EMGEnvelope(FS, chunk_size, n_channels=2)
+    values = []
+    for start in range(0, sig.shape[-1], envelope.window):
+        envelope.update(sig[:, start:start + envelope.window])
+        values.append(envelope.value)
+    values = np.array(values).T
+
+    # one explicit chain: causal bandpass, remove each chunk's mean, rectify, sum
+    filtered = FilterBank.emg(FS).process(sig).reshape(2, -1, envelope.window)
+    chunks = np.abs(filtered - filtered.mean(axis=-1, keepdims=True)).sum(axis=-1)
+    np.testing.assert_allclose(values, chunks, rtol=1e-12)
+
+    baseline = get_baseline_EMG(sig, FS, duration=duration, chunk_size=chunk_size, causal=True)
+    np.testing.assert_allclose(values.mean(axis=-1), baseline["mean_emg"], rtol=1e-12)
+    np.testing.assert_allclose(values.std(axis=-1), baseline["std_emg"], rtol=1e-12)
+    accumulator = EMGBaselineAccumulator(FS, 2, duration=duration, chunk_size=chunk_size)
+    feed(accumulator, sig)
+    np.testing.assert_allclose(accumulator.params()["mean_emg"], baseline["mean_emg"], rtol=1e-12)
+
+
+def test_filter_order_reaches_every_stage():
+    rng = np.random.default_rng(4)
+    sig = rng.standard_normal((1, 6 * FS))
+    envelope = EMGEnvelope(FS, 0.3, n_channels=1, order=5)
+    envelope.update(sig)
+    assert envelope.filter.order == 5
+    filtered = FilterBank.emg(FS, 5).process(sig)[:, -envelope.window:]
+    np.testing.assert_allclose(envelope.value, rectified_sum(filtered), rtol=1e-12)
+    accumulator = EMGBaselineAccumulator(FS, 1, duration=6, chunk_size=0.3, order=5)
+    accumulator.update(sig)
+    batch = get_baseline_EMG(sig, FS, duration=6, chunk_size=0.3, causal=True, order=5)
+    np.testing.assert_allclose(accumulator.params()["mean_emg"], batch["mean_emg"], rtol=1e-9)
+    np.testing.assert_allclose(emg_envelope(sig, FS, 0.3, order=5)[:, -1], envelope.value, rtol=1e-9)
+
+
+def test_offline_envelope_matches_streaming():
+    rng = np.random.default_rng(3)
+    sig = rng.standard_normal((2, 5 * FS))
+    envelope = EMGEnvelope(FS, 0.3, n_channels=2)
+    values = []
+    for start in range(0, sig.shape[-1], 25):
+        envelope.update(sig[:, start:start + 25])
+        values.append(envelope.value)
+    offline = emg_envelope(sig, FS, 0.3)[:, 24::25]
+    np.testing.assert_allclose(np.array(values).T, offline, rtol=1e-9)
+    # evaluated at the hops only, blockwise
+    np.testing.assert_allclose(emg_envelope(sig, FS, 0.3, idx=np.arange(24, sig.shape[-1], 25), block=7),
+                               offline, rtol=1e-12)
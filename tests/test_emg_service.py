@@ -0,0 +1,96 @@
+"""EMGFeatureService: one z-score per chunk, served to every reader from the cache."""
+import numpy as np
+import pytest
+
+from funcpack.acquisition import AcquisitionService
+from funcpack.emg_service import EMGFeatureService
+from funcpack.feedback import EMGFeedback
+from funcpack.pipeline import Pipeline
+from funcpack.player import LocalStream
+
+FS = 250
+CHUNK = 50
+CHANNELS = ["LEX", "REX"]
+
+
+class Source:
+    def __init__(self):
+        self.stream = LocalStream(["PPG"] + CHANNELS, FS, backpressure=False)
+        self.acquisition = AcquisitionService(self.stream, bufsize=60)
+        self.pos = 0
+        self.rng = np.random.default_rng(0)
+
+    def push(self, n=CHUNK):
+        ts = (self.pos + np.arange(n)) / FS
+        data = self.rng.standard_normal((3, n))
+        self.stream.push(data, ts)
+        self.acquisition.poll()
+        self.pos += n
+        return data, ts
+
+
+@pytest.fixture
+def logic():
+    logic = EMGFeedback(FS, CHANNELS, baseline_duration=1)
+    rng = np.random.default_rng(1)
+    result = {}
+    for lo in range(0, 2 * FS, CHUNK):
+        result = logic.baseline_step(rng.standard_normal((2, CHUNK)), (lo + np.arange(CHUNK)) / FS)
+    assert "params" in result
+    return logic
+
+
+def test_update_once_per_chunk(logic):
+    source = Source()
+    pipeline = Pipeline(source.acquisition)
+    service = EMGFeatureService(pipeline, logic, [1, 2])
+    other = EMGFeatureService(pipeline, logic, [1, 2])
+    assert other.key == service.key
+    seen = []
+    service.subscribe(seen.append)
+
+    for _ in range(5):
+        _, ts = source.push()
+        latest = service.update()
+        assert latest is not None and latest["ts"] == ts[-1]
+        assert service.update() is None  # same chunk: cached, no callback
+        # the second service reads the cached feature value
+        assert other.update() == latest
+    assert service.updates == len(seen) == 5
+    assert pipeline.stats()["features"][str(service.key)]["computed"] == 5
+    assert set(seen[-1]) == {"ts", *CHANNELS}
+
+    service.unsubscribe(seen.append)
+    source.push()
+    service.update()
+    assert len(seen) == 5
+
+
+def test_history_keeps_the_last_values(logic):
+    service = EMGFeatureService(None, logic, [1, 2], history=4)
+    assert service.latest() == {"LEX": 0.0, "REX": 0.0, "ts": None}
+    for k in range(6):
+        assert service.push([k, -k], k * 0.2)["LEX"] == k
+    assert service.push([9, 9], 1.0) is None  # same ts
+    assert service.push(None, 1.2) is None
+    ts, values = service.history()
+    np.testing.assert_allclose(ts, [0.4, 0.6, 0.8, 1.0])
+    np.testing.assert_array_equal(values, [[2, 3, 4, 5], [-2, -3, -4, -5]])
+    ts, values = service.history(0.5)
+    np.testing.assert_allclose(ts, [0.6, 0.8, 1.0])
+    assert values.shape == (2, 3)
+
+
+def test_close_releases_the_pipeline(logic):
+    source = Source()
+    pipeline = Pipeline(source.acquisition)
+    first = EMGFeatureService(pipeline, logic, [1, 2])
+    second = EMGFeatureService(pipeline, logic, [1, 2])
+    source.push()
+    latest = first.update()
+    first.close()
+    assert first.key is None and first.latest() == latest
+    assert second.key in pipeline.features
+    second.close()
+    assert not pipeline.features and not pipeline.stages
+    first.close()  # twice is fine
@@ -0,0 +1,141 @@
+"""Feedback tasks of the process backend against the in-process feedback logic."""
+import time
+
+import numpy as np
+import pytest
+
+from funcpack.acquisition import AcquisitionService
+from funcpack.feedback import (EMGBaselineTask, EMGFeatureTask, EMGFeedback, PPGBaselineTask, PPGFeedback,
+                               PPGFeedbackTask)
+from funcpack.player import LocalStream
+
+FS = 250
+CHUNK = 50  # samples per tick
+
+
+def synthetic_ppg(seconds, seed=0):
+    rng = np.random.default_rng(seed)
+    beats = np.cumsum(rng.uniform(0.65, 1.1, 2 * seconds)) - 0.4
+    t = np.arange(seconds * FS) / FS
+    sig = np.exp(-0.5 * ((t[:, np.newaxis] - beats[beats < seconds]) / 0.08) ** 2).sum(axis=1)
+    return sig + 0.01 * rng.standard_normal(t.size)
+
+
+def synthetic_emg(seconds, n_channels=3, seed=0):
+    rng = np.random.default_rng(seed)
+    n = seconds * FS
+    bursts = 1 + 4 * (np.sin(2 * np.pi * 0.2 * np.arange(n) / FS) > 0.7)
+    return rng.standard_normal((n_channels, n)) * bursts
+
+
+class Feed:
+    """An ``AcquisitionService`` polled by hand: ``tick()`` makes the next chunk available."""
+
+    def __init__(self, data):
+        self.data = np.atleast_2d(data)
+        self.stream = LocalStream([f"ch{i}" for i in range(self.data.shape[0])], FS, backpressure=False)
+        self.acquisition = AcquisitionService(self.stream, bufsize=60)
+        self.pos = 0
+
+    def tick(self):
+        """(chunk, ts) pushed, None at the end of the data."""
+        if self.pos >= self.data.shape[-1]:
+            return None
+        chunk = self.data[:, self.pos:self.pos + CHUNK]
+        ts = (self.pos + np.arange(chunk.shape[-1])) / FS
+        self.stream.push(chunk, ts)
+        self.acquisition.poll()
+        self.pos += chunk.shape[-1]
+        return chunk, ts
+
+
+def step(fn):
+    """Result of one step, or the type of the error it raised (not enough beats yet)."""
+    try:
+        return fn()
+    except ValueError as e:
+        return type(e)
+
+
+def test_ppg_tasks_match_ppg_feedback():
+    feed = Feed(synthetic_ppg(60))
+    acquisition = feed.acquisition
+    task = PPGBaselineTask(acquisition, 0, baseline_duration=20)
+    logic = PPGFeedback(FS, baseline_duration=20, window=8, lookback=5)
+    cursor = acquisition.cursor
+    while feed.tick():
+        ppg, ts, cursor = acquisition.since(cursor, picks=0)
+        expected, result = logic.baseline_step(ppg, ts), task.step()
+        assert result["progress"] == expected["progress"]
+        if "params" in expected:
+            break
+    assert "params" in result
+    # scalars only, the peak indices stay in the worker
+    assert result["params"] == {k: v for k, v in expected["params"].items() if k != "peaks"}
+
+    training = PPGFeedbackTask(acquisition, 0, result["params"], window=8, lookback=5)
+    cursor = logic.start_training(acquisition.cursor)
+    values = 0
+    while feed.tick():
+        ppg, ts, cursor = acquisition.since(cursor, picks=0)
+        expected, result = step(lambda: logic.feedback_step(ppg, ts)), step(training.step)
+        assert result == expected
+        values += isinstance(result, dict)
+    assert values > 100
+    assert training.step() is None  # nothing new
+
+
+def test_emg_tasks_match_emg_feedback():
+    feed = Feed(synthetic_emg(40))
+    acquisition = feed.acquisition
+    picks, channels = [0, 2], ["ch0", "ch2"]
+    task = EMGBaselineTask(acquisition, picks, channels, baseline_duration=10, order=4)
+    logic = EMGFeedback(FS, channels, baseline_duration=10, lookback=1, order=4)
+    cursor = acquisition.cursor
+    while feed.tick():
+        sig, ts, cursor = acquisition.since(cursor, picks=picks)
+        expected, result = logic.baseline_step(sig, ts), task.step()
+        assert result["progress"] == expected["progress"]
+        if "params" in expected:
+            break
+    for key in ("mean_emg", "std_emg"):
+        np.testing.assert_array_equal(result["params"][key], expected["params"][key])
+
+    features = EMGFeatureTask(acquisition, picks, channels, result["params"], lookback=1, order=4)
+    cursor = logic.start_training(acquisition.cursor)
+    while feed.tick():
+        sig, ts, cursor = acquisition.since(cursor, picks=picks)
+        expected, result = logic.feedback_step(sig, ts), features.step()
+        # one value per channel, whatever the sample rate
+        assert result["zscores"].shape == (2,) and result["ts"] == expected["ts"]
+        np.testing.assert_allclose(100 * result["zscores"], [expected[ch] for ch in channels], rtol=1e-12)
+
+
+def test_process_backend_runs_the_feedback_tasks():
+    from funcpack.shm import ProcessBackend, SharedAcquisition
+
+    data = synthetic_emg(20)
+    stream = LocalStream(["ch0", "ch1", "ch2"], FS, backpressure=False)
+    acquisition = SharedAcquisition(stream, bufsize=60)
+    results = []
+    backend = ProcessBackend(acquisition, workers=1, on_result=lambda key, result: results.append((key, result)))
+    backend.start()
+    try:
+        backend.add("emg_baseline", EMGBaselineTask, [0, 1, 2], ["ch0", "ch1", "ch2"], baseline_duration=5)
+        deadline = time.monotonic() + 60
+        # the task reads from when it was built: wait for its first (empty) step
+        while time.monotonic() < deadline and not results:
+            backend.submit("emg_baseline")
+            time.sleep(0.05)
+        assert results[0] == ("emg_baseline", {"progress": 0.0})
+        stream.push(data, np.arange(data.shape[-1]) / FS)
+        acquisition.poll()
+        while time.monotonic() < deadline and "params" not in results[-1][1]:
+            backend.submit("emg_baseline")
+            time.sleep(0.05)
+    finally:
+        backend.stop()
+        acquisition.close()
+    key, result = results[-1]
+    assert key == "emg_baseline" and result["progress"] == 1.0
+    assert result["params"]["mean_emg"].shape == (3,)
@@ -0,0 +1,83 @@
+"""Metrics server sessions on a local stream, with in-memory outlets."""
+import os
+import time
+
+import numpy as np
+import pytest
+
+from funcpack.config import load_config
+from funcpack.edf import load
+from funcpack.feedback import EMGFeedback
+from funcpack.metrics import PPGBeatTracker
+from funcpack.metrics_server import PPG_METRICS, MemoryOutput, MetricsSession
+from funcpack.player import EDFPlayer, LocalStream
+
+DATASET = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "dataset")
+FNAME = os.path.join(DATASET, "NeoRec_2025-11-04_16-47-32.edf")
+CHUNK = 62  # samples per step, about 4 Hz at 250 Hz
+
+
+def test_published_metrics_match_the_pipeline():
+    data, ch_names, fs = load(FNAME)
+    fs = int(fs)
+    emg = load_config()["emg"]
+    stream = LocalStream(ch_names, fs, backpressure=False)
+    session = MetricsSession(stream, "rec", output=MemoryOutput)
+    assert set(session.outputs) == {"ppg", "emg"}
+    assert session.outputs["ppg"].ch_names == list(PPG_METRICS)
+    assert session.outputs["emg"].ch_names == ["LEX"]
+
+    tracker = PPGBeatTracker(fs, window=8)
+    logic = EMGFeedback(fs, ["LEX"], window_size=emg["window_size"], baseline_duration=emg["baseline_duration"],
+                        order=emg["filter_order"])
+    ppg_expected, emg_expected, ready = [], [], False
+    for lo in range(0, data.shape[-1], CHUNK):
+        chunk, ts = data[:, lo:lo + CHUNK], np.arange(lo, min(lo + CHUNK, data.shape[-1])) / fs
+        stream.push(chunk, ts)
+        session.acquisition.poll()
+        session.step()
+
+        tracker.update(chunk[0], ts)
+        params = tracker.heart_params(8)
+        if params is not None:
+            ppg_expected.append((ts[-1], [params[k] for k in PPG_METRICS]))
+        if ready:
+            result = logic.feedback_step(chunk[1:], ts)
+            emg_expected.append((result.pop("ts"), [result["LEX"]]))
+        else:
+            ready = "params" in logic.baseline_step(chunk[1:], ts)
+
+    for key, expected in (("ppg", ppg_expected), ("emg", emg_expected)):
+        samples = session.outputs[key].samples
+        assert session.published[key] == len(samples) == len(expected) > 50, key
+        assert [ts for ts, _ in samples] == [ts for ts, _ in expected]
+        np.testing.assert_allclose([v for _, v in samples], [v for _, v in expected], rtol=1e-12)
+
+
+def test_session_thread_on_a_replay():
+    player = EDFPlayer(FNAME, speed=20, loop=False, output="local")
+    session = MetricsSession(player.stream, "rec", rate=10, output=MemoryOutput)
+    session.start()
+    player.start()
+    try:
+        assert player.finished.wait(30)
+        time.sleep(0.3)  # the last tick
+    finally:
+        player.stop()
+        session.stop()
+
+    for key in ("ppg", "emg"):
+        ts = [t for t, _ in session.outputs[key].samples]
+        assert len(ts) > 10, key
+        # every sample carries the newest input timestamp behind it
+        assert ts == sorted(ts) and ts[-1] - ts[0] <= player.reader.n_times / player.fs
+    hr = np.array([v[0] for _, v in session.outputs["ppg"].samples])
+    assert np.all((hr > 30) & (hr < 200))
+
+
+@pytest.mark.parametrize("output", ["ppg", "emg"])
+def test_missing_channels_have_no_outlet(output):
+    names = ["PPG"] if output == "ppg" else ["LEX", "REX"]
+    session = MetricsSession(LocalStream(names, 250), "rec", output=MemoryOutput)
+    assert set(session.outputs) == {output}
+    assert session.step() == {}
@@ -0,0 +1,66 @@
+"""Offline PPG analysis against the live tracker, hop by hop."""
+import os
+
+import numpy as np
+import pytest
+
+from funcpack.edf import load
+from funcpack.metrics import PPGBeatTracker
+from funcpack.offline import analyze_ppg
+
+FS = 250
+DATASET = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "dataset")
+KEYS = ("mean_rr", "sdnn", "rmssd", "hr", "rmssd_corrected")
+
+
+def synthetic_ppg(seconds=90, seed=0):
+    rng = np.random.default_rng(seed)
+    beats = np.cumsum(rng.uniform(0.6, 1.1, 2 * seconds)) - 0.4
+    beats = beats[beats < seconds]
+    t = np.arange(seconds * FS) / FS
+    sig = np.exp(-0.5 * ((t[:, np.newaxis] - beats) / 0.08) ** 2).sum(axis=1)
+    return sig + 0.01 * rng.standard_normal(t.size) + 2.0
+
+
+def live(ppg, fs, window, hop):
+    """What heart_params returned after every timer tick."""
+    tracker = PPGBeatTracker(fs, window=window, max_beats=int(ppg.size / fs * 4) + 16)
+    step = int(hop * fs)
+    ts = np.arange(ppg.size) / fs
+    rows = []
+    for start in range(0, ppg.size, step):
+        tracker.update(ppg[start:start + step], ts[start:start + step])
+        rows.append((tracker.last_ts, tracker.heart_params(window)))
+    return rows
+
+
+def assert_matches_live(ppg, fs, window, hop):
+    result = analyze_ppg(ppg, fs, window_size=window, hop=hop)
+    rows = live(ppg, fs, window, hop)
+    assert result["t"].size == len(rows)
+    np.testing.assert_array_equal(result["t"], [t for t, _ in rows])
+    for k, (_, params) in enumerate(rows):
+        if params is None:
+            assert result["num_peaks"][k] == 0
+            assert all(np.isnan(result[key][k]) for key in KEYS)
+            continue
+        assert result["num_peaks"][k] == params["num_peaks"]
+        for key in KEYS:
+            assert result[key][k] == pytest.approx(params[key], rel=1e-9), (k, key)
+
+
+@pytest.mark.parametrize("window, hop", [(8, 0.1), (15, 0.25), (5, 1.0)])
+def test_matches_live_synthetic(window, hop):
+    assert_matches_live(synthetic_ppg(), FS, window, hop)
+
+
+def test_matches_live_recording():
+    data, _, fs = load(os.path.join(DATASET, "PL_10_21082025_.edf"))
+    assert_matches_live(data[0], int(fs), 8, 0.1)
+
+
+def test_baseline_changes():
+    ppg = synthetic_ppg(seconds=80)
+    result = analyze_ppg(ppg, FS, window_size=8, baseline_duration=60)
+    assert result["baseline"]["num_peaks"] > 50
+    np.testing.assert_allclose(result["hr_change"], result["hr"] / result["baseline"]["hr"])
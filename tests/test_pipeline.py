@@ -0,0 +1,125 @@
+"""Pipeline: shared stages and features are computed once per chunk."""
+import numpy as np
+
+from funcpack.acquisition import AcquisitionService
+from funcpack.feedback import EMGFeedback, emg_stage, ppg_stage
+from funcpack.pipeline import Pipeline
+from funcpack.player import LocalStream
+
+FS = 250
+CHUNK = 50
+
+
+class Recorder:
+    """Stage that keeps what it was fed."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def update(self, data, ts):
+        self.chunks.append((np.array(data), np.array(ts)))
+
+    def samples(self):
+        return np.concatenate([d for d, _ in self.chunks], axis=-1)
+
+
+class Source:
+    def __init__(self, n_channels=3):
+        self.stream = LocalStream([f"ch{i}" for i in range(n_channels)], FS, backpressure=False)
+        self.acquisition = AcquisitionService(self.stream, bufsize=60)
+        self.pos = 0
+        self.rng = np.random.default_rng(0)
+        self.n_channels = n_channels
+
+    def push(self, n=CHUNK):
+        ts = (self.pos + np.arange(n)) / FS
+        data = self.rng.standard_normal((self.n_channels, n))
+        self.stream.push(data, ts)
+        self.acquisition.poll()
+        self.pos += n
+        return data
+
+
+def test_shared_stage_is_fed_once():
+    source = Source()
+    pipeline = Pipeline(source.acquisition)
+    built = []
+
+    def factory():
+        built.append(Recorder())
+        return built[-1]
+    key = pipeline.stage(("rec", 1), factory, picks=1)
+    assert pipeline.stage(("rec", 1), factory, picks=1) == key
+    other = pipeline.stage(("rec", (0, 2)), factory, picks=[0, 2])
+    assert len(built) == 2
+
+    sent = [source.push() for _ in range(4)]
+    # both consumers pull after every chunk, the second one is served as is
+    for _ in range(2):
+        assert pipeline.pull_stage(key) is built[0]
+    assert pipeline.stats()["stages"][str(key)] == {"refs": 2, "updates": 1}
+    for _ in range(2):
+        sent.append(source.push())
+        pipeline.pull_stage(key)
+        pipeline.pull_stage(key)
+    np.testing.assert_array_equal(built[0].samples(), np.concatenate(sent, axis=-1)[1])
+    np.testing.assert_array_equal(pipeline.pull_stage(other).samples(), np.concatenate(sent, axis=-1)[[0, 2]])
+    assert pipeline.stats()["chunks"] == 3
+
+    pipeline.release(key)
+    assert key in pipeline.stages
+    pipeline.release(key)
+    assert key not in pipeline.stages
+
+
+def test_feature_is_computed_once_per_chunk():
+    source = Source()
+    pipeline = Pipeline(source.acquisition)
+    calls = []
+
+    def total(rec):
+        calls.append(len(rec.chunks))
+        return rec.samples().sum()
+    stage = pipeline.stage("rec", Recorder, picks=0)
+    feature = pipeline.feature("sum", stage, total)
+    assert pipeline.feature("sum", pipeline.stage("rec", Recorder, picks=0), total) == feature
+    assert pipeline.stages["rec"]["refs"] == 1  # the feature holds the stage once
+
+    sent = []
+    for _ in range(3):
+        sent.append(source.push()[0])
+        values = [pipeline.pull(feature) for _ in range(3)]
+        assert values == [np.concatenate(sent).sum()] * 3
+    assert calls == [1, 2, 3]
+    assert pipeline.stats()["features"]["sum"] == {"refs": 2, "computed": 3, "cached": 6}
+
+    pipeline.release(feature)
+    pipeline.release(feature)
+    assert not pipeline.stages and not pipeline.features
+
+
+def test_lookback_starts_warm():
+    source = Source()
+    history = np.concatenate([source.push() for _ in range(10)], axis=-1)
+    pipeline = Pipeline(source.acquisition)
+    rec = pipeline.pull_stage(pipeline.stage("rec", Recorder, picks=2, lookback=1.0))
+    # one second of history, no new chunk yet
+    np.testing.assert_array_equal(rec.samples(), history[2, -FS:])
+    data = source.push()
+    np.testing.assert_array_equal(pipeline.pull_stage("rec").samples()[-CHUNK:], data[2])
+
+
+def test_feedback_windows_share_the_dsp():
+    """The heart plot and the PPG feedback, the EMG labels and the game: one tracker, one envelope."""
+    source = Source()
+    pipeline = Pipeline(source.acquisition)
+    heart, feedback = ppg_stage(pipeline, 0, 15), ppg_stage(pipeline, 0, 15)
+    assert heart == feedback and ppg_stage(pipeline, 0, 8) != heart
+
+    logic = EMGFeedback(FS, ["ch1", "ch2"], baseline_duration=1)
+    first, second = logic.attach(pipeline, [1, 2]), logic.attach(pipeline, [1, 2])
+    assert first == second
+    assert emg_stage(pipeline, [1, 2], logic.channels, 0.3) in pipeline.stages
+    # another filter order is another envelope
+    emg_stage(pipeline, [1, 2], logic.channels, 0.3, order=4)
+    assert len([k for k in pipeline.stages if k[0] == "emg.envelope"]) == 2
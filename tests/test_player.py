@@ -0,0 +1,70 @@
+"""EDFPlayer: timestamps, push times and channel types."""
+import glob
+import os
+import time
+
+import numpy as np
+import pytest
+
+from funcpack import columnar
+from funcpack.edf import EDFReader
+from funcpack.player import EDFPlayer
+from funcpack.profiling import LatencyMonitor
+
+DATASET = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "dataset")
+FNAME = os.path.join(DATASET, "type_1_20s.edf")
+
+
+@pytest.mark.parametrize("fname", sorted(glob.glob(os.path.join(DATASET, "*.edf"))),
+                         ids=os.path.basename)
+def test_channel_types_match_mne(fname, tmp_path):
+    mne = pytest.importorskip("mne")
+    raw = mne.io.read_raw_edf(fname, infer_types=True, verbose="ERROR")
+    with EDFReader(fname) as reader:
+        assert reader.ch_types == raw.get_channel_types()
+    with columnar.ColumnarReader(columnar.convert(fname, str(tmp_path / "rec.col"))) as reader:
+        assert reader.ch_types == raw.get_channel_types()
+
+    player = EDFPlayer(fname, output="local")
+    assert player.stream.get_channel_types() == raw.get_channel_types()
+
+
+def test_lsl_stream_has_the_channel_types():
+    pytest.importorskip("mne_lsl")
+    from funcpack.player import LSLOutput
+
+    output = LSLOutput(["PPG", "LEX"], 250, ch_types=["eeg", "emg"])
+    assert output.info.get_channel_types() == ["eeg", "emg"]
+    output.disconnect()
+
+
+def test_timestamps_follow_the_recording_and_push_times_the_clock():
+    player = EDFPlayer(FNAME, chunk_size=50, speed=8, loop=False, output="local")
+    latency = LatencyMonitor(source=player.push_time)
+    reads = []
+    player.start()
+    try:
+        while not player.finished.is_set() or player.stream.n_new_samples:
+            n = player.stream.n_new_samples
+            if n:
+                data, ts = player.stream.get_data(n / player.fs)
+                reads.append((ts, time.monotonic(), latency.record("feedback", ts[-1])))
+            time.sleep(0.005)
+    finally:
+        player.stop()
+
+    ts = np.concatenate([t for t, _, _ in reads])
+    assert ts.size == player.reader.n_times
+    # one sample period apart, whatever the speed
+    np.testing.assert_allclose(np.diff(ts), 1 / player.fs, rtol=1e-9)
+    # while eight seconds of recording are replayed per second
+    assert ts[-1] - ts[0] > 5 * (reads[-1][1] - reads[0][1])
+
+    for chunk, read_at, lat in reads:
+        pushed = [player.push_time(t) for t in chunk]
+        assert all(p is not None and p <= read_at for p in pushed)
+        assert pushed == sorted(pushed)
+        # samples of one chunk share its push time
+        assert len(set(pushed[-50:])) == 1
+        assert 0 <= lat < 0.5
+    assert player.push_time(ts[-1] + 1.0) is None
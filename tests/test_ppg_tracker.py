@@ -0,0 +1,103 @@
+"""PPGBeatTracker against the batch detector on a synthetic PPG with known beats."""
+import numpy as np
+import pytest
+from scipy.signal import find_peaks
+
+from funcpack.filters import FilterBank
+from funcpack.metrics import PPGBeatTracker, rr_params
+
+FS = 250
+SECONDS = 120
+
+
+def synthetic_ppg(seconds=SECONDS, seed=0):
+    """(signal, beat times): one pulse per beat, RR drawn from 0.65-1.1 s on the sample grid."""
+    rng = np.random.default_rng(seed)
+    rr = np.round(rng.uniform(0.65, 1.1, 2 * seconds) * FS) / FS
+    beats = np.cumsum(rr) - rr[0] + 0.25
+    beats = beats[beats < seconds - 1]
+    t = np.arange(seconds * FS) / FS
+    sig = np.exp(-0.5 * ((t[:, np.newaxis] - beats) / 0.08) ** 2).sum(axis=1)
+    return sig + 0.01 * rng.standard_normal(t.size), beats
+
+
+def feed(tracker, sig, chunk):
+    """Feed ``sig`` in ``chunk`` samples, or random sizes up to 60 with ``chunk=None``."""
+    rng = np.random.default_rng(1)
+    pos = 0
+    while pos < sig.size:
+        n = chunk or int(rng.integers(1, 60))
+        tracker.update(sig[pos:pos + n])
+        pos += n
+    return tracker
+
+
+@pytest.mark.parametrize("chunk", [1, 25, None])
+def test_beats_match_find_peaks(chunk):
+    """Beats are what find_peaks selects on the same causally filtered signal."""
+    sig, beats = synthetic_ppg()
+    tracker = feed(PPGBeatTracker(FS, window=15), sig, chunk)
+
+    filtered = FilterBank.hrv(FS).process(sig)
+    peaks, _ = find_peaks(filtered, distance=tracker.distance, prominence=0.3 * np.std(sig))
+    assert tracker.beat_index.total == len(peaks) == len(beats)
+    np.testing.assert_array_equal(tracker.beat_index.last(), peaks)
+    np.testing.assert_array_equal(tracker.beat_times.last(), peaks / FS)
+    np.testing.assert_array_equal(tracker.rr.last(), np.diff(peaks / FS))
+
+
+def test_rr_match_the_true_beats():
+    sig, beats = synthetic_ppg(seed=2)
+    tracker = feed(PPGBeatTracker(FS, window=15), sig, 25)
+
+    # (the filter rings after the last pulse, where the recording is flat)
+    times = tracker.beat_times.last()
+    times = times[times < beats[-1] + 0.1]
+    assert times.size == beats.size
+    # the causal filter delays every pulse by the same few samples
+    np.testing.assert_allclose(np.diff(times), np.diff(beats), rtol=0, atol=2 / FS + 1e-9)
+
+
+def test_heart_params_reads_the_beat_buffer():
+    sig, _ = synthetic_ppg()
+    tracker = feed(PPGBeatTracker(FS, window=15), sig, 25)
+
+    for window in (5, 8, 15):
+        times = tracker.beats(window)
+        assert times[0] > tracker.last_ts - window
+        params = tracker.heart_params(window)
+        expected = rr_params(np.diff(times))
+        for key in ("mean_rr", "sdnn", "rmssd", "num_peaks", "hr", "rmssd_corrected"):
+            assert params[key] == pytest.approx(expected[key], rel=1e-9), key
+        # peaks index into the window of filtered samples
+        n = int(window * FS)
+        np.testing.assert_array_equal(tracker.filtered.last(n)[params["peaks"]],
+                                      tracker.filtered.last()[params["peaks"] + tracker.filtered.capacity - n])
+
+
+def test_beats_are_confirmed_once():
+    """A beat is never moved or dropped after it was confirmed."""
+    sig, _ = synthetic_ppg(seed=3)
+    tracker = PPGBeatTracker(FS, window=15)
+    confirmed = []
+    for pos in range(0, sig.size, 25):
+        tracker.update(sig[pos:pos + 25])
+        now = tracker.beat_index.last().tolist()
+        assert now[:len(confirmed)] == confirmed
+        confirmed = now
+
+
+def test_heart_params_while_streaming():
+    """The running window statistics follow the beats as they are confirmed and expire."""
+    sig, _ = synthetic_ppg(seed=4)
+    tracker = PPGBeatTracker(FS, window=15)
+    for pos in range(0, sig.size, 25):
+        tracker.update(sig[pos:pos + 25])
+        params = tracker.heart_params(8)
+        times = tracker.beats(8)
+        if times.size < 3:
+            assert params is None
+            continue
+        expected = rr_params(np.diff(times))
+        for key in ("mean_rr", "sdnn", "rmssd", "num_peaks", "hr"):
+            assert params[key] == pytest.approx(expected[key], rel=1e-9), key
@@ -0,0 +1,28 @@
+"""Profiler timer-loop counters."""
+import time
+
+import pytest
+
+from funcpack.profiling import Profiler
+
+
+@pytest.mark.parametrize("interval", [0, 0.0, None])
+def test_tick_without_a_period(interval):
+    profiler = Profiler()
+    for _ in range(3):
+        profiler.tick("data", interval)
+        time.sleep(0.002)
+    loop = profiler.summary()["loops"]["data"]
+    assert loop["ticks"] == 2
+    assert loop["late"] == loop["missed"] == 0
+    assert profiler.summary()["stages"]["data.interval"]["count"] == 2
+
+
+def test_late_ticks_count_the_missed_ones():
+    profiler = Profiler(late_factor=1.5)
+    profiler.tick("plot", 0.01)
+    time.sleep(0.035)
+    profiler.tick("plot", 0.01)
+    loop = profiler.summary()["loops"]["plot"]
+    assert loop["late"] == 1
+    assert loop["missed"] >= 2
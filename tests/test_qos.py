@@ -0,0 +1,92 @@
+"""Load shedding and the scheduler rates it changes."""
+import numpy as np
+
+from funcpack.qos import LABELS_SLOW, NORMAL, PLOT_DECIMATED, PLOT_OFF, LoadShedder
+from funcpack.scheduler import DataScheduler
+
+PERIOD = 0.25
+
+
+def drive(shedder, loads, lag=0.0, start=0.0):
+    """Feed one check per ``loads`` entry (worker utilisation); returns the levels after each."""
+    levels = []
+    busy = 0.0
+    for k, load in enumerate(loads):
+        busy += load * PERIOD
+        shedder.update(start + (k + 1) * PERIOD, busy, lag, 0)
+        levels.append(shedder.level)
+    return levels
+
+
+def test_degrades_one_level_at_a_time_and_recovers():
+    shedder = LoadShedder(degrade_after=2, recover_after=8)
+    shedder.update(0.0, 0.0, 0.0, 0)
+    # two overloaded checks per level
+    assert drive(shedder, [0.9] * 8) == [NORMAL, PLOT_DECIMATED, PLOT_DECIMATED, PLOT_OFF,
+                                         PLOT_OFF, LABELS_SLOW, LABELS_SLOW, LABELS_SLOW]
+    # medium load holds the level
+    assert drive(shedder, [0.6] * 20, start=2.0)[-1] == LABELS_SLOW
+    # eight quiet checks per level back
+    levels = drive(shedder, [0.1] * 24, start=7.0)
+    assert levels[7] == PLOT_OFF and levels[15] == PLOT_DECIMATED and levels[23] == NORMAL
+    assert [new for _, _, new, _ in shedder.history] == [1, 2, 3, 2, 1, 0]
+    assert "busy" in shedder.history[0][3]
+
+
+def test_lag_and_dropped_jobs_also_shed():
+    shedder = LoadShedder(degrade_after=1)
+    shedder.update(0.0, 0.0, 0.0, 0)
+    assert shedder.update(PERIOD, 0.0, 0.2, 0) == PLOT_DECIMATED
+    assert "lag" in shedder.history[-1][3]
+    assert shedder.update(2 * PERIOD, 0.0, 0.0, 3) == PLOT_OFF
+    assert "3 stale jobs" in shedder.history[-1][3]
+    assert shedder.update(3 * PERIOD, 0.0, 0.0, 3) is None  # cumulative counts, nothing new
+
+
+def test_labels_are_slowed_only_at_the_last_level():
+    shedder = LoadShedder(label_interval=0.5)
+    assert all(shedder.labels_due("ppg", k / 8) for k in range(8))
+    shedder.level = LABELS_SLOW
+    due = [k / 8 for k in range(8, 24) if shedder.labels_due("ppg", k / 8)]
+    assert due == [1.375, 1.875, 2.375, 2.875]  # the last refresh was at 0.875
+    assert shedder.labels_due("emg", 1.05)  # every group on its own
+
+
+def test_scheduler_respects_the_rates():
+    scheduler = DataScheduler()
+    scheduler.add("plot", lambda: None, rate=10, priority=0)
+    scheduler.add("feedback", lambda: None, rate=30, priority=2)
+    scheduler.add("baseline", lambda: None, rate=None, priority=1, min_samples=50)
+
+    # new samples every 5 ms for 2 s
+    runs = {name: [] for name in scheduler.consumers}
+    for k in range(400):
+        now = k * 0.005
+        for name in scheduler.due(cursor=k + 1, now=now):
+            runs[name].append(now)
+    assert len(runs["plot"]) == 20 and np.diff(runs["plot"]).min() >= 0.1 - 1e-9
+    # 1/30 s is not a multiple of the 5 ms arrivals: every 35 ms
+    assert len(runs["feedback"]) == 58 and np.diff(runs["feedback"]).min() >= 1 / 30 - 1e-9
+    # no rate: every min_samples new samples
+    assert len(runs["baseline"]) == 8
+    assert scheduler.stats()["plot"]["coalesced"] == 380
+
+    # the QoS level changes a rate on the fly
+    scheduler.set_rate("plot", 2)
+    start = 2.0
+    plot = [start + k * 0.005 for k in range(400)
+            if "plot" in scheduler.due(cursor=401 + k, now=start + k * 0.005)]
+    assert len(plot) == 4 and np.diff(plot).min() >= 0.5 - 1e-9
+
+
+def test_scheduler_skips_consumers_without_new_data():
+    scheduler = DataScheduler()
+    calls = []
+    scheduler.add("low", lambda: calls.append("low"), rate=100, priority=0)
+    scheduler.add("high", lambda: calls.append("high"), rate=100, priority=5)
+    assert scheduler.run(cursor=10, now=0.0) == ["high", "low"]
+    assert calls == ["high", "low"]
+    assert scheduler.run(cursor=10, now=1.0) == []  # no new samples
+    assert scheduler.stats()["low"]["idle"] == 1
+    assert scheduler.next_deadline(10) is None
+    assert scheduler.next_deadline(11) == 0.01
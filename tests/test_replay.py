@@ -0,0 +1,56 @@
+"""Headless replay: deterministic, chunking-independent baselines, GUI rates."""
+import json
+import os
+
+import numpy as np
+import pytest
+
+from funcpack.replay import CONSUMERS, FRAME, replay
+
+DATASET = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "dataset")
+FNAME = os.path.join(DATASET, "NeoRec_2025-11-04_16-47-32.edf")
+
+
+@pytest.fixture(scope="module")
+def result():
+    return replay(FNAME)
+
+
+def events(result, name):
+    return [e for e in result["events"] if e["name"] == name]
+
+
+def test_replay_is_deterministic(result):
+    again = replay(FNAME)
+    assert json.dumps(again["events"]) == json.dumps(result["events"])
+    assert again["stats"]["scheduler"] == result["stats"]["scheduler"]
+
+
+def test_every_part_runs(result):
+    counts = result["stats"]["events"]
+    assert counts["ppg_baseline"] == counts["emg_baseline"] == 1
+    # one feedback per 200-sample chunk after the baselines, 30 game frames per second
+    assert counts["ppg_feedback"] >= 38 and counts["emg_feedback"] >= 88 and counts["game"] > 2000
+    # the baselines are complete when their samples have arrived
+    assert events(result, "emg_baseline")[0]["t"] == pytest.approx(20, abs=0.8)
+    assert events(result, "ppg_baseline")[0]["t"] == pytest.approx(60, abs=0.8)
+
+
+def test_consumers_keep_the_gui_rates(result):
+    for name in ("ppg_feedback", "emg_feedback"):
+        t = np.array([e["t"] for e in events(result, name)])
+        rate = CONSUMERS["emg_features" if name == "emg_feedback" else name][0]
+        assert np.diff(t).min() >= 1 / rate - 1e-6, name
+    # the game runs at its frame rate, on the latest values
+    t = np.array([e["t"] for e in events(result, "game")])
+    np.testing.assert_allclose(np.diff(t), FRAME, atol=1e-6)
+    ts = [e["ts"] for e in events(result, "game")]
+    assert ts == sorted(ts)
+
+
+def test_baselines_do_not_depend_on_the_chunk_size(result):
+    other = replay(FNAME, chunk_size=37, game=False)
+    for name in ("ppg_baseline", "emg_baseline"):
+        a, b = events(result, name)[0]["params"], events(other, name)[0]["params"]
+        assert json.dumps(a, sort_keys=True) == json.dumps(b, sort_keys=True), name
+    assert "game" not in other["stats"]["events"]
@@ -0,0 +1,73 @@
+"""RRWindowStats against rr_params on sliding windows of an RR series."""
+import numpy as np
+import pytest
+
+from funcpack.metrics import RRWindowStats, rr_params
+
+KEYS = ("mean_rr", "sdnn", "rmssd", "num_peaks", "hr", "rmssd_corrected")
+
+
+def rr_series(n=3000, seed=0):
+    """(beat times, RR intervals) with slow drift, breathing and a few ectopic beats."""
+    rng = np.random.default_rng(seed)
+    k = np.arange(n)
+    rr = 0.85 + 0.1 * np.sin(2 * np.pi * k / 900) + 0.04 * np.sin(2 * np.pi * k / 4.5)
+    rr += 0.02 * rng.standard_normal(n)
+    rr[rng.choice(n, 20, replace=False)] *= 0.6
+    return np.concatenate([[0.0], np.cumsum(rr)]), rr
+
+
+def assert_params(actual, expected):
+    for key in KEYS:
+        assert actual[key] == pytest.approx(expected[key], rel=1e-9, abs=1e-12), key
+
+
+def test_count_window():
+    times, rr = rr_series()
+    stats = RRWindowStats(max_count=60, max_seconds=None)
+    for i, (t, x) in enumerate(zip(times, rr)):
+        stats.add(t, x)
+        window = rr[max(0, i - 59):i + 1]
+        assert len(stats) == window.size
+        if window.size >= 2:
+            assert_params(stats.params(), rr_params(window))
+        else:
+            assert stats.params() is None
+
+
+@pytest.mark.parametrize("seconds", [15, 300])
+def test_time_window(seconds):
+    """An interval stays while the beat that starts it is within the window."""
+    times, rr = rr_series()
+    stats = RRWindowStats(max_seconds=seconds)
+    for i, (t, x) in enumerate(zip(times, rr)):
+        stats.add(t, x)
+        now = times[i + 1]  # the beat that closes the interval
+        stats.expire(now)
+        first = np.searchsorted(times, now - seconds, side="right")
+        window = rr[first:i + 1]
+        assert len(stats) == window.size
+        if window.size >= 2:
+            assert_params(stats.params(), rr_params(window))
+
+
+def test_memory_is_bounded():
+    times, rr = rr_series(n=30000)
+    stats = RRWindowStats(max_seconds=None, limit=500)
+    for t, x in zip(times, rr):
+        stats.add(t, x)
+    # past several resyncs of the running sums
+    assert len(stats) == len(stats._sorted) == 500
+    assert_params(stats.params(), rr_params(rr[-500:]))
+
+
+def test_clear():
+    times, rr = rr_series(n=100)
+    stats = RRWindowStats(max_count=30)
+    for t, x in zip(times, rr):
+        stats.add(t, x)
+    stats.clear()
+    assert len(stats) == 0 and stats.params() is None
+    for t, x in zip(times[:10], rr[:10]):
+        stats.add(t, x)
+    assert_params(stats.params(), rr_params(rr[:10]))
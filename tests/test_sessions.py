@@ -0,0 +1,73 @@
+"""SessionManager: a busy participant is skipped, the others keep their ticks."""
+import threading
+import time
+
+import pytest
+
+from funcpack.metrics_server import MemoryOutput
+from funcpack.player import LocalStream
+from funcpack.sessions import SessionManager
+
+
+def wait_idle(manager, name, timeout=2):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        future = manager._state[name]["future"]
+        if future is None or future.done():
+            return True
+        time.sleep(0.001)
+    return False
+
+
+@pytest.fixture
+def manager():
+    manager = SessionManager(workers=2, output=MemoryOutput)
+    yield manager
+    manager.stop()
+
+
+def test_busy_session_is_skipped(manager):
+    for name in ("slow", "fast"):
+        manager.add(name, LocalStream(["PPG", "LEX"], 250))
+    release = threading.Event()
+    slow = manager.sessions["slow"]
+    step = slow.step
+    slow.step = lambda: release.wait(5) and step()
+
+    assert manager.tick() == ["slow", "fast"]
+    for _ in range(5):
+        assert wait_idle(manager, "fast")
+        # the slow step is still running: no second one is queued behind it
+        assert manager.tick() == ["fast"]
+
+    status = manager.status()
+    assert status["slow"]["skipped"] == 5 and status["slow"]["runs"] == 0
+    assert status["fast"]["skipped"] == 0 and status["fast"]["runs"] >= 5
+
+    release.set()
+    assert wait_idle(manager, "slow")
+    assert manager.status()["slow"]["runs"] == 1
+    assert sorted(manager.tick()) == ["fast", "slow"]
+
+
+def test_errors_are_counted_per_session(manager):
+    session = manager.add("broken", LocalStream(["PPG"], 250))
+
+    def fail():
+        raise ValueError("Not enough beats")
+    session.step = fail
+    manager.tick()
+    assert wait_idle(manager, "broken")
+    status = manager.status()["broken"]
+    assert status["errors"] == 1 and status["error"] == "Not enough beats" and status["runs"] == 1
+
+
+def test_names_are_unique_and_removed_sessions_stop(manager):
+    stream = LocalStream(["PPG"], 250)
+    session = manager.add("p1", stream)
+    with pytest.raises(ValueError):
+        manager.add("p1", LocalStream(["PPG"], 250))
+    manager.remove("p1")
+    assert "p1" not in manager.status()
+    assert not session.acquisition.alive
+    assert manager.tick() == []
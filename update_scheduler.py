@@ -0,0 +1,77 @@
+import time
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+from funcpack.profiling import NULL_PROFILER
+from funcpack.scheduler import DataScheduler
+
+
+class UpdateScheduler(QObject):
+    """Runs GUI update slots when the acquisition delivers new samples.
+
+    Replaces the fixed-interval QTimers: the acquisition thread only emits
+    ``data_arrived``, Qt delivers it to the GUI thread, and a
+    ``DataScheduler`` picks the consumers that have new data and are within
+    their target rate, highest priority first. Consumers held back by their
+    rate are run by a single-shot timer at their next deadline, so the last
+    chunk is never left unprocessed.
+    """
+
+    data_arrived = pyqtSignal(int)
+
+    def __init__(self, profiler=NULL_PROFILER, parent=None):
+        super().__init__(parent)
+        self.schedule = DataScheduler()
+        self.profiler = profiler
+        self.acquisition = None
+        self.arrived_at = None  # when the newest data arrived
+        self.period = None      # smoothed time between arrivals, s
+
+        self._notify = self.data_arrived.emit  # one bound method, to remove it again
+        self.data_arrived.connect(self._on_data)
+        self._deadline = QTimer(self)
+        self._deadline.setSingleShot(True)
+        self._deadline.timeout.connect(self.dispatch)
+
+    def attach(self, acquisition):
+        """Follow the write cursor of ``acquisition`` (None to detach)."""
+        if self.acquisition is not None:
+            self.acquisition.remove_listener(self._notify)
+        self.acquisition = acquisition
+        self.arrived_at = self.period = None
+        if acquisition is not None:
+            acquisition.add_listener(self._notify)
+
+    def add(self, name, callback, rate=None, priority=0, min_samples=1):
+        self.schedule.add(name, callback, rate=rate, priority=priority, min_samples=min_samples)
+
+    def remove(self, name):
+        self.schedule.remove(name)
+
+    def set_rate(self, name, rate):
+        self.schedule.set_rate(name, rate)
+
+    def _on_data(self, cursor):
+        now = time.monotonic()
+        if self.arrived_at is not None:
+            dt = now - self.arrived_at
+            self.period = dt if self.period is None else 0.9 * self.period + 0.1 * dt
+        self.arrived_at = now
+        self.dispatch()
+
+    def dispatch(self):
+        if self.acquisition is None:
+            return
+        cursor = self.acquisition.cursor
+        now = time.monotonic()
+        for name in self.schedule.due(cursor, now):
+            consumer = self.schedule.consumers.get(name)
+            if consumer is None:  # removed by an earlier callback
+                continue
+            # expected period: the target rate or the data rate, whichever is slower
+            self.profiler.tick(name, max(consumer["interval"], self.period or 0))
+            consumer["callback"]()
+
+        deadline = self.schedule.next_deadline(cursor)
+        if deadline is not None:
+            self._deadline.start(max(0, int(1000 * (deadline - now)) + 1))